@@ -0,0 +1,29 @@
+-- Queue of agent runs executed by background workers (JOB_QUEUE_BACKEND=database)
+--
+-- Prisma owns the schema, so add the model below to next/prisma/schema.prisma
+-- and run `prisma db push`, or apply this file to an existing MySQL database.
+-- The two are equivalent; without the model, prisma db push drops the table.
+--
+-- model AgentJob {
+--   id           String   @id
+--   payload      String   @db.Text
+--   status       String   @default("queued")
+--   attempts     Int      @default(0)
+--   available_at DateTime
+--   create_date  DateTime @default(now())
+--
+--   @@index([status, available_at], map: "agent_job_status_available_at_idx")
+--   @@map("agent_job")
+-- }
+
+CREATE TABLE IF NOT EXISTS `agent_job` (
+    `id`           VARCHAR(191) NOT NULL,
+    `payload`      TEXT         NOT NULL,
+    `status`       VARCHAR(191) NOT NULL DEFAULT 'queued',
+    `attempts`     INT          NOT NULL DEFAULT 0,
+    `available_at` DATETIME(3)  NOT NULL,
+    `create_date`  DATETIME(3)  NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+
+    PRIMARY KEY (`id`),
+    INDEX `agent_job_status_available_at_idx` (`status`, `available_at`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
@@ -0,0 +1,32 @@
+-- Steps of each type counted against a run's loop limits
+--
+-- Prisma owns the schema, so add the model below to next/prisma/schema.prisma
+-- and run `prisma db push`, or apply this file to an existing MySQL database.
+-- The two are equivalent; without the model, prisma db push drops the table.
+-- Runs started before this table existed get their counters on their next
+-- step, counted from their agent_task rows, which the (run_id, type) index
+-- keeps from scanning. Add it to the Task model as well:
+--
+--   @@index([run_id, type])
+--
+-- model AgentRunStepCount {
+--   id     String @id
+--   run_id String
+--   type   String
+--   count  Int    @default(0)
+--
+--   @@unique([run_id, type])
+--   @@map("agent_run_step_count")
+-- }
+
+CREATE TABLE IF NOT EXISTS `agent_run_step_count` (
+    `id`     VARCHAR(191) NOT NULL,
+    `run_id` VARCHAR(191) NOT NULL,
+    `type`   VARCHAR(191) NOT NULL,
+    `count`  INT          NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (`id`),
+    UNIQUE INDEX `agent_run_step_count_run_id_type_key` (`run_id`, `type`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+CREATE INDEX `agent_task_run_id_type_idx` ON `agent_task` (`run_id`, `type`);
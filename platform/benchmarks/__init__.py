@@ -0,0 +1 @@
+"""Micro benchmarks for the platform. Run with `poetry run python -m benchmarks.<name>`"""
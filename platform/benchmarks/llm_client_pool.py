@@ -0,0 +1,89 @@
+"""
+Cost of getting a chat model for a request.
+
+Compares constructing a new model for every request, as agent services used to,
+with handing out a view of a pooled model. No requests are sent.
+
+    poetry run python -m benchmarks.llm_client_pool [requests]
+"""
+
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+from reworkd_platform.schemas.agent import ModelSettings
+from reworkd_platform.schemas.user import UserBase
+from reworkd_platform.settings import Settings
+from reworkd_platform.web.api.agent.model_factory import (
+    LLMClientPool,
+    WrappedChatOpenAI,
+    get_headers,
+)
+
+REQUESTS = 10_000
+USERS = 100
+
+
+def construct(
+    settings: Settings, model_settings: ModelSettings, user: UserBase
+) -> WrappedChatOpenAI:
+    """A new model for every request, as before the pool"""
+    return WrappedChatOpenAI(
+        openai_api_base=settings.openai_api_base,
+        openai_api_key=settings.openai_api_key,
+        temperature=model_settings.temperature,
+        model=model_settings.model,
+        max_tokens=model_settings.max_tokens,
+        streaming=True,
+        max_retries=5,
+        model_kwargs={"user": user.email, "headers": get_headers(settings, user)},
+    )
+
+
+def measure(get_model: Callable[[int], object], requests: int) -> List[float]:
+    timings = []
+    for i in range(requests):
+        start = time.perf_counter()
+        get_model(i)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+
+    return timings
+
+
+def report(name: str, timings: List[float]) -> None:
+    timings = sorted(timings)
+    print(
+        f"{name:<12} mean {statistics.mean(timings):8.1f}us"
+        f"  p50 {timings[len(timings) // 2]:8.1f}us"
+        f"  p99 {timings[int(len(timings) * 0.99)]:8.1f}us"
+    )
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS
+    settings = Settings(openai_api_key="sk-benchmark")
+    model_settings = ModelSettings()
+    users = [UserBase(id=f"user-{i}", email=f"{i}@example.com") for i in range(USERS)]
+    pool = LLMClientPool(max_entries=settings.llm_client_pool_size)
+
+    print(f"{requests} requests from {USERS} users\n")
+    report(
+        "construct",
+        measure(
+            lambda i: construct(settings, model_settings, users[i % USERS]),
+            requests,
+        ),
+    )
+    report(
+        "pool",
+        measure(
+            lambda i: pool.get(settings, model_settings, users[i % USERS], True),
+            requests,
+        ),
+    )
+    print(f"\npool: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
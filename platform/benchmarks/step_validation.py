@@ -0,0 +1,147 @@
+"""
+Cost of validating and recording an agent step against a large agent_task table.
+
+Compares the legacy path (run lookup, COUNT over agent_task, INSERT) with and
+without the (run_id, type) index against the step counter path (conditional
+UPDATE, INSERT). Runs against a temporary SQLite database.
+
+    poetry run python -m benchmarks.step_validation [tasks]
+"""
+
+import asyncio
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from reworkd_platform.db.crud.agent import AgentCRUD
+from reworkd_platform.db.models.agent import AgentRun, AgentRunStepCount, AgentTask
+from reworkd_platform.schemas.user import UserBase
+
+TASKS = 2_000_000
+TASKS_PER_RUN = 50
+TYPES = ["start", "analyze", "execute", "create", "summarize"]
+SAMPLES = 2000
+
+Step = Callable[[AgentCRUD, str], Awaitable[None]]
+
+
+def populate(path: Path, tasks: int) -> None:
+    runs = tasks // TASKS_PER_RUN
+    types = " ".join(f"WHEN {i} THEN '{t}'" for i, t in enumerate(TYPES))
+
+    sequence = "WITH RECURSIVE seq(x) AS (SELECT 0 UNION ALL SELECT x + 1 FROM seq"
+
+    with sqlite3.connect(path) as db:
+        db.execute(
+            f"""
+            {sequence} LIMIT {runs})
+            INSERT INTO agent_run (id, user_id, goal, create_date)
+            SELECT 'run-' || x, 'user', 'goal', CURRENT_TIMESTAMP FROM seq
+            """
+        )
+        db.execute(
+            f"""
+            {sequence} LIMIT {tasks})
+            INSERT INTO agent_task (id, run_id, type, create_date)
+            SELECT 'task-' || x, 'run-' || (x % {runs}),
+                CASE (x / {runs}) % {len(TYPES)} {types} END, CURRENT_TIMESTAMP
+            FROM seq
+            """
+        )
+        db.execute(
+            """
+            INSERT INTO agent_run_step_count (id, run_id, type, count)
+            SELECT run_id || '-' || type, run_id, type, COUNT(*)
+            FROM agent_task GROUP BY run_id, type
+            """
+        )
+
+
+async def measure(engine: AsyncEngine, runs: int, step: Step) -> List[float]:
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    user = UserBase(id="user", name=None, email=None)
+    timings = []
+
+    async with session_maker() as session:
+        crud = AgentCRUD(session, user)
+        for _ in range(SAMPLES):
+            run_id = f"run-{random.randrange(runs)}"
+            start = time.perf_counter()
+            await step(crud, run_id)
+            timings.append(time.perf_counter() - start)
+
+        await session.rollback()
+
+    return timings
+
+
+async def legacy(crud: AgentCRUD, run_id: str) -> None:
+    await crud.validate_task_count(run_id, "execute")
+    await AgentTask(run_id=run_id, type_="execute").save(crud.session)
+
+
+async def counters(crud: AgentCRUD, run_id: str) -> None:
+    await crud.create_task(run_id, "execute")
+
+
+def report(name: str, timings: List[float], statements: int) -> None:
+    quantiles = statistics.quantiles(timings, n=100)
+    print(
+        f"{name:<28} p50={quantiles[49] * 1000:7.3f}ms "
+        f"p99={quantiles[98] * 1000:7.3f}ms "
+        f"statements/step={statements / len(timings):.1f}"
+    )
+
+
+async def main(tasks: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "benchmark.db"
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+        statements = 0
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def count(*_: object) -> None:
+            nonlocal statements
+            statements += 1
+
+        tables = [AgentRun.__table__, AgentTask.__table__, AgentRunStepCount.__table__]
+        async with engine.begin() as conn:
+            await conn.run_sync(AgentRun.metadata.create_all, tables=tables)
+
+        print(f"Populating {tasks} tasks")
+        populate(path, tasks)
+        runs = tasks // TASKS_PER_RUN
+
+        async def run(name: str, step: Step) -> None:
+            nonlocal statements
+            statements = 0
+            timings = await measure(engine, runs, step)
+            report(name, timings, statements)
+
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("DROP INDEX agent_task_run_id_type_idx")
+            await conn.exec_driver_sql("CREATE INDEX run_id_idx ON agent_task (run_id)")
+        await run("legacy (run_id index)", legacy)
+
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("DROP INDEX run_id_idx")
+            await conn.exec_driver_sql(
+                "CREATE INDEX agent_task_run_id_type_idx ON agent_task (run_id, type)"
+            )
+        await run("legacy (run_id, type index)", legacy)
+        await run("step counters", counters)
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else TASKS))
@@ -0,0 +1,116 @@
+"""
+Cost of parsing task lists out of completions.
+
+Compares the legacy parser, which matched raw pattern strings on every call,
+parsed arrays with ast and excluded completed tasks by list membership, with
+TaskOutputParser over a corpus of completions in the shapes models return.
+
+    poetry run python -m benchmarks.task_output_parser [iterations]
+"""
+
+import ast
+import json
+import re
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+from reworkd_platform.web.api.agent.task_output_parser import TaskOutputParser
+
+ITERATIONS = 2_000
+COMPLETED_TASKS = 50
+
+CORPUS = [
+    '["Search the web for recent NBA news", "Summarize the key storylines of the'
+    ' season", "Write a short report on the playoff picture"]',
+    '[\n  "Research the history and background of Nike",\n  "Analyze Nike\'s'
+    ' marketing strategies",\n  "Compare Nike with its main competitors",\n  "Identi'
+    'fy Nike\'s key products and revenue drivers",\n  "Write a summary of findings"'
+    "\n]",
+    "['Create a function to add a vertex to the digraph', 'Create a function to"
+    " remove a vertex', 'Write unit tests for both functions']",
+    "1. Research the best hiking trails near Seattle\n2. Check the weather forecast"
+    " for the weekend\n3. Make a packing list for a day hike\n4. Find parking and"
+    " permit requirements",
+    "Here are the tasks:\n\n1. Gather sales data for the last quarter\n2. Clean and"
+    " normalize the data\n3. Build charts of revenue per region\n4. Draft an"
+    " executive summary",
+    '["Search for any additional information on Bertie W.", "No new tasks'
+    ' required", "Do nothing"]',
+    json.dumps([f"Investigate subtopic {i} of the goal" for i in range(20)]),
+]
+
+
+def legacy_parse(text: str, completed_tasks: List[str]) -> List[str]:
+    """The parser before patterns were compiled and completed tasks hashed"""
+    regex = (
+        r"\[(?:\s*(?:\"[^\"\\]*(?:\\.[^\"\\]*)*\"|\'[^\'\\]*(?:\\.[^\'\\]*)*\')"
+        r"\s*,?)*\s*\]"
+    )
+    if re.fullmatch(regex, text) is not None:
+        tasks = ast.literal_eval(text)
+    else:
+        tasks = [
+            re.sub(r".*?(\d+\..+)", r"\1", line).strip()
+            for line in text.split("\n")
+            if line.strip() != ""
+        ]
+
+    def real(task: str) -> bool:
+        return (
+            not re.fullmatch(
+                r"^No( (new|further|additional|extra|other))? tasks? (is )?("
+                r"required|needed|added|created|inputted).*",
+                task,
+                re.IGNORECASE,
+            )
+            and not re.fullmatch(
+                r"^Task (complete|completed|finished|done|over|success).*",
+                task,
+                re.IGNORECASE,
+            )
+            and not re.fullmatch(r"^(\s*|Do nothing(\s.*)?)$", task, re.IGNORECASE)
+        )
+
+    return [t for t in tasks if real(t) and t not in completed_tasks]
+
+
+def measure(parse: Callable[[str], List[str]], iterations: int) -> List[float]:
+    timings = []
+    for i in range(iterations):
+        text = CORPUS[i % len(CORPUS)]
+        start = time.perf_counter()
+        parse(text)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+
+    return timings
+
+
+def report(name: str, timings: List[float]) -> None:
+    timings = sorted(timings)
+    print(
+        f"{name:<10} mean {statistics.mean(timings):8.1f}us"
+        f"  p50 {timings[len(timings) // 2]:8.1f}us"
+        f"  p99 {timings[int(len(timings) * 0.99)]:8.1f}us"
+    )
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else ITERATIONS
+    completed = [f"Completed task number {i}" for i in range(COMPLETED_TASKS)]
+    parser = TaskOutputParser(completed_tasks=completed)
+
+    for text in CORPUS:
+        assert parser.parse(text) == legacy_parse(text, completed), text
+
+    print(
+        f"{iterations} parses of {len(CORPUS)} completions,"
+        f" {COMPLETED_TASKS} completed tasks\n"
+    )
+    report("legacy", measure(lambda text: legacy_parse(text, completed), iterations))
+    report("parser", measure(parser.parse, iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Latency of concurrent /execute streams while a large /summarize is running.
+
+Each stream emits a chunk every few milliseconds, as the agent does when relaying
+model output. Meanwhile the summarize path tokenizes and truncates a large set of
+results, either inline on the event loop or through the tokenizer thread pool.
+The reported numbers are how late each chunk was compared to its schedule.
+
+    poetry run python -m benchmarks.tokenizer_event_loop
+"""
+
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from reworkd_platform.services.tokenizer.token_service import TokenService
+
+STREAMS = 50
+CHUNKS = 400
+CHUNK_INTERVAL = 0.005  # Seconds
+SUMMARIZE_RESULTS = 10
+RESULT_LENGTH = 20_000  # Characters per result
+SNIPPET_MAX_TOKENS = 7000
+
+
+async def stream(delays: List[float]) -> None:
+    for _ in range(CHUNKS):
+        expected = time.perf_counter() + CHUNK_INTERVAL
+        await asyncio.sleep(CHUNK_INTERVAL)
+        delays.append(time.perf_counter() - expected)
+
+
+async def summarize(service: TokenService, results: List[str], offload: bool) -> None:
+    deadline = time.perf_counter() + CHUNKS * CHUNK_INTERVAL
+    while time.perf_counter() < deadline:
+        if offload:
+            tokens = await service.atokenize("".join(results))
+            await service.adetokenize(tokens[:SNIPPET_MAX_TOKENS])
+        else:
+            tokens = service.tokenize("".join(results))
+            service.detokenize(tokens[:SNIPPET_MAX_TOKENS])
+        await asyncio.sleep(0)
+
+
+async def run(service: TokenService, offload: bool) -> List[float]:
+    results = [f"result {i} " * (RESULT_LENGTH // 10) for i in range(SUMMARIZE_RESULTS)]
+    delays: List[float] = []
+
+    await asyncio.gather(
+        summarize(service, results, offload),
+        *[stream(delays) for _ in range(STREAMS)],
+    )
+    return delays
+
+
+def report(name: str, delays: List[float]) -> None:
+    quantiles = statistics.quantiles(delays, n=100)
+    print(
+        f"{name:<10} p50={quantiles[49] * 1000:7.2f}ms "
+        f"p99={quantiles[98] * 1000:7.2f}ms "
+        f"max={max(delays) * 1000:7.2f}ms"
+    )
+
+
+def main() -> None:
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix="tokenizer") as pool:
+        service = TokenService.create()
+        service.executor = pool
+
+        print(
+            f"{STREAMS} streams, summarizing {SUMMARIZE_RESULTS} x {RESULT_LENGTH} chars"
+        )
+        report("inline", asyncio.run(run(service, offload=False)))
+        report("offloaded", asyncio.run(run(service, offload=True)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
+import uuid
+from typing import get_args
+
 from fastapi import HTTPException
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from reworkd_platform.db.crud.base import BaseCrud
-from reworkd_platform.db.models.agent import AgentRun, AgentTask
+from reworkd_platform.db.models.agent import AgentRun, AgentRunStepCount, AgentTask
+from reworkd_platform.db.write_behind import agent_task_queue
 from reworkd_platform.schemas.agent import Loop_Step
 from reworkd_platform.schemas.user import UserBase
 from reworkd_platform.settings import settings
@@ -38,25 +43,109 @@ class AgentCRUD(BaseCrud):
         return (await self.session.execute(query)).scalar_one()
 
     async def create_run(self, goal: str) -> AgentRun:
-        """Create a new run."""
+        """Create a new run along with its step counters."""
         run = AgentRun(
+            id=str(uuid.uuid4()),
             user_id=self.user.id,
             goal=goal,
         )
 
+        self.session.add_all(
+            AgentRunStepCount(run_id=run.id, type_=type_, count=0)
+            for type_ in get_args(Loop_Step)
+        )
         return await run.save(self.session)
 
     async def create_task(self, run_id: str, type_: Loop_Step) -> AgentTask:
-        """Create a new task."""
-        await self.validate_task_count(run_id, type_)
+        """
+        Create a new task.
+
+        Loop limits are enforced by the step counter within the request. The task
+        row itself is only bookkeeping and is handed to the write-behind queue,
+        unless strict writes are enabled or the queue is unavailable or full.
+        """
+        await self.increment_step_count(run_id, type_)
 
         task = AgentTask(
+            id=str(uuid.uuid4()),
             run_id=run_id,
             type_=type_,
         )
 
+        if not settings.agent_task_strict_writes and agent_task_queue.put(
+            {"id": task.id, "run_id": run_id, "type": type_}
+        ):
+            return task
+
         return await task.save(self.session)
 
+    async def reset_step_counts(self, run_id: str) -> None:
+        """Forget the steps of a run, before it is executed again from its start"""
+        query = (
+            update(AgentRunStepCount)
+            .where(AgentRunStepCount.run_id == run_id)
+            .values(count=0)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(query)
+
+    async def increment_step_count(self, run_id: str, type_: str) -> None:
+        """
+        Count a new task against its run's limits.
+
+        The counter is only incremented while it is below the limit, so a single
+        conditional UPDATE both enforces and records the step, and concurrent
+        requests cannot go over the limit. Only when no row is updated do we look
+        further, to tell a missing run or a run that predates step counters apart
+        from one that reached its limit.
+        """
+        if await self._increment_step_count(run_id, type_):
+            return
+
+        if await self._backfill_step_count(run_id, type_):
+            if await self._increment_step_count(run_id, type_):
+                return
+
+        self._raise_for_task_count(type_, self._get_step_limit(type_))
+
+    async def _increment_step_count(self, run_id: str, type_: str) -> bool:
+        query = (
+            update(AgentRunStepCount)
+            .where(
+                AgentRunStepCount.run_id == run_id,
+                AgentRunStepCount.type_ == type_,
+                AgentRunStepCount.count < self._get_step_limit(type_),
+            )
+            .values(count=AgentRunStepCount.count + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+        return (await self.session.execute(query)).rowcount == 1
+
+    async def _backfill_step_count(self, run_id: str, type_: str) -> bool:
+        """Create the counter of a run started before step counters existed"""
+        query = select(AgentRunStepCount.id).where(
+            AgentRunStepCount.run_id == run_id,
+            AgentRunStepCount.type_ == type_,
+        )
+        if (await self.session.execute(query)).first():
+            return False
+
+        run = await self.get_run(run_id)
+        if not run:
+            raise HTTPException(404, f"Run {run_id} not found")
+
+        count = await self.get_task_count_by_run_and_type(run_id, type_)
+        try:
+            async with self.session.begin_nested():
+                await AgentRunStepCount(run_id=run_id, type_=type_, count=count).save(
+                    self.session
+                )
+        except IntegrityError:
+            pass  # A concurrent step created the counter first, so it is retried
+
+        return True
+
     async def validate_task_count(
         self, run_id: str, type_: str
     ) -> None:
@@ -65,8 +154,19 @@ class AgentCRUD(BaseCrud):
         if not run:
             raise HTTPException(404, f"Run {run_id} not found")
 
-        max_ = settings.max_loops
         task_count = await self.get_task_count_by_run_and_type(run_id, type_)
+        self._raise_for_task_count(type_, task_count)
+
+    @staticmethod
+    def _get_step_limit(type_: str) -> int:
+        if type_ == "summarize":
+            return min(settings.max_loops, 2)
+
+        return settings.max_loops
+
+    @staticmethod
+    def _raise_for_task_count(type_: str, task_count: int) -> None:
+        max_ = settings.max_loops
 
         if task_count >= max_:
             raise MaxLoopsError(
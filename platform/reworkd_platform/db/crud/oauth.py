@@ -46,6 +46,21 @@ class OAuthCrud(BaseCrud):
 
         return (await self.session.execute(query)).scalars().first()
 
+    async def get_installations_by_user_id(
+        self, user_id: str
+    ) -> Dict[str, OauthCredentials]:
+        """Return the user's completed installations keyed by provider"""
+        query = select(OauthCredentials).filter(
+            OauthCredentials.user_id == user_id,
+            OauthCredentials.access_token_enc.isnot(None),
+        )
+
+        installations: Dict[str, OauthCredentials] = {}
+        for installation in (await self.session.execute(query)).scalars():
+            installations.setdefault(installation.provider, installation)
+
+        return installations
+
     async def get_installation_by_organization_id(
         self, organization_id: str, provider: str
     ) -> Optional[OauthCredentials]:
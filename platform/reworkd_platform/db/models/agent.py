@@ -1,4 +1,4 @@
-from sqlalchemy import DateTime, String, Text, func
+from sqlalchemy import DateTime, Index, Integer, String, Text, UniqueConstraint, func
 from sqlalchemy.orm import mapped_column
 
 from reworkd_platform.db.base import Base
@@ -16,9 +16,38 @@ class AgentRun(Base):
 
 class AgentTask(Base):
     __tablename__ = "agent_task"
+    __table_args__ = (Index("agent_task_run_id_type_idx", "run_id", "type"),)
 
     run_id = mapped_column(String, nullable=False)
     type_ = mapped_column(String, nullable=False, name="type")
     create_date = mapped_column(
         DateTime, name="create_date", server_default=func.now(), nullable=False
     )
+
+
+class AgentRunStepCount(Base):
+    """Number of tasks of each type created for a run, used to enforce loop limits"""
+
+    __tablename__ = "agent_run_step_count"
+    __table_args__ = (UniqueConstraint("run_id", "type"),)
+
+    run_id = mapped_column(String, nullable=False)
+    type_ = mapped_column(String, nullable=False, name="type")
+    count = mapped_column(Integer, nullable=False, default=0)
+
+
+class AgentJob(Base):
+    """Agent run queued for a background worker, keyed by the run's id"""
+
+    __tablename__ = "agent_job"
+    __table_args__ = (
+        Index("agent_job_status_available_at_idx", "status", "available_at"),
+    )
+
+    payload = mapped_column(Text, nullable=False)
+    status = mapped_column(String, nullable=False, default="queued")
+    attempts = mapped_column(Integer, nullable=False, default=0)
+    available_at = mapped_column(DateTime, nullable=False)  # Claimable from then on
+    create_date = mapped_column(
+        DateTime, name="create_date", server_default=func.now(), nullable=False
+    )
@@ -0,0 +1,174 @@
+import asyncio
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Type
+
+from loguru import logger
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from reworkd_platform.db.base import Base
+from reworkd_platform.db.models.agent import AgentTask
+from reworkd_platform.settings import settings
+
+
+@dataclass
+class WriteBehindStats:
+    queued: int = 0
+    written: int = 0
+    rejected: int = 0
+    failed: int = 0
+    batches: int = 0
+    retries: int = 0
+
+
+class WriteBehindQueue:
+    """
+    Buffers rows of a table and inserts them in batches on a background task.
+
+    Rows are written with one multi-row INSERT per batch, at most `flush_interval`
+    seconds after being queued or as soon as a full batch is waiting. The buffer
+    holds at most `max_size` rows. `put` refuses rows once it is full or while
+    the queue is not running, and callers then write the row themselves.
+
+    A failed batch is retried up to `retries` times, waiting `retry_delay`
+    seconds and doubling the wait each time. Batches rejected by a constraint,
+    or still failing after the retries, are written a row at a time so only the
+    offending rows are dropped. Queued rows are not visible to other sessions
+    until flushed and dropped rows are only logged, so only bookkeeping rows
+    belong here.
+    """
+
+    def __init__(
+        self,
+        model: Type[Base],
+        *,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        retries: int = 2,
+        retry_delay: float = 0.5,
+    ):
+        self.model = model
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._rows: Deque[Dict[str, Any]] = deque()
+        self._session_factory: Optional[Callable[[], AsyncSession]] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._stats = WriteBehindStats()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, session_factory: Callable[[], AsyncSession]) -> None:
+        self._session_factory = session_factory
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the background task and write out everything still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        await self.flush()
+
+    def put(self, row: Dict[str, Any]) -> bool:
+        """Queue a row of column values. Returns False if the row was not queued"""
+        if not self.running or len(self._rows) >= self.max_size:
+            self._stats.rejected += 1
+            return False
+
+        self._rows.append(row)
+        self._stats.queued += 1
+        if len(self._rows) >= self.batch_size:
+            self._wakeup.set()
+
+        return True
+
+    async def flush(self) -> None:
+        async with self._lock:
+            while self._rows:
+                count = min(self.batch_size, len(self._rows))
+                await self._insert([self._rows.popleft() for _ in range(count)])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **asdict(self._stats),
+            "buffered": len(self._rows),
+            "max_size": self.max_size,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._wakeup.clear()
+            # Shielded so that close() never interrupts a batch being written
+            await asyncio.shield(self.flush())
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        if self._session_factory is None:
+            return
+
+        for attempt in range(self.retries + 1):
+            try:
+                await self._execute(rows)
+            except IntegrityError:
+                break  # Retrying won't help, the offending rows are found below
+            except Exception as e:
+                if attempt == self.retries:
+                    break
+
+                self._stats.retries += 1
+                logger.warning(f"Retrying {len(rows)} {self.model.__name__} rows: {e}")
+                await asyncio.sleep(self.retry_delay * 2**attempt)
+            else:
+                self._stats.written += len(rows)
+                self._stats.batches += 1
+                return
+
+        await self._insert_each(rows)
+
+    async def _insert_each(self, rows: List[Dict[str, Any]]) -> None:
+        for i, row in enumerate(rows):
+            try:
+                await self._execute([row])
+            except IntegrityError as e:
+                self._stats.failed += 1
+                logger.error(f"Dropped {self.model.__name__} row {row}: {e}")
+            except Exception:
+                # The database is unavailable rather than the row invalid
+                self._stats.failed += len(rows) - i
+                logger.exception(
+                    f"Failed to write {len(rows) - i} {self.model.__name__} rows"
+                )
+                return
+            else:
+                self._stats.written += 1
+
+    async def _execute(self, rows: List[Dict[str, Any]]) -> None:
+        assert self._session_factory is not None
+        async with self._session_factory() as session:
+            await session.execute(insert(self.model.__table__).values(rows))
+            await session.commit()
+
+
+agent_task_queue = WriteBehindQueue(
+    AgentTask,
+    max_size=settings.agent_task_queue_size,
+    batch_size=settings.agent_task_batch_size,
+    flush_interval=settings.agent_task_flush_interval,
+)
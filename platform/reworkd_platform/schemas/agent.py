@@ -54,6 +54,25 @@ class AgentRunCreate(BaseModel):
         return v
 
 
+class AgentRun(AgentRunCreate):
+    """Represents an agent run that has been created."""
+
+    run_id: str
+
+
+class AgentRunLoopCreate(AgentRunCreate):
+    """Represents a request to run an agent's whole loop on the server."""
+
+    tool_names: List[str] = Field(default=[])
+    parallel: bool = Field(default=False)  # Execute the initial tasks concurrently
+
+
+class AgentRunLoop(AgentRunLoopCreate):
+    """Represents a created run whose loop is executed on the server."""
+
+    run_id: str
+
+
 class Run(BaseModel):
     """Represents a single run of an agent."""
 
@@ -125,6 +144,12 @@ class NewTasksResponse(BaseModel):
     new_tasks: List[str] = Field(alias="newTasks")
 
 
+class AgentJobResponse(BaseModel):
+    """Represents a run queued for execution by a background worker."""
+
+    run_id: str
+
+
 class RunCount(BaseModel):
     """Represents the count of runs."""
 
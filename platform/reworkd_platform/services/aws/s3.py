@@ -1,14 +1,32 @@
 import asyncio
-import io
 import os
-from typing import Dict, List, Optional
+from functools import partial
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    TypeVar,
+)
+from urllib.parse import quote
 
-import aiohttp
 from boto3 import client as boto3_client
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
 from loguru import logger
 from pydantic import BaseModel
 
+from reworkd_platform.services.http.client import http_client
+
 REGION = "us-east-1"
+DELETE_BATCH_SIZE = 1000  # Most keys S3 deletes in a single request
+
+T = TypeVar("T")
 
 
 class PresignedPost(BaseModel):
@@ -17,82 +35,159 @@ class PresignedPost(BaseModel):
 
 
 class SimpleStorageService:
-    def __init__(self, bucket: Optional[str]) -> None:
+    """
+    Access to an S3 bucket from async code.
+
+    boto3 is synchronous, so its calls run in threads. Listings follow every
+    page, transfers of many objects run at most `max_concurrency` at a time and
+    files are streamed in multipart chunks rather than read into memory.
+    """
+
+    def __init__(
+        self,
+        bucket: Optional[str],
+        *,
+        client: Any = None,
+        max_concurrency: int = 10,
+        transfer_config: Optional[TransferConfig] = None,
+    ) -> None:
         if not bucket:
             raise ValueError("Bucket name must be provided")
 
         self.bucket = bucket
-        self._client = boto3_client("s3", region_name=REGION)
+        self.max_concurrency = max_concurrency
+        self._client = client or boto3_client("s3", region_name=REGION)
+        self._transfer_config = transfer_config or TransferConfig(
+            multipart_threshold=8 * 1024 * 1024,
+            multipart_chunksize=8 * 1024 * 1024,
+        )
 
     async def acreate_presigned_upload_url(
         self,
         object_name: str,
     ) -> PresignedPost:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"https://{self.bucket}.s3.{REGION}.amazonaws.com",
-                data={
-                    "acl": "public-read",
-                    "ContentType": "",
-                    "key": object_name,
-                },
-            ) as resp:
-                if resp.status != 200:
-                    raise Exception(f"Failed to create presigned URL: {resp.status}")
-                data = await resp.json()
-                return PresignedPost(url=data["url"], fields=data["fields"])
+        async with http_client.post(
+            f"https://{self.bucket}.s3.{REGION}.amazonaws.com",
+            data={
+                "acl": "public-read",
+                "ContentType": "",
+                "key": object_name,
+            },
+        ) as resp:
+            if resp.status != 200:
+                raise Exception(f"Failed to create presigned URL: {resp.status}")
+            data = await resp.json()
+            return PresignedPost(url=data["url"], fields=data["fields"])
 
     def create_presigned_download_url(self, object_name: str) -> str:
+        # Signed locally, without a request
         return self._client.generate_presigned_url(
             "get_object",
-            Params={"Bucket": self._bucket, "Key": object_name},
+            Params={"Bucket": self.bucket, "Key": object_name},
         )
 
-    def upload_to_bucket(
+    def public_url(self, object_name: str) -> str:
+        """URL of an object in a publicly readable bucket"""
+        return f"https://{self.bucket}.s3.{REGION}.amazonaws.com/{quote(object_name)}"
+
+    async def aupload_file(
         self,
         object_name: str,
-        file: io.BytesIO,
+        file: BinaryIO,
+        content_type: Optional[str] = None,
     ) -> None:
+        """Upload a file-like object, read in chunks as they are sent"""
         try:
-            self._client.put_object(
-                Bucket=self._bucket, Key=object_name, Body=file.getvalue()
+            await asyncio.to_thread(
+                self._client.upload_fileobj,
+                file,
+                self.bucket,
+                object_name,
+                ExtraArgs={"ContentType": content_type} if content_type else None,
+                Config=self._transfer_config,
             )
         except ClientError as e:
             logger.error(e)
             raise e
 
-    def download_file(self, object_name: str, local_filename: str) -> None:
-        self._client.download_file(
-            Bucket=self._bucket, Key=object_name, Filename=local_filename
+    async def adownload_file(self, object_name: str, local_filename: str) -> None:
+        await asyncio.to_thread(
+            self._client.download_file,
+            self.bucket,
+            object_name,
+            local_filename,
+            Config=self._transfer_config,
         )
 
-    def list_keys(self, prefix: str) -> List[str]:
-        files = self._client.list_objects_v2(Bucket=self._bucket, Prefix=prefix)
-        if "Contents" not in files:
-            return []
+    async def aiter_keys(self, prefix: str) -> AsyncIterator[str]:
+        """Yield every key under a prefix, fetching a page of keys at a time"""
+        paginator = self._client.get_paginator("list_objects_v2")
+        pages = iter(paginator.paginate(Bucket=self.bucket, Prefix=prefix))
+
+        while (page := await asyncio.to_thread(next, pages, None)) is not None:
+            for file in page.get("Contents", []):
+                yield file["Key"]
 
-        return [file["Key"] for file in files["Contents"]]
+    async def alist_keys(self, prefix: str) -> List[str]:
+        return [key async for key in self.aiter_keys(prefix)]
 
-    def download_folder(self, prefix: str, path: str) -> List[str]:
-        local_files = []
-        for key in self.list_keys(prefix):
-            local_filename = os.path.join(path, key.split("/")[-1])
-            self.download_file(key, local_filename)
-            local_files.append(local_filename)
+    async def adownload_folder(self, prefix: str, path: str) -> List[str]:
+        keys = await self.alist_keys(prefix)
+        local_files = [os.path.join(path, key.split("/")[-1]) for key in keys]
 
+        await self._gather(
+            partial(self.adownload_file, key, filename)
+            for key, filename in zip(keys, local_files)
+        )
         return local_files
 
+    async def aupload_folder(self, path: str, prefix: str) -> List[str]:
+        """Upload every file below a local folder, keyed by its relative path"""
+        files = [
+            os.path.join(root, name)
+            for root, _, names in os.walk(path)
+            for name in names
+        ]
+        keys = [
+            f"{prefix.rstrip('/')}/{os.path.relpath(file, path).replace(os.sep, '/')}"
+            for file in files
+        ]
+
+        async def upload(file: str, key: str) -> None:
+            with open(file, "rb") as f:
+                await self.aupload_file(key, f)
+
+        await self._gather(partial(upload, file, key) for file, key in zip(files, keys))
+        return keys
+
     async def adelete_folder(self, prefix: str) -> None:
-        async def delete_keys(keys: List[str]) -> None:
-            if not keys:
-                return
-            await self._client.delete_objects(
-                Bucket=self._bucket,
-                Delete={"Objects": [{"Key": key} for key in keys]},
-            )
+        """Delete every key under a prefix, a batch at a time while listing"""
+        batch: List[str] = []
+        async for key in self.aiter_keys(prefix):
+            batch.append(key)
+            if len(batch) == DELETE_BATCH_SIZE:
+                await self._delete_keys(batch)
+                batch = []
+
+        if batch:
+            await self._delete_keys(batch)
+
+    async def _delete_keys(self, keys: List[str]) -> None:
+        response = await asyncio.to_thread(
+            self._client.delete_objects,
+            Bucket=self.bucket,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+        )
+
+        if errors := response.get("Errors"):
+            logger.error(errors)
+            raise Exception(f"Failed to delete {len(errors)} objects from S3")
 
-        keys = self.list_keys(prefix)
-        for i in range(0, len(keys), 1000):
-            await delete_keys(keys[i:i + 1000])
+    async def _gather(self, calls: Iterable[Callable[[], Awaitable[T]]]) -> List[T]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
 
+        async def run(call: Callable[[], Awaitable[T]]) -> T:
+            async with semaphore:
+                return await call()
 
+        return await asyncio.gather(*(run(call) for call in calls))
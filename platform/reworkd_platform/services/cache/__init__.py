@@ -0,0 +1 @@
+"""Response caching"""
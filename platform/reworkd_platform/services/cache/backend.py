@@ -0,0 +1,101 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from reworkd_platform.settings import Settings
+
+
+class CacheBackend(ABC):
+    """Key/value storage with per-entry expiry used by Cache"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError()
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU cache with TTL expiry.
+    Memory is bounded by evicting the least recently used entry once full.
+    """
+
+    def __init__(
+        self, max_entries: int, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+        }
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend for any client exposing the redis.asyncio get/set/delete interface.
+    Values are stored as JSON so they can be shared between workers.
+    """
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.client.get(key)
+        return None if value is None else json.loads(value)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self.client.set(key, json.dumps(value), ex=max(int(ttl), 1))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+
+def create_cache_backend(settings: Settings, max_entries: int) -> CacheBackend:
+    if not settings.redis_url:
+        return MemoryCacheBackend(max_entries)
+
+    from redis import asyncio as aioredis  # Only required when redis is configured
+
+    return RedisCacheBackend(aioredis.from_url(settings.redis_url))
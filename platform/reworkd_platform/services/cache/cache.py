@@ -0,0 +1,71 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from reworkd_platform.services.cache.backend import CacheBackend
+from reworkd_platform.services.cache.single_flight import SingleFlight
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class Cache:
+    """
+    Read-through cache with TTL expiry and single-flight loading.
+    Identical misses that are in flight at the same time result in one load.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str, ttl: float) -> None:
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self._stats = CacheStats()
+        self._flight: SingleFlight[Any] = SingleFlight()
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.backend.get(self._key(key))
+        if value is None:
+            self._stats.misses += 1
+        else:
+            self._stats.hits += 1
+
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await self.backend.set(self._key(key), value, self.ttl if ttl is None else ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.backend.delete(self._key(key))
+
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        if self._flight.is_in_flight(key):
+            self._stats.coalesced += 1
+
+        async def load_and_store() -> Any:
+            result = await load()
+            await self.set(key, result)
+            return result
+
+        return await self._flight.do(key, load_and_store)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **asdict(self._stats),
+            "hit_rate": self._stats.hit_rate,
+            **self.backend.stats(),
+        }
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
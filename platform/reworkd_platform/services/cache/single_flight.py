@@ -0,0 +1,49 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    def __init__(self, task: "asyncio.Task[T]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls sharing a key into a single execution.
+
+    The call runs in its own task, so a caller that is cancelled does not cancel
+    it for the others. It is only cancelled once every caller has given up.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, _Call[T]] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def is_in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self._calls[key] = call
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self._forget(key, call)
+
+    def _forget(self, key: str, call: _Call[T]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
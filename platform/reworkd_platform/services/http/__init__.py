@@ -0,0 +1 @@
+"""Shared outbound HTTP client"""
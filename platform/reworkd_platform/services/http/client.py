@@ -0,0 +1,171 @@
+import asyncio
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from aiohttp import (
+    ClientSession,
+    ClientTimeout,
+    TCPConnector,
+    TraceConfig,
+    TraceConnectionCreateEndParams,
+    TraceConnectionReuseconnParams,
+    TraceRequestEndParams,
+    TraceRequestExceptionParams,
+    TraceRequestStartParams,
+)
+from aiohttp.client import _RequestContextManager
+
+from reworkd_platform.settings import Settings
+from reworkd_platform.settings import settings as platform_settings
+
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    in_flight: int = 0
+    errors: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+
+
+class HttpClient:
+    """
+    App-lifetime aiohttp client shared by every outbound tool call.
+
+    A single connector keeps per-host pools of keep-alive connections and caches
+    DNS lookups, so agent steps no longer pay a TCP + TLS handshake per request.
+    Pool limits and the request timeout default to the http_* settings.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        pool_size: Optional[int] = None,
+        pool_size_per_host: Optional[int] = None,
+        request_timeout: Optional[float] = None,
+    ):
+        self.settings = settings
+        self.pool_size = pool_size or settings.http_pool_size
+        self.pool_size_per_host = pool_size_per_host or settings.http_pool_size_per_host
+        self.request_timeout = request_timeout or settings.http_request_timeout
+        self._session: Optional[ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats: Dict[str, HostStats] = defaultdict(HostStats)
+
+    @property
+    def session(self) -> ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._discard_session()
+            self._session = self._create_session()
+            self._loop = loop
+
+        return self._session
+
+    def start(self) -> None:
+        """Eagerly open the session so the first agent step doesn't pay for it."""
+        _ = self.session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+        self._session = None
+        self._loop = None
+
+    def request(self, method: str, url: str, **kwargs: Any) -> _RequestContextManager:
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> _RequestContextManager:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> _RequestContextManager:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pool_size": self.pool_size,
+            "pool_size_per_host": self.pool_size_per_host,
+            "hosts": {host: asdict(stats) for host, stats in self._stats.items()},
+        }
+
+    def _discard_session(self) -> None:
+        """
+        Close a session opened on a previous event loop.
+
+        That loop can't be awaited on from this one, so its connections are
+        closed synchronously and the connector is detached from the session.
+        """
+        session, self._session = self._session, None
+        if session is None or session.closed:
+            return
+
+        connector = session.connector
+        session.detach()
+        if connector is not None:
+            connector._close()
+
+    def _create_session(self) -> ClientSession:
+        connector = TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size_per_host,
+            keepalive_timeout=self.settings.http_keepalive_timeout,
+            ttl_dns_cache=self.settings.http_dns_cache_ttl,
+            use_dns_cache=True,
+        )
+
+        return ClientSession(
+            connector=connector,
+            timeout=ClientTimeout(total=self.request_timeout),
+            trace_configs=[self._create_trace_config()],
+        )
+
+    def _create_trace_config(self) -> TraceConfig:
+        trace_config = TraceConfig()
+
+        async def on_request_start(
+            _: ClientSession, ctx: SimpleNamespace, params: TraceRequestStartParams
+        ) -> None:
+            ctx.host = params.url.host or ""
+            self._stats[ctx.host].requests += 1
+            self._stats[ctx.host].in_flight += 1
+
+        async def on_request_end(
+            _: ClientSession, ctx: SimpleNamespace, __: TraceRequestEndParams
+        ) -> None:
+            self._stats[ctx.host].in_flight -= 1
+
+        async def on_request_exception(
+            _: ClientSession, ctx: SimpleNamespace, __: TraceRequestExceptionParams
+        ) -> None:
+            self._stats[ctx.host].in_flight -= 1
+            self._stats[ctx.host].errors += 1
+
+        async def on_connection_create_end(
+            _: ClientSession, ctx: SimpleNamespace, __: TraceConnectionCreateEndParams
+        ) -> None:
+            self._stats[ctx.host].connections_created += 1
+
+        async def on_connection_reuseconn(
+            _: ClientSession, ctx: SimpleNamespace, __: TraceConnectionReuseconnParams
+        ) -> None:
+            self._stats[ctx.host].connections_reused += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+
+http_client = HttpClient(platform_settings)
+llm_http_client = HttpClient(
+    platform_settings,
+    pool_size=platform_settings.llm_http_pool_size,
+    pool_size_per_host=platform_settings.llm_http_pool_size_per_host,
+    request_timeout=platform_settings.llm_http_request_timeout,
+)
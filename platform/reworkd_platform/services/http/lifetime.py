@@ -0,0 +1,23 @@
+from fastapi import FastAPI
+
+from reworkd_platform.services.http.client import http_client, llm_http_client
+
+
+def init_http_client(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Open the shared outbound HTTP clients, for tool calls and model completions.
+
+    The clients are stored in the state of the application and
+    are closed again when the application shuts down.
+
+    :param app: current application.
+    """
+    http_client.start()
+    llm_http_client.start()
+    app.state.http_client = http_client
+    app.state.llm_http_client = llm_http_client
+
+
+async def shutdown_http_client(app: FastAPI) -> None:  # pragma: no cover
+    await app.state.http_client.close()
+    await app.state.llm_http_client.close()
@@ -0,0 +1 @@
+"""Background execution of agent runs"""
@@ -0,0 +1,15 @@
+import asyncio
+
+from reworkd_platform.services.jobs.lifetime import run_worker
+
+
+def main() -> None:
+    """Entrypoint of a worker process executing queued agent runs."""
+    try:
+        asyncio.run(run_worker())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+from reworkd_platform.settings import Settings, settings
+
+MAX_RUNS = 10_000
+MAX_EVENTS = 10_000  # Per run
+
+
+class EventChannel(ABC):
+    """
+    Carries the events of agent runs from the worker executing them to clients.
+
+    Subscribers receive every event of a run from its start, so clients can
+    subscribe before the run is picked up and reconnect while it continues.
+    """
+
+    @abstractmethod
+    async def publish(self, run_id: str, event: str) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def close(self, run_id: str) -> None:
+        """Mark the events of a run as complete"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def reset(self, run_id: str) -> None:
+        """
+        Drop the events of a run, before it is executed again from its start.
+        Current subscribers stop, and later ones only receive the new events.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def subscribe(self, run_id: str) -> AsyncIterator[str]:
+        """
+        Yield the events of a run until it is complete, or until no event
+        arrived for the channel's idle timeout.
+        """
+        raise NotImplementedError()
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+@dataclass
+class RunEvents:
+    events: Deque[str]
+    dropped: int = 0  # Oldest events discarded to stay within max_events
+    closed: bool = False
+    expires_at: Optional[float] = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class MemoryEventChannel(EventChannel):
+    """
+    In-process channel, only reaching subscribers of the worker's process.
+    Events of the `max_runs` most recent runs are kept, and those of finished
+    runs are dropped `ttl` seconds after completion. Like a Redis stream, a run
+    keeps its `max_events` most recent events.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float,
+        idle_timeout: float,
+        max_runs: int = MAX_RUNS,
+        max_events: int = MAX_EVENTS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.idle_timeout = idle_timeout
+        self.max_runs = max_runs
+        self.max_events = max_events
+        self._clock = clock
+        self._runs: "OrderedDict[str, RunEvents]" = OrderedDict()
+        # Expiry of finished runs, in the order they finished
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+
+    async def publish(self, run_id: str, event: str) -> None:
+        run = self._get(run_id)
+        if len(run.events) == self.max_events:
+            run.dropped += 1
+        run.events.append(event)
+        self._notify(run)
+
+    async def close(self, run_id: str) -> None:
+        run = self._get(run_id)
+        run.closed = True
+        run.expires_at = self._clock() + self.ttl
+        self._expiry[run_id] = run.expires_at
+        self._expiry.move_to_end(run_id)
+        self._notify(run)
+
+    async def reset(self, run_id: str) -> None:
+        run = self._runs.pop(run_id, None)
+        self._expiry.pop(run_id, None)
+        if run is not None:
+            run.closed = True
+            self._notify(run)
+
+    async def subscribe(self, run_id: str) -> AsyncIterator[str]:
+        run = self._get(run_id)
+        sent = 0  # Position in every event of the run, including dropped ones
+
+        while True:
+            sent = max(sent, run.dropped)
+            while sent < run.dropped + len(run.events):
+                yield run.events[sent - run.dropped]
+                sent += 1
+
+            if run.closed:
+                return
+
+            try:
+                await asyncio.wait_for(run.changed.wait(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": len(self._runs),
+            "max_runs": self.max_runs,
+            "max_events": self.max_events,
+        }
+
+    def _get(self, run_id: str) -> RunEvents:
+        self._expire()
+
+        run = self._runs.get(run_id)
+        if run is None:
+            run = self._runs[run_id] = RunEvents(deque(maxlen=self.max_events))
+
+        self._runs.move_to_end(run_id)
+        while len(self._runs) > self.max_runs:
+            self._expiry.pop(self._runs.popitem(last=False)[0], None)
+
+        return run
+
+    def _expire(self) -> None:
+        """Drop the runs that finished more than `ttl` seconds ago"""
+        now = self._clock()
+        while self._expiry:
+            run_id, expires_at = next(iter(self._expiry.items()))
+            if expires_at > now:
+                return
+
+            del self._expiry[run_id]
+            self._runs.pop(run_id, None)
+
+    @staticmethod
+    def _notify(run: RunEvents) -> None:
+        # Waiting subscribers hold the current event, later ones wait on a new one
+        run.changed.set()
+        run.changed = asyncio.Event()
+
+
+class RedisEventChannel(EventChannel):
+    """
+    Channel backed by a Redis stream per run, shared by every process.
+    Subscribers read the stream from its start and block for new entries.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        ttl: int,
+        idle_timeout: float,
+        max_events: int = MAX_EVENTS,
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.idle_timeout = idle_timeout
+        self.max_events = max_events
+
+    async def publish(self, run_id: str, event: str) -> None:
+        await self._append(run_id, {"event": event})
+
+    async def close(self, run_id: str) -> None:
+        await self._append(run_id, {"closed": "1"})
+
+    async def reset(self, run_id: str) -> None:
+        # Blocked subscribers are handed the closing entry before the stream goes
+        key = self._key(run_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.xadd(key, {"closed": "1"})
+            pipe.delete(key)
+            await pipe.execute()
+
+    async def subscribe(self, run_id: str) -> AsyncIterator[str]:
+        key = self._key(run_id)
+        last_id = "0"
+
+        while True:
+            response = await self.client.xread(
+                {key: last_id}, count=100, block=int(self.idle_timeout * 1000)
+            )
+            if not response:
+                return
+
+            for _, entries in response:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    if "closed" in fields:
+                        return
+
+                    yield fields["event"]
+
+    async def _append(self, run_id: str, fields: Dict[str, str]) -> None:
+        key = self._key(run_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.xadd(key, fields, maxlen=self.max_events, approximate=True)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    @staticmethod
+    def _key(run_id: str) -> str:
+        return f"agent_run_events:{run_id}"
+
+
+def create_event_channel(settings: Settings) -> EventChannel:
+    if not settings.redis_url:
+        return MemoryEventChannel(
+            ttl=settings.job_events_ttl, idle_timeout=settings.job_events_idle_timeout
+        )
+
+    from redis import asyncio as aioredis  # Only required when redis is configured
+
+    return RedisEventChannel(
+        aioredis.from_url(settings.redis_url, decode_responses=True),
+        ttl=settings.job_events_ttl,
+        idle_timeout=settings.job_events_idle_timeout,
+    )
+
+
+job_events = create_event_channel(settings)
@@ -0,0 +1,102 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import tiktoken
+from fastapi import FastAPI
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from reworkd_platform.db.crud.oauth import OAuthCrud
+from reworkd_platform.db.utils import create_engine
+from reworkd_platform.db.write_behind import agent_task_queue
+from reworkd_platform.services.http.client import http_client, llm_http_client
+from reworkd_platform.services.jobs.queue import Job, MemoryJobQueue, job_queue
+from reworkd_platform.services.jobs.worker import ServiceFactory, job_worker
+from reworkd_platform.services.oauth_tokens import oauth_token_manager
+from reworkd_platform.services.tokenizer.lifetime import ENCODING_NAME
+from reworkd_platform.services.tokenizer.token_service import TokenService
+from reworkd_platform.settings import settings
+from reworkd_platform.web.api.agent.agent_service.agent_service import AgentService
+from reworkd_platform.web.api.agent.agent_service.agent_service_provider import (
+    create_agent_service,
+)
+
+
+def create_service_factory(token_service: TokenService) -> ServiceFactory:
+    def create(job: Job, session: AsyncSession) -> AgentService:
+        return create_agent_service(
+            job.run, job.user, token_service, OAuthCrud(session), streaming=True
+        )
+
+    return create
+
+
+async def init_jobs(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Start the job queue and the workers of the API process.
+
+    Workers run alongside the API unless jobs are left to separate worker
+    processes, started with `python -m reworkd_platform.services.jobs`.
+
+    :param app: current application.
+    """
+    await job_queue.start(app.state.db_session_factory)
+
+    if not settings.job_inline_workers:
+        if isinstance(job_queue, MemoryJobQueue):
+            logger.warning("Jobs are queued in memory but no worker executes them")
+        return
+
+    token_service = TokenService(
+        app.state.token_encoding,
+        executor=app.state.token_executor,
+        offload_min_length=settings.tokenizer_offload_min_length,
+    )
+    job_worker.start(
+        app.state.db_session_factory, create_service_factory(token_service)
+    )
+
+
+async def shutdown_jobs(app: FastAPI) -> None:  # pragma: no cover
+    await job_worker.close()
+    await job_queue.close()
+
+
+async def run_worker() -> None:  # pragma: no cover
+    """Execute jobs until cancelled, in a process separate from the API"""
+    if isinstance(job_queue, MemoryJobQueue) or not settings.redis_url:
+        raise ValueError(
+            "Worker processes require a database or kafka job queue, and a "
+            "redis_url to publish events to the API"
+        )
+
+    engine = create_engine()
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    executor = ThreadPoolExecutor(
+        max_workers=settings.tokenizer_max_workers,
+        thread_name_prefix="tokenizer",
+    )
+    token_service = TokenService(
+        tiktoken.get_encoding(ENCODING_NAME),
+        executor=executor,
+        offload_min_length=settings.tokenizer_offload_min_length,
+    )
+
+    http_client.start()
+    llm_http_client.start()
+    agent_task_queue.start(session_factory)
+    oauth_token_manager.start(session_factory)
+    await job_queue.start(session_factory)
+    job_worker.start(session_factory, create_service_factory(token_service))
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await job_worker.close()
+        await job_queue.close()
+        await oauth_token_manager.close()
+        await agent_task_queue.close()
+        await http_client.close()
+        await llm_http_client.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+        await engine.dispose()
@@ -0,0 +1,412 @@
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from loguru import logger
+from pydantic import BaseModel, Field
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from reworkd_platform.db.models.agent import AgentJob
+from reworkd_platform.schemas.agent import AgentRunLoop
+from reworkd_platform.schemas.user import UserBase
+from reworkd_platform.settings import Settings, settings
+
+SessionFactory = Callable[[], AsyncSession]
+
+Partition = Tuple[str, int]  # (topic, partition)
+
+
+class Job(BaseModel):
+    """Agent run submitted for execution by a background worker"""
+
+    run: AgentRunLoop
+    user: UserBase
+    attempts: int = Field(default=0)  # Times the job has been claimed
+
+    @property
+    def id(self) -> str:
+        return self.run.run_id
+
+
+@dataclass
+class JobQueueStats:
+    enqueued: int = 0
+    claimed: int = 0
+    completed: int = 0
+    retried: int = 0
+    failed: int = 0
+
+
+class JobQueue(ABC):
+    """
+    Agent runs waiting for a worker.
+
+    `get` hands each job to a single worker, which reports back with `complete`,
+    or with `fail` to retry the job until it was attempted `max_attempts` times.
+    """
+
+    def __init__(self, max_attempts: int):
+        self.max_attempts = max_attempts
+        self._stats = JobQueueStats()
+
+    async def start(self, session_factory: SessionFactory) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def put(self, job: Job) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get(self) -> Job:
+        """Wait for a job and claim it"""
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def complete(self, job: Job) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def fail(self, job: Job) -> bool:
+        """Release a job that failed. Returns whether it will be retried"""
+        raise NotImplementedError()
+
+    async def extend(self, job: Job) -> None:
+        """Keep the claim on a job that is still running"""
+
+    def stats(self) -> Dict[str, Any]:
+        return asdict(self._stats)
+
+    def _should_retry(self, job: Job) -> bool:
+        if job.attempts < self.max_attempts:
+            self._stats.retried += 1
+            return True
+
+        self._stats.failed += 1
+        logger.error(f"Job {job.id} failed after {job.attempts} attempts")
+        return False
+
+
+class MemoryJobQueue(JobQueue):
+    """
+    In-process queue for single node deployments.
+    Jobs only reach the workers of this process and are lost on restart.
+    """
+
+    def __init__(self, max_attempts: int):
+        super().__init__(max_attempts)
+        self._jobs: "asyncio.Queue[Job]" = asyncio.Queue()
+
+    async def put(self, job: Job) -> None:
+        self._jobs.put_nowait(job)
+        self._stats.enqueued += 1
+
+    async def get(self) -> Job:
+        job = await self._jobs.get()
+        job.attempts += 1
+        self._stats.claimed += 1
+        return job
+
+    async def complete(self, job: Job) -> None:
+        self._stats.completed += 1
+
+    async def fail(self, job: Job) -> bool:
+        if not self._should_retry(job):
+            return False
+
+        self._jobs.put_nowait(job)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "queued": self._jobs.qsize()}
+
+
+class DatabaseJobQueue(JobQueue):
+    """
+    Queue kept in the agent_job table, shared by every process using the database.
+
+    Workers poll for jobs that are available and claim one with a conditional
+    UPDATE, so each claim succeeds for exactly one worker. A claim hides the job
+    for `visibility_timeout`, and running workers keep extending it. Jobs of a
+    worker that died become available again once their claim lapses.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_attempts: int,
+        visibility_timeout: timedelta,
+        poll_interval: float,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        super().__init__(max_attempts)
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._session_factory: Optional[SessionFactory] = None
+
+    async def start(self, session_factory: SessionFactory) -> None:
+        self._session_factory = session_factory
+
+    async def put(self, job: Job) -> None:
+        async with self._session() as session:
+            session.add(
+                AgentJob(
+                    id=job.id,
+                    payload=job.json(),
+                    status="queued",
+                    attempts=job.attempts,
+                    available_at=self._clock(),
+                )
+            )
+            await session.commit()
+
+        self._stats.enqueued += 1
+
+    async def get(self) -> Job:
+        while True:
+            if job := await self._claim():
+                self._stats.claimed += 1
+                return job
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def complete(self, job: Job) -> None:
+        await self._update(job, status="done")
+        self._stats.completed += 1
+
+    async def fail(self, job: Job) -> bool:
+        if not self._should_retry(job):
+            await self._update(job, status="failed")
+            return False
+
+        await self._update(job, status="queued", available_at=self._clock())
+        return True
+
+    async def extend(self, job: Job) -> None:
+        await self._update(
+            job, status="running", available_at=self._clock() + self.visibility_timeout
+        )
+
+    async def _claim(self) -> Optional[Job]:
+        now = self._clock()
+        query = (
+            select(AgentJob.id, AgentJob.available_at, AgentJob.attempts)
+            .where(
+                AgentJob.status.in_(("queued", "running")),
+                AgentJob.available_at <= now,
+            )
+            .order_by(AgentJob.available_at)
+            .limit(10)
+        )
+
+        async with self._session() as session:
+            for id_, available_at, attempts in (await session.execute(query)).all():
+                # Only succeeds if no other worker claimed the job since it was read
+                claimed = (
+                    AgentJob.id == id_,
+                    AgentJob.available_at == available_at,
+                    AgentJob.status.in_(("queued", "running")),
+                )
+
+                if attempts >= self.max_attempts:
+                    # Its workers kept dying without reporting back
+                    await session.execute(
+                        update(AgentJob)
+                        .where(*claimed)
+                        .values(status="failed")
+                        .execution_options(synchronize_session=False)
+                    )
+                    await session.commit()
+                    continue
+
+                result = await session.execute(
+                    update(AgentJob)
+                    .where(*claimed)
+                    .values(
+                        status="running",
+                        attempts=attempts + 1,
+                        available_at=now + self.visibility_timeout,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount != 1:
+                    await session.rollback()
+                    continue
+
+                payload = await session.scalar(
+                    select(AgentJob.payload).where(AgentJob.id == id_)
+                )
+                await session.commit()
+
+                job = Job.parse_raw(payload)
+                job.attempts = attempts + 1
+                return job
+
+        return None
+
+    async def _update(self, job: Job, **values: Any) -> None:
+        async with self._session() as session:
+            await session.execute(
+                update(AgentJob)
+                .where(AgentJob.id == job.id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    def _session(self) -> AsyncSession:
+        if self._session_factory is None:
+            raise RuntimeError("The job queue has not been started")
+
+        return self._session_factory()
+
+
+class KafkaJobQueue(JobQueue):
+    """
+    Queue on a Kafka topic, consumed by the consumer group of the workers.
+
+    Jobs of a partition can finish in any order, so its offset is only committed
+    up to the oldest job that is still running. Jobs of a worker that died are
+    then redelivered to the group. Failed jobs are published again.
+    """
+
+    def __init__(
+        self,
+        create_clients: Callable[[], Tuple[Any, Any]],
+        *,
+        topic: str,
+        max_attempts: int,
+    ):
+        super().__init__(max_attempts)
+        self.topic = topic
+        self._create_clients = create_clients
+        self._producer: Any = None
+        self._consumer: Any = None
+        self._claims: Dict[str, Tuple[Partition, int]] = {}  # Job id to offset
+        self._running: Dict[Partition, Set[int]] = {}  # Offsets of running jobs
+        self._next_offsets: Dict[Partition, int] = {}
+
+    async def start(self, session_factory: SessionFactory) -> None:
+        # Clients are created here as they bind to the running event loop
+        self._producer, self._consumer = self._create_clients()
+        await self._producer.start()
+        await self._consumer.start()
+
+    async def close(self) -> None:
+        if self._consumer is not None:
+            await self._consumer.stop()
+        if self._producer is not None:
+            await self._producer.stop()
+
+    async def put(self, job: Job) -> None:
+        await self._producer.send_and_wait(
+            self.topic, job.json().encode(), key=job.id.encode()
+        )
+        self._stats.enqueued += 1
+
+    async def get(self) -> Job:
+        message = await self._consumer.getone()
+        partition, offset = (message.topic, message.partition), message.offset
+        job = Job.parse_raw(message.value)
+        job.attempts += 1
+
+        self._claims[job.id] = (partition, offset)
+        self._running.setdefault(partition, set()).add(offset)
+        self._next_offsets[partition] = offset + 1
+        self._stats.claimed += 1
+        return job
+
+    async def complete(self, job: Job) -> None:
+        await self._release(job)
+        self._stats.completed += 1
+
+    async def fail(self, job: Job) -> bool:
+        retry = self._should_retry(job)
+        if retry:
+            await self._producer.send_and_wait(
+                self.topic, job.json().encode(), key=job.id.encode()
+            )
+
+        await self._release(job)
+        return retry
+
+    async def _release(self, job: Job) -> None:
+        claim = self._claims.pop(job.id, None)
+        if claim is None:
+            return
+
+        partition, offset = claim
+        running = self._running[partition]
+        running.discard(offset)
+
+        assigned = {(tp.topic, tp.partition): tp for tp in self._consumer.assignment()}
+        if partition not in assigned:
+            return  # The partition was reassigned, its new owner redelivers the job
+
+        # Everything before the oldest running job has finished
+        committed = min(running, default=self._next_offsets[partition])
+        try:
+            await self._consumer.commit({assigned[partition]: committed})
+        except Exception:
+            logger.exception(f"Failed to commit offset {committed} of {partition}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "running": len(self._claims)}
+
+
+def create_kafka_clients(settings: Settings) -> Tuple[Any, Any]:
+    # Only required when kafka is configured
+    from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
+    from aiokafka.helpers import create_ssl_context
+
+    connection = {
+        "bootstrap_servers": settings.kafka_bootstrap_servers,
+        "security_protocol": "SASL_SSL",
+        "sasl_mechanism": settings.kafka_ssal_mechanism,
+        "sasl_plain_username": settings.kafka_username,
+        "sasl_plain_password": settings.kafka_password,
+        "ssl_context": create_ssl_context(),
+    }
+
+    producer = AIOKafkaProducer(**connection)
+    consumer = AIOKafkaConsumer(
+        settings.kafka_job_topic,
+        group_id=settings.kafka_consumer_group,
+        enable_auto_commit=False,
+        auto_offset_reset="earliest",
+        **connection,
+    )
+    return producer, consumer
+
+
+def create_job_queue(settings: Settings) -> JobQueue:
+    if settings.job_queue_backend == "database":
+        return DatabaseJobQueue(
+            max_attempts=settings.job_max_attempts,
+            visibility_timeout=timedelta(seconds=settings.job_visibility_timeout),
+            poll_interval=settings.job_poll_interval,
+        )
+
+    if settings.job_queue_backend == "kafka":
+        if settings.kafka_enabled:
+            return KafkaJobQueue(
+                lambda: create_kafka_clients(settings),
+                topic=settings.kafka_job_topic,
+                max_attempts=settings.job_max_attempts,
+            )
+
+        if settings.environment != "development":
+            raise ValueError("The kafka job queue requires the kafka settings")
+
+        logger.warning("Kafka is not configured, jobs are queued in memory instead")
+
+    return MemoryJobQueue(max_attempts=settings.job_max_attempts)
+
+
+job_queue = create_job_queue(settings)
@@ -0,0 +1,160 @@
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from reworkd_platform.db.crud.agent import AgentCRUD
+from reworkd_platform.services.jobs.events import EventChannel, job_events
+from reworkd_platform.services.jobs.queue import (
+    Job,
+    JobQueue,
+    SessionFactory,
+    job_queue,
+)
+from reworkd_platform.settings import settings
+from reworkd_platform.web.api.agent.agent_loop import AgentLoop, format_event
+from reworkd_platform.web.api.agent.agent_service.agent_service import AgentService
+
+# Builds the agent service of a job on the job's database session
+ServiceFactory = Callable[[Job, AsyncSession], AgentService]
+
+
+@dataclass
+class JobWorkerStats:
+    running: int = 0
+    completed: int = 0
+    failed: int = 0
+
+
+class JobWorker:
+    """
+    Executes queued agent runs and publishes their events.
+
+    Up to `concurrency` runs are executed at once, each on its own database
+    session. Every event of a run is published to the event channel, which is
+    closed once the run is done, so clients can come and go while it continues.
+    Claims on running jobs are extended every `heartbeat_interval` seconds.
+
+    A retried job runs from its start again. The events and step counts of the
+    failed attempt are discarded first, so they are not repeated or counted twice.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        channel: EventChannel,
+        *,
+        concurrency: int,
+        heartbeat_interval: float,
+    ):
+        self.queue = queue
+        self.channel = channel
+        self.concurrency = concurrency
+        self.heartbeat_interval = heartbeat_interval
+        self._session_factory: Optional[SessionFactory] = None
+        self._service_factory: Optional[ServiceFactory] = None
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._stats = JobWorkerStats()
+
+    def start(
+        self, session_factory: SessionFactory, service_factory: ServiceFactory
+    ) -> None:
+        self._session_factory = session_factory
+        self._service_factory = service_factory
+        self._tasks = [
+            asyncio.create_task(self._consume()) for _ in range(self.concurrency)
+        ]
+
+    async def close(self) -> None:
+        """Stop the workers. Interrupted jobs are redelivered by durable queues"""
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run(self, job: Job) -> None:
+        self._stats.running += 1
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+
+        try:
+            await self._execute(job)
+        except Exception:
+            logger.exception(f"Job {job.id} failed")
+            self._stats.failed += 1
+            if not await self.queue.fail(job):
+                await self._abort(job)
+        else:
+            self._stats.completed += 1
+            await self.queue.complete(job)
+        finally:
+            heartbeat.cancel()
+            self._stats.running -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **asdict(self._stats),
+            "concurrency": len(self._tasks),
+            "queue": self.queue.stats(),
+            "events": self.channel.stats(),
+        }
+
+    async def _consume(self) -> None:
+        while True:
+            try:
+                job = await self.queue.get()
+            except Exception:
+                logger.exception("Failed to claim a job")
+                await asyncio.sleep(self.heartbeat_interval)
+                continue
+
+            try:
+                await self.run(job)
+            except Exception:
+                logger.exception(f"Failed to report job {job.id} to the queue")
+
+    async def _execute(self, job: Job) -> None:
+        if self._session_factory is None or self._service_factory is None:
+            raise RuntimeError("The job worker has not been started")
+
+        async with self._session_factory() as session:
+            crud = AgentCRUD(session, job.user)
+            if job.attempts > 1:
+                await self.channel.reset(job.id)
+                await crud.reset_step_counts(job.run.run_id)
+                await session.commit()
+
+            service = self._service_factory(job, session)
+            loop = AgentLoop(service, crud, job.run)
+
+            async for event in loop.stream():
+                await self.channel.publish(job.id, event)
+
+            await session.commit()
+
+        await self.channel.close(job.id)
+
+    async def _abort(self, job: Job) -> None:
+        """Let subscribers of a run that will not be retried know it is over"""
+        detail = "The agent run failed unexpectedly"
+        await self.channel.publish(job.id, format_event("error", detail=detail))
+        await self.channel.publish(job.id, format_event("done"))
+        await self.channel.close(job.id)
+
+    async def _heartbeat(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.queue.extend(job)
+            except Exception:
+                logger.exception(f"Failed to extend the claim on job {job.id}")
+
+
+job_worker = JobWorker(
+    job_queue,
+    job_events,
+    concurrency=settings.job_worker_concurrency,
+    heartbeat_interval=settings.job_visibility_timeout / 3,
+)
@@ -3,12 +3,13 @@ from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
 from urllib.parse import urlencode
 
-import aiohttp
 from fastapi import Depends, Path
 
 from reworkd_platform.db.crud.oauth import OAuthCrud
 from reworkd_platform.db.models.auth import OauthCredentials
 from reworkd_platform.schemas import UserBase
+from reworkd_platform.services.http.client import http_client
+from reworkd_platform.services.oauth_tokens import oauth_token_manager
 from reworkd_platform.services.security import encryption_service
 from reworkd_platform.settings import Settings
 from reworkd_platform.settings import settings as platform_settings
@@ -80,16 +81,15 @@ class SIDInstaller(OAuthInstaller):
             "redirect_uri": self.settings.sid_redirect_uri,
             "code": code,
         }
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                "https://auth.sid.ai/oauth/token",
-                headers={
-                    "Content-Type": "application/json",
-                    "Accept": "application/json",
-                },
-                data=json.dumps(req),
-            ) as response:
-                res_data = await response.json()
+        async with http_client.post(
+            "https://auth.sid.ai/oauth/token",
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+            },
+            data=json.dumps(req),
+        ) as response:
+            res_data = await response.json()
 
         OAuthInstaller.store_access_token(creds, res_data["access_token"])
         OAuthInstaller.store_refresh_token(creds, res_data["refresh_token"])
@@ -108,22 +108,23 @@ class SIDInstaller(OAuthInstaller):
         delete_token = encryption_service.decrypt(creds.refresh_token_enc)
         # delete credentials from database
         await self.crud.session.delete(creds)
+        oauth_token_manager.invalidate(user.id, self.PROVIDER)
 
         # revoke refresh token
-        async with aiohttp.ClientSession() as session:
-            await session.post(
-                "https://auth.sid.ai/oauth/revoke",
-                headers={
-                    "Content-Type": "application/json",
-                },
-                data=json.dumps(
-                    {
-                        "client_id": self.settings.sid_client_id,
-                        "client_secret": self.settings.sid_client_secret,
-                        "token": delete_token,
-                    }
-                ),
-            )
+        async with http_client.post(
+            "https://auth.sid.ai/oauth/revoke",
+            headers={
+                "Content-Type": "application/json",
+            },
+            data=json.dumps(
+                {
+                    "client_id": self.settings.sid_client_id,
+                    "client_secret": self.settings.sid_client_secret,
+                    "token": delete_token,
+                }
+            ),
+        ):
+            pass
         return True
 
 
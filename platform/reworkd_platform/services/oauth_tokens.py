@@ -0,0 +1,195 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional, Set, Tuple
+
+from loguru import logger
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from reworkd_platform.db.models.auth import OauthCredentials
+from reworkd_platform.services.cache.single_flight import SingleFlight
+from reworkd_platform.services.security import encryption_service
+from reworkd_platform.settings import settings
+
+# Exchanges a refresh token for an access token and its lifetime in seconds
+Refresher = Callable[[str], Awaitable[Tuple[str, int]]]
+
+TokenKey = Tuple[str, str]  # (user_id, provider)
+
+MAX_ENTRIES = 10_000
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    installation_id: str
+    access_token: str
+    expires_at: datetime
+    refresh_token_enc: str
+    refresh: Refresher
+
+
+class OAuthTokenManager:
+    """
+    Decrypted OAuth access tokens shared by every request of a worker.
+
+    Tokens are kept in memory per (user_id, provider) until they expire, so
+    requests no longer decrypt or refresh them on their own. A token within
+    `refresh_margin` of expiry is refreshed before use, and concurrent requests
+    for it wait on a single upstream refresh. Tokens used within
+    `proactive_margin` of expiry are refreshed in the background instead.
+    Each refresh is persisted to its OauthCredentials row exactly once.
+    """
+
+    def __init__(
+        self,
+        *,
+        refresh_margin: timedelta,
+        proactive_margin: timedelta,
+        max_entries: int = MAX_ENTRIES,
+        clock: Callable[[], datetime] = datetime.now,
+    ):
+        self.refresh_margin = refresh_margin
+        self.proactive_margin = max(proactive_margin, refresh_margin)
+        self.max_entries = max_entries
+        self._clock = clock
+        self._tokens: "OrderedDict[TokenKey, CachedToken]" = OrderedDict()
+        self._flight: SingleFlight[str] = SingleFlight()
+        self._background: Set["asyncio.Task[None]"] = set()
+        self._session_factory: Optional[Callable[[], AsyncSession]] = None
+
+    def start(self, session_factory: Callable[[], AsyncSession]) -> None:
+        """Enable background refreshes, which persist through their own sessions"""
+        self._session_factory = session_factory
+
+    async def close(self) -> None:
+        for task in self._background:
+            task.cancel()
+
+        await asyncio.gather(*self._background, return_exceptions=True)
+        self._session_factory = None
+
+    async def get_access_token(
+        self,
+        installation: OauthCredentials,
+        session: AsyncSession,
+        refresh: Refresher,
+    ) -> Optional[str]:
+        if not installation.refresh_token_enc:
+            return None
+
+        key = (installation.user_id, installation.provider)
+        cached = self._get_cached(key, installation, refresh)
+
+        now = self._clock()
+        if cached.expires_at <= now + self.refresh_margin:
+            return await self._refresh(key, cached, session)
+
+        if cached.expires_at <= now + self.proactive_margin:
+            self._refresh_in_background(key, cached)
+
+        return cached.access_token
+
+    def invalidate(self, user_id: str, provider: str) -> None:
+        self._tokens.pop((user_id, provider), None)
+
+    def _get_cached(
+        self, key: TokenKey, installation: OauthCredentials, refresh: Refresher
+    ) -> CachedToken:
+        """
+        Return the cached token, replacing it when the installation row is newer.
+        This picks up reinstalls and refreshes made by other workers.
+        """
+        expires_at = installation.access_token_expiration or datetime.min
+        cached = self._tokens.get(key)
+
+        if (
+            cached is None
+            or cached.installation_id != installation.id
+            or cached.expires_at < expires_at
+        ):
+            cached = CachedToken(
+                installation_id=installation.id,
+                access_token=(
+                    encryption_service.decrypt(installation.access_token_enc)
+                    if installation.access_token_enc
+                    else ""
+                ),
+                expires_at=expires_at,
+                refresh_token_enc=installation.refresh_token_enc,
+                refresh=refresh,
+            )
+            self._set_cached(key, cached)
+
+        self._tokens.move_to_end(key)
+        return cached
+
+    def _set_cached(self, key: TokenKey, cached: CachedToken) -> None:
+        self._tokens[key] = cached
+        while len(self._tokens) > self.max_entries:
+            self._tokens.popitem(last=False)
+
+    async def _refresh(
+        self, key: TokenKey, cached: CachedToken, session: Optional[AsyncSession]
+    ) -> str:
+        async def refresh() -> str:
+            refresh_token = encryption_service.decrypt(cached.refresh_token_enc)
+            access_token, expires_in = await cached.refresh(refresh_token)
+            expires_at = self._clock() + timedelta(seconds=expires_in)
+
+            await self._persist(
+                cached.installation_id, access_token, expires_at, session
+            )
+            self._set_cached(
+                key, replace(cached, access_token=access_token, expires_at=expires_at)
+            )
+            return access_token
+
+        return await self._flight.do(":".join(key), refresh)
+
+    def _refresh_in_background(self, key: TokenKey, cached: CachedToken) -> None:
+        if self._session_factory is None or self._flight.is_in_flight(":".join(key)):
+            return
+
+        async def refresh() -> None:
+            try:
+                await self._refresh(key, cached, None)
+            except Exception:
+                logger.exception(f"Failed to refresh {key[1]} token for {key[0]}")
+
+        task = asyncio.create_task(refresh())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _persist(
+        self,
+        installation_id: str,
+        access_token: str,
+        expires_at: datetime,
+        session: Optional[AsyncSession],
+    ) -> None:
+        query = (
+            update(OauthCredentials)
+            .where(OauthCredentials.id == installation_id)
+            .values(
+                access_token_enc=encryption_service.encrypt(access_token),
+                access_token_expiration=expires_at,
+            )
+        )
+
+        if self._session_factory is None:
+            if session is not None:
+                await session.execute(query)
+            return
+
+        # Committed straight away so other workers pick up the new token
+        async with self._session_factory() as own_session:
+            await own_session.execute(query)
+            await own_session.commit()
+
+
+oauth_token_manager = OAuthTokenManager(
+    refresh_margin=timedelta(seconds=settings.oauth_token_refresh_margin),
+    proactive_margin=timedelta(seconds=settings.oauth_token_proactive_margin),
+)
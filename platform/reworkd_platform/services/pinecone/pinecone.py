@@ -1,18 +1,25 @@
 from __future__ import annotations
 
+import asyncio
 import uuid
+from collections import OrderedDict
 from typing import Any, Dict, List
 
 from langchain.embeddings import OpenAIEmbeddings
-from langchain.embeddings.base import Embeddings
 from pinecone import Index  # import doesnt work on plane wifi
 from pydantic import BaseModel
 
 from reworkd_platform.settings import settings
 from reworkd_platform.timer import timed_function
-from reworkd_platform.web.api.memory.memory import AgentMemory
+from reworkd_platform.web.api.memory.cached_embeddings import CachedEmbeddings
+from reworkd_platform.web.api.memory.memory import AgentMemory, QueryResult
 
 OPENAI_EMBEDDING_DIM = 1536
+UPSERT_BATCH_SIZE = 100  # Pinecone recommends at most 100 vectors per upsert
+TOP_K = 5
+
+# Shared between requests so tasks are only embedded once per worker
+_embedding_cache: "OrderedDict[str, List[float]]" = OrderedDict()
 
 
 class Row(BaseModel):
@@ -21,12 +28,6 @@ class Row(BaseModel):
     metadata: Dict[str, Any] = {}
 
 
-class QueryResult(BaseModel):
-    id: str
-    score: float
-    metadata: Dict[str, Any] = {}
-
-
 class PineconeMemory(AgentMemory):
     """
     Wrapper around pinecone
@@ -38,9 +39,13 @@ class PineconeMemory(AgentMemory):
 
     @timed_function(level="DEBUG")
     def __enter__(self) -> AgentMemory:
-        self.embeddings: Embeddings = OpenAIEmbeddings(
-            client=None,  # Meta private value but mypy will complain its missing
-            openai_api_key=settings.openai_api_key,
+        self.embeddings = CachedEmbeddings(
+            OpenAIEmbeddings(
+                client=None,  # Meta private value but mypy will complain its missing
+                openai_api_key=settings.openai_api_key,
+            ),
+            _embedding_cache,
+            settings.memory_embedding_cache_size,
         )
 
         return self
@@ -54,45 +59,84 @@ class PineconeMemory(AgentMemory):
 
     @timed_function(level="DEBUG")
     def add_tasks(self, tasks: List[str]) -> List[str]:
-        if len(tasks) == 0:
-            return []
+        ids: List[str] = []
+        for batch in _batches(tasks):
+            rows = _rows(batch, self.embeddings.embed_documents(batch))
+            self._upsert(rows)
+            ids.extend(row.id for row in rows)
 
-        embeds = self.embeddings.embed_documents(tasks)
+        return ids
 
-        if len(tasks) != len(embeds):
-            raise ValueError("Embeddings and tasks are not the same length")
+    @timed_function(level="DEBUG")
+    def get_similar_tasks(
+        self, text: str, score_threshold: float = 0.95
+    ) -> List[QueryResult]:
+        vector = self.embeddings.embed_query(text)
+        return _similar(self._query(vector), score_threshold)
 
-        rows = [
-            Row(values=vector, metadata={"text": tasks[i]}, id=str(uuid.uuid4()))
-            for i, vector in enumerate(embeds)
-        ]
+    async def aadd_tasks(self, tasks: List[str]) -> List[str]:
+        """
+        Embed and upsert tasks in batches. Batches run concurrently, so the
+        embedding of one batch overlaps the upsert of the previous one.
+        """
 
-        self.index.upsert(
-            vectors=[row.dict() for row in rows], namespace=self.namespace
-        )
+        async def add_batch(batch: List[str]) -> List[str]:
+            rows = _rows(batch, await self.embeddings.aembed_documents(batch))
+            await asyncio.to_thread(self._upsert, rows)
+            return [row.id for row in rows]
 
-        return [row.id for row in rows]
+        results = await asyncio.gather(*[add_batch(b) for b in _batches(tasks)])
+        return [row_id for ids in results for row_id in ids]
 
-    @timed_function(level="DEBUG")
-    def get_similar_tasks(
+    async def aget_similar_tasks(
         self, text: str, score_threshold: float = 0.95
     ) -> List[QueryResult]:
-        # Get similar tasks
-        vector = self.embeddings.embed_query(text)
-        results = self.index.query(
+        vector = await self.embeddings.aembed_query(text)
+        results = await asyncio.to_thread(self._query, vector)
+        return _similar(results, score_threshold)
+
+    def _upsert(self, rows: List[Row]) -> None:
+        self.index.upsert(
+            vectors=[row.dict() for row in rows], namespace=self.namespace
+        )
+
+    def _query(self, vector: List[float]) -> Any:
+        return self.index.query(
             vector=vector,
-            top_k=5,
+            top_k=TOP_K,
             include_metadata=True,
-            include_values=True,
             namespace=self.namespace,
         )
 
-        return [
-            QueryResult(id=row.id, score=row.score, metadata=row.metadata)
-            for row in getattr(results, "matches", [])
-            if row.score > score_threshold
-        ]
-
     @staticmethod
     def should_use() -> bool:
-        return False
+        return bool(
+            settings.pinecone_api_key
+            and settings.pinecone_environment
+            and settings.pinecone_index_name
+        )
+
+
+def _batches(tasks: List[str]) -> List[List[str]]:
+    return [
+        tasks[i : i + UPSERT_BATCH_SIZE]
+        for i in range(0, len(tasks), UPSERT_BATCH_SIZE)
+    ]
+
+
+def _rows(tasks: List[str], embeds: List[List[float]]) -> List[Row]:
+    if len(tasks) != len(embeds):
+        raise ValueError("Embeddings and tasks are not the same length")
+
+    return [
+        Row(values=vector, metadata={"text": task}, id=str(uuid.uuid4()))
+        for task, vector in zip(tasks, embeds)
+    ]
+
+
+def _similar(results: Any, score_threshold: float) -> List[QueryResult]:
+    return [
+        QueryResult(id=row.id, score=row.score, metadata=row.metadata)
+        for row in getattr(results, "matches", [])
+        if row.score > score_threshold
+    ]
@@ -0,0 +1,183 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from reworkd_platform.settings import Settings, settings
+
+# (capacity, refill per second, cost) of each bucket taken from at once
+Take = Tuple[float, float, float]
+
+
+class RateLimitStore(ABC):
+    """Token buckets shared by every caller of a rate limiter"""
+
+    @abstractmethod
+    async def take(self, keys: Sequence[str], takes: Sequence[Take]) -> float:
+        """
+        Take the cost of every bucket if all of them hold enough tokens.
+        Returns 0 if taken, otherwise the seconds until all of them will.
+        """
+        raise NotImplementedError()
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Buckets of a single process"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # Key to tokens, updated
+
+    async def take(self, keys: Sequence[str], takes: Sequence[Take]) -> float:
+        now = self._clock()
+        levels: List[float] = []
+        wait = 0.0
+
+        for key, (capacity, rate, cost) in zip(keys, takes):
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            levels.append(tokens)
+            if tokens < cost:
+                wait = max(wait, (cost - tokens) / rate)
+
+        for key, tokens, (_, _, cost) in zip(keys, levels, takes):
+            self._buckets[key] = (tokens if wait else tokens - cost, now)
+
+        return wait
+
+
+# Same as MemoryRateLimitStore.take, timed by the Redis server's clock
+TAKE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local levels = {}
+local wait = 0
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local cost = tonumber(ARGV[i * 3])
+    local bucket = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    levels[i] = tokens
+    if tokens < cost then
+        wait = math.max(wait, (cost - tokens) / rate)
+    end
+end
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local tokens = levels[i]
+    if wait == 0 then
+        tokens = tokens - tonumber(ARGV[i * 3])
+    end
+
+    redis.call('HSET', key, 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+
+return tostring(wait)
+"""
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """
+    Buckets shared by every process using the Redis server.
+    Each take is a single atomic script call.
+    """
+
+    def __init__(self, client: Any):
+        self._take = client.register_script(TAKE_SCRIPT)
+
+    async def take(self, keys: Sequence[str], takes: Sequence[Take]) -> float:
+        args = [value for take in takes for value in take]
+        return float(await self._take(keys=list(keys), args=args))
+
+
+@dataclass
+class RateLimiterStats:
+    acquired: int = 0
+    delayed: int = 0
+    rejected: int = 0
+    waited: float = 0.0  # Seconds
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+class RateLimiter:
+    """
+    Limits requests and tokens per minute of each key, such as an API key and
+    model, with a token bucket for each.
+
+    Callers wait until both buckets have capacity for them, so bursts are
+    queued rather than rejected upstream. A caller that would have to wait more
+    than `max_wait` seconds in total is rejected with RateLimitExceeded.
+    """
+
+    def __init__(
+        self,
+        store: RateLimitStore,
+        limits: Dict[str, Tuple[int, int]],
+        *,
+        max_wait: float,
+        namespace: str = "rate_limit",
+    ):
+        self.store = store
+        self.limits = limits
+        self.max_wait = max_wait
+        self.namespace = namespace
+        self._stats = RateLimiterStats()
+
+    async def acquire(self, key: str, limit: str, tokens: int) -> None:
+        """Wait for capacity for one request of `tokens` under the named limit"""
+        if limit not in self.limits:
+            return
+
+        requests_per_minute, tokens_per_minute = self.limits[limit]
+        keys = [f"{self.namespace}:{key}:requests", f"{self.namespace}:{key}:tokens"]
+        takes = [
+            (requests_per_minute, requests_per_minute / 60, 1),
+            # Larger requests are capped so they can still pass once the bucket is full
+            (tokens_per_minute, tokens_per_minute / 60, min(tokens, tokens_per_minute)),
+        ]
+
+        waited = 0.0
+        while wait := await self.store.take(keys, takes):
+            if waited + wait > self.max_wait:
+                self._stats.rejected += 1
+                raise RateLimitExceeded(f"Rate limit of {limit} exceeded")
+
+            await asyncio.sleep(wait)
+            waited += wait
+
+        self._stats.acquired += 1
+        if waited:
+            self._stats.delayed += 1
+            self._stats.waited += waited
+
+    def stats(self) -> Dict[str, Any]:
+        return asdict(self._stats)
+
+
+def create_rate_limit_store(settings: Settings) -> RateLimitStore:
+    if not settings.redis_url:
+        return MemoryRateLimitStore()
+
+    from redis import asyncio as aioredis  # Only required when redis is configured
+
+    return RedisRateLimitStore(aioredis.from_url(settings.redis_url))
+
+
+openai_rate_limiter = RateLimiter(
+    create_rate_limit_store(settings),
+    settings.openai_rate_limits,
+    max_wait=settings.openai_rate_limit_max_wait,
+    namespace="openai_rate_limit",
+)
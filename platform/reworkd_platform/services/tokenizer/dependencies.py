@@ -1,7 +1,12 @@
 from fastapi import Request
 
 from reworkd_platform.services.tokenizer.token_service import TokenService
+from reworkd_platform.settings import settings
 
 
 def get_token_service(request: Request) -> TokenService:
-    return TokenService(request.app.state.token_encoding)
+    return TokenService(
+        request.app.state.token_encoding,
+        executor=request.app.state.token_executor,
+        offload_min_length=settings.tokenizer_offload_min_length,
+    )
@@ -1,6 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import tiktoken
 from fastapi import FastAPI
 
+from reworkd_platform.settings import settings
+
 ENCODING_NAME = "cl100k_base"  # gpt-4, gpt-3.5-turbo, text-embedding-ada-002
 
 
@@ -9,8 +13,17 @@ def init_tokenizer(app: FastAPI) -> None:  # pragma: no cover
     Initialize tokenizer.
 
     TikToken downloads the encoding on start. It is then
-    stored in the state of the application.
+    stored in the state of the application along with a bounded
+    thread pool used to encode large inputs off the event loop.
 
     :param app: current application.
     """
     app.state.token_encoding = tiktoken.get_encoding(ENCODING_NAME)
+    app.state.token_executor = ThreadPoolExecutor(
+        max_workers=settings.tokenizer_max_workers,
+        thread_name_prefix="tokenizer",
+    )
+
+
+def shutdown_tokenizer(app: FastAPI) -> None:  # pragma: no cover
+    app.state.token_executor.shutdown(wait=False, cancel_futures=True)
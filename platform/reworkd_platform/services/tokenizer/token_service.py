@@ -1,12 +1,40 @@
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from functools import lru_cache, partial
+from string import Formatter
+from typing import Any, Callable, Iterable, List, Optional, Tuple, TypeVar
+
+from langchain import PromptTemplate
 from tiktoken import Encoding, get_encoding
 
 from reworkd_platform.schemas.agent import LLM_MODEL_MAX_TOKENS, LLM_Model
 from reworkd_platform.web.api.agent.model_factory import WrappedChatOpenAI
 
+STATIC_VARIABLE = "language"  # Substituted into the cached static part of templates
+TEXT_CACHE_MIN_LENGTH = 1024  # Shorter texts are cheaper to encode than to hash
+TEXT_CACHE_MAX_ENTRIES = 4096
+OFFLOAD_MIN_LENGTH = 10_000  # Characters, below this a thread hop costs more
+
+T = TypeVar("T")
+
+# Shared by the event loop and executor threads counting offloaded texts
+_text_token_counts: "OrderedDict[Tuple[str, bytes], int]" = OrderedDict()
+_text_token_counts_lock = threading.Lock()
+
 
 class TokenService:
-    def __init__(self, encoding: Encoding):
+    def __init__(
+        self,
+        encoding: Encoding,
+        executor: Optional[Executor] = None,
+        offload_min_length: int = OFFLOAD_MIN_LENGTH,
+    ):
         self.encoding = encoding
+        self.executor = executor
+        self.offload_min_length = offload_min_length
 
     @classmethod
     def create(cls, encoding: str = "cl100k_base") -> "TokenService":
@@ -21,13 +49,175 @@ class TokenService:
     def count(self, text: str) -> int:
         return len(self.tokenize(text))
 
+    async def atokenize(self, text: str) -> list[int]:
+        return await self._run(len(text), self.tokenize, text)
+
+    async def adetokenize(self, tokens: list[int]) -> str:
+        # Tokens average roughly four characters each
+        return await self._run(len(tokens) * 4, self.detokenize, tokens)
+
+    async def acount(self, text: str) -> int:
+        return await self._run(len(text), self.count, text)
+
+    async def acount_many(self, texts: Iterable[str]) -> List[int]:
+        texts = list(texts)
+        return await self._run(sum(map(len, texts)), self.count_many, texts)
+
+    async def achunk(
+        self, texts: Iterable[str], max_tokens: int, separator: str = "\n\n"
+    ) -> List[str]:
+        """
+        Pack texts into chunks of at most `max_tokens` tokens, keeping each text
+        whole where it fits. Texts larger than a chunk are split on token boundaries.
+        """
+        texts = [text for text in texts if text]
+        separator_tokens = self.count(separator)
+
+        chunks: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+
+        for text, tokens in zip(texts, await self.acount_many(texts)):
+            if current and current_tokens + separator_tokens + tokens > max_tokens:
+                chunks.append(separator.join(current))
+                current, current_tokens = [], 0
+
+            if tokens <= max_tokens:
+                current_tokens += tokens + (separator_tokens if current else 0)
+                current.append(text)
+                continue
+
+            encoded = await self.atokenize(text)
+            for start in range(0, len(encoded), max_tokens):
+                piece = encoded[start : start + max_tokens]
+                chunks.append(await self.adetokenize(piece))
+
+        if current:
+            chunks.append(separator.join(current))
+
+        return chunks
+
+    async def _run(self, size: int, func: Callable[..., T], *args: Any) -> T:
+        """
+        Run small inputs inline and hand large ones to the tokenizer thread pool.
+        tiktoken releases the GIL while encoding, so other requests on the
+        event loop keep streaming while a large text is being processed.
+        """
+        if self.executor is None or size < self.offload_min_length:
+            return func(*args)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args))
+
+    def count_many(self, texts: Iterable[str]) -> List[int]:
+        """
+        Count the tokens of several texts at once.
+        Long texts are memoized by digest so re-sent histories are not re-encoded.
+        """
+        texts = list(texts)
+        counts: List[Optional[int]] = [None] * len(texts)
+        missing: "OrderedDict[str, List[int]]" = OrderedDict()
+
+        for i, text in enumerate(texts):
+            cached = _get_cached_count(self.encoding, text)
+            if cached is not None:
+                counts[i] = cached
+            else:
+                missing.setdefault(text, []).append(i)
+
+        encoded = (
+            self.encoding.encode_batch(list(missing))
+            if len(missing) > 1
+            else [self.encoding.encode(text) for text in missing]
+        )
+
+        for (text, indices), tokens in zip(missing.items(), encoded):
+            _set_cached_count(self.encoding, text, len(tokens))
+            for i in indices:
+                counts[i] = len(tokens)
+
+        return [count or 0 for count in counts]
+
+    def count_prompt(self, prompt: PromptTemplate, **kwargs: Any) -> int:
+        """
+        Count the tokens a prompt will have once formatted, without formatting it.
+
+        The static text of the template, including the language, is counted once
+        and cached. Only the remaining substitutions are tokenized per call.
+        Tokenizing segments separately may slightly over-count compared to the
+        joined prompt, which is the safe direction when budgeting completions.
+        """
+        static_tokens = _count_static_tokens(
+            self.encoding, prompt.template, str(kwargs.get(STATIC_VARIABLE, ""))
+        )
+
+        variables = [
+            str(kwargs[field])
+            for _, field in _parse_template(prompt.template)
+            if field is not None and field != STATIC_VARIABLE
+        ]
+
+        return static_tokens + sum(self.count_many(variables))
+
     def get_completion_space(self, model: LLM_Model, *prompts: str) -> int:
-        max_allowed_tokens = LLM_MODEL_MAX_TOKENS.get(model, 4000)
-        prompt_tokens = sum([self.count(p) for p in prompts])
-        return max_allowed_tokens - prompt_tokens
+        return self._get_completion_space(model, sum(self.count_many(prompts)))
 
     def calculate_max_tokens(self, model: WrappedChatOpenAI, *prompts: str) -> None:
-        requested_tokens = self.get_completion_space(model.model_name, *prompts)
+        self.calculate_max_tokens_for_count(model, sum(self.count_many(prompts)))
+
+    def calculate_max_tokens_for_count(
+        self, model: WrappedChatOpenAI, prompt_tokens: int
+    ) -> None:
+        requested_tokens = self._get_completion_space(model.model_name, prompt_tokens)
 
         model.max_tokens = min(model.max_tokens, requested_tokens)
         model.max_tokens = max(model.max_tokens, 1)
+
+    @staticmethod
+    def _get_completion_space(model: LLM_Model, prompt_tokens: int) -> int:
+        max_allowed_tokens = LLM_MODEL_MAX_TOKENS.get(model, 4000)
+        return max_allowed_tokens - prompt_tokens
+
+
+@lru_cache(maxsize=256)
+def _parse_template(template: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    return tuple(
+        (literal, field) for literal, field, _, _ in Formatter().parse(template)
+    )
+
+
+@lru_cache(maxsize=1024)
+def _count_static_tokens(encoding: Encoding, template: str, language: str) -> int:
+    static_text = "".join(
+        literal + (language if field == STATIC_VARIABLE else "")
+        for literal, field in _parse_template(template)
+    )
+    return len(encoding.encode(static_text))
+
+
+def _text_key(encoding: Encoding, text: str) -> Tuple[str, bytes]:
+    return encoding.name, hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def _get_cached_count(encoding: Encoding, text: str) -> Optional[int]:
+    if len(text) < TEXT_CACHE_MIN_LENGTH:
+        return None
+
+    key = _text_key(encoding, text)
+    with _text_token_counts_lock:
+        count = _text_token_counts.get(key)
+        if count is not None:
+            _text_token_counts.move_to_end(key)
+
+    return count
+
+
+def _set_cached_count(encoding: Encoding, text: str, count: int) -> None:
+    if len(text) < TEXT_CACHE_MIN_LENGTH:
+        return
+
+    key = _text_key(encoding, text)
+    with _text_token_counts_lock:
+        _text_token_counts[key] = count
+        while len(_text_token_counts) > TEXT_CACHE_MAX_ENTRIES:
+            _text_token_counts.popitem(last=False)
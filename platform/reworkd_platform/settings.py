@@ -1,8 +1,8 @@
 import platform
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Literal, Optional, Union
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union
 
-from pydantic import BaseSettings, Field
+from pydantic import BaseModel, BaseSettings, Field
 from yarl import URL
 
 from reworkd_platform.constants import ENV_PREFIX
@@ -29,6 +29,15 @@ ENVIRONMENT = Literal[
 ]
 
 
+class LLMEndpoint(BaseModel):
+    """An OpenAI compatible endpoint completions can be routed to"""
+
+    api_base: str
+    api_key: str
+    api_type: Literal["open_ai", "azure"] = "open_ai"
+    api_version: Optional[str] = None  # Required by azure
+
+
 class Settings(BaseSettings):
     """
     Application settings.
@@ -66,6 +75,42 @@ class Settings(BaseSettings):
         default="<Should be updated via env if using azure>",
         title="Azure OpenAI Deployment Name",
     )
+    llm_client_pool_size: int = Field(
+        default=256, title="LLM Client Pool Size"
+    )  # Distinct model configurations kept constructed, e.g. per custom API key
+
+    # Requests and tokens per minute of each API key and model. Unlisted models
+    # are not limited. Shared by every worker when redis_url is set
+    openai_rate_limits: Dict[str, Tuple[int, int]] = Field(
+        default={
+            "gpt-3.5-turbo": (3500, 90_000),
+            "gpt-3.5-turbo-16k": (3500, 180_000),
+            "gpt-4": (200, 40_000),
+        },
+        title="OpenAI Rate Limits",
+    )
+    openai_rate_limit_max_wait: float = Field(
+        default=30.0, title="OpenAI Rate Limit Max Wait"
+    )  # Seconds a completion may be queued before failing
+
+    # Completions with the platform key are routed between its own endpoint and
+    # these, skipping endpoints whose circuit breaker is open
+    llm_endpoints: List[LLMEndpoint] = Field(default=[], title="LLM Endpoints")
+    llm_fallback_models: Dict[str, str] = Field(
+        default={"gpt-4": "gpt-3.5-turbo-16k"}, title="LLM Fallback Models"
+    )  # Model used once every endpoint of a model is failing or overloaded
+    llm_circuit_failure_threshold: int = Field(
+        default=5, title="LLM Circuit Failure Threshold"
+    )  # Consecutive failures opening an endpoint's circuit
+    llm_circuit_reset_timeout: float = Field(
+        default=30.0, title="LLM Circuit Reset Timeout"
+    )  # Seconds before an open circuit lets a probe request through
+    llm_hedge_enabled: bool = Field(
+        default=False, title="LLM Hedge Enabled"
+    )  # Send a second request to another endpoint when the first is slow
+    llm_hedge_min_delay: float = Field(
+        default=2.0, title="LLM Hedge Min Delay"
+    )  # Seconds, the p95 latency of the first endpoint is used when higher
 
     # Helicone
     helicone_api_base: str = Field(
@@ -109,6 +154,20 @@ class Settings(BaseSettings):
     pinecone_environment: Optional[str] = Field(
         default=None, title="Pinecone Environment"
     )
+    memory_embedding_cache_size: int = Field(
+        default=4096, title="Memory Embedding Cache Size"
+    )  # Vectors kept in process so repeated tasks are not re-embedded
+
+    # In-process vector memory for single node deployments
+    local_memory_enabled: bool = Field(
+        default=False, title="Local Memory Enabled"
+    )  # Used when Pinecone is not configured
+    local_memory_idle_ttl: int = Field(
+        default=3600, title="Local Memory Idle TTL"
+    )  # Seconds before an unused namespace is dropped from memory
+    local_memory_snapshot_dir: Optional[str] = Field(
+        default=None, title="Local Memory Snapshot Dir"
+    )  # Namespaces are persisted here on eviction and shutdown when set
 
     # Sentry's configuration.
     sentry_dsn: Optional[str] = Field(default=None, title="Sentry DSN")
@@ -131,11 +190,136 @@ class Settings(BaseSettings):
     pusher_secret: Optional[str] = Field(default=None, title="Pusher Secret")
     pusher_cluster: Optional[str] = Field(default=None, title="Pusher Cluster")
 
+    # Shared outbound HTTP client
+    http_pool_size: int = Field(default=100, title="HTTP Pool Size")
+    http_pool_size_per_host: int = Field(
+        default=20, title="HTTP Pool Size Per Host"
+    )
+    http_keepalive_timeout: float = Field(
+        default=30.0, title="HTTP Keepalive Timeout"
+    )
+    http_dns_cache_ttl: int = Field(default=300, title="HTTP DNS Cache TTL")
+    http_request_timeout: float = Field(
+        default=30.0, title="HTTP Request Timeout"
+    )
+
+    # Separate pool for model completions. A streamed completion holds its
+    # connection until the stream ends, so they don't share the tool call pool
+    llm_http_pool_size: int = Field(default=500, title="LLM HTTP Pool Size")
+    llm_http_pool_size_per_host: int = Field(
+        default=200, title="LLM HTTP Pool Size Per Host"
+    )
+    llm_http_request_timeout: float = Field(
+        default=600.0, title="LLM HTTP Request Timeout"
+    )
+
+    # Shared cache. Falls back to in-process caches when unset
+    redis_url: Optional[str] = Field(default=None, title="Redis URL")
+
+    # Authenticated session cache. Shared through redis_url when set, otherwise
+    # the TTL bounds how long a signed out session stays usable on other workers
+    session_cache_ttl: int = Field(default=60, title="Session Cache TTL")
+    session_cache_negative_ttl: int = Field(
+        default=10, title="Session Cache Negative TTL"
+    )  # Seconds an unknown or expired token is remembered
+    session_cache_max_entries: int = Field(
+        default=4096, title="Session Cache Max Entries"
+    )
+
+    # Search result cache
+    search_cache_ttl: int = Field(default=3600, title="Search Cache TTL")
+    search_cache_max_entries: int = Field(
+        default=2048, title="Search Cache Max Entries"
+    )
+
+    # Generated image cache. Image URLs of providers expire after an hour, so
+    # images are only cached for longer once copied to image_bucket
+    image_cache_ttl: int = Field(default=3000, title="Image Cache TTL")
+    image_cache_max_entries: int = Field(
+        default=1024, title="Image Cache Max Entries"
+    )
+    image_bucket: Optional[str] = Field(
+        default=None, title="Image Bucket"
+    )  # Publicly readable S3 bucket generated images are copied to
+    image_bucket_cache_ttl: int = Field(
+        default=7 * 24 * 3600, title="Image Bucket Cache TTL"
+    )
+
+    # LLM completion cache
+    completion_cache_enabled: bool = Field(
+        default=True, title="Completion Cache Enabled"
+    )
+    completion_cache_ttl: int = Field(default=600, title="Completion Cache TTL")
+    completion_cache_max_entries: int = Field(
+        default=1024, title="Completion Cache Max Entries"
+    )
+    completion_cache_max_temperature: float = Field(
+        default=0.2, title="Completion Cache Max Temperature"
+    )  # Completions sampled above this temperature are never cached
+    completion_cache_scope: Literal["user", "global"] = Field(
+        default="user", title="Completion Cache Scope"
+    )
+    completion_cache_similarity_threshold: Optional[float] = Field(
+        default=None, title="Completion Cache Similarity Threshold"
+    )  # Enables the embedding similarity tier when set
+
+    # Tokenizer thread pool used to keep large encodes off the event loop
+    tokenizer_max_workers: int = Field(default=4, title="Tokenizer Max Workers")
+    tokenizer_offload_min_length: int = Field(
+        default=10_000, title="Tokenizer Offload Min Length"
+    )  # Characters
+
+    # Number of result chunks summarized concurrently when summarizing a run
+    summarize_max_concurrency: int = Field(
+        default=4, title="Summarize Max Concurrency"
+    )
+
     # Application Settings
     ff_mock_mode_enabled: bool = Field(
         default=False, title="FF Mock Mode Enabled"
     )  # Controls whether calls are mocked
     max_loops: int = Field(default=25, title="Maximum Number of Loops")
+    agent_speculative_analysis_concurrency: int = Field(
+        default=1, title="Agent Speculative Analysis Concurrency"
+    )  # Queued tasks analyzed ahead while a run executes a task, 0 disables
+    agent_parallel_task_concurrency: int = Field(
+        default=5, title="Agent Parallel Task Concurrency"
+    )  # Initial tasks of a parallel run executed at once
+
+    # Agent task bookkeeping rows are batched and written off the request path
+    agent_task_strict_writes: bool = Field(
+        default=False, title="Agent Task Strict Writes"
+    )  # Insert each task in its request's transaction instead
+    agent_task_queue_size: int = Field(default=10_000, title="Agent Task Queue Size")
+    agent_task_batch_size: int = Field(default=500, title="Agent Task Batch Size")
+    agent_task_flush_interval: float = Field(
+        default=1.0, title="Agent Task Flush Interval"
+    )  # Seconds
+
+    # Agent runs executed as background jobs
+    job_queue_backend: Literal["memory", "database", "kafka"] = Field(
+        default="memory", title="Job Queue Backend"
+    )  # Separate worker processes need a database or kafka queue and redis_url
+    job_inline_workers: bool = Field(
+        default=True, title="Job Inline Workers"
+    )  # Also execute jobs in the API process
+    job_worker_concurrency: int = Field(
+        default=4, title="Job Worker Concurrency"
+    )  # Runs executed at once by each process
+    job_max_attempts: int = Field(default=3, title="Job Max Attempts")
+    job_visibility_timeout: int = Field(
+        default=300, title="Job Visibility Timeout"
+    )  # Seconds before a database job of an unresponsive worker is retried
+    job_poll_interval: float = Field(
+        default=1.0, title="Job Poll Interval"
+    )  # Seconds between polls of an empty database queue
+    job_events_ttl: int = Field(
+        default=3600, title="Job Events TTL"
+    )  # Seconds the events of a finished run can still be replayed
+    job_events_idle_timeout: int = Field(
+        default=300, title="Job Events Idle Timeout"
+    )  # Seconds a subscriber waits for the next event
+    kafka_job_topic: str = Field(default="agent-jobs", title="Kafka Job Topic")
 
     # Settings for sid
     sid_client_id: Optional[str] = Field(default=None, title="SID Client ID")
@@ -146,6 +330,14 @@ class Settings(BaseSettings):
         default=None, title="SID Redirect URI"
     )
 
+    # OAuth access tokens are refreshed before use this close to expiry
+    oauth_token_refresh_margin: int = Field(
+        default=300, title="OAuth Token Refresh Margin"
+    )  # Seconds
+    oauth_token_proactive_margin: int = Field(
+        default=900, title="OAuth Token Proactive Margin"
+    )  # Seconds, tokens used this close to expiry are refreshed in the background
+
     @property
     def kafka_consumer_group(self) -> str:
         """
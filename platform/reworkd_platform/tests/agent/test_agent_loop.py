@@ -0,0 +1,222 @@
+import asyncio
+import copy
+import json
+from typing import Any, List, Tuple
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.responses import StreamingResponse as FastAPIStreamingResponse
+from lanarky.responses import StreamingResponse
+
+from reworkd_platform.schemas.agent import AgentRunLoop
+from reworkd_platform.web.api.agent.agent_loop import (
+    AgentLoop,
+    SpeculativeAnalyzer,
+    iterate_response,
+)
+from reworkd_platform.web.api.agent.analysis import Analysis
+from reworkd_platform.web.api.agent.stream_mock import stream_string
+from reworkd_platform.web.api.errors import MaxLoopsError
+
+
+class FakeAgentService:
+    def __init__(self, new_tasks: List[List[str]], tasks: Tuple[str, ...] = ("first",)):
+        self.new_tasks = new_tasks
+        self.tasks = list(tasks)
+        self.max_tokens = 100
+
+    async def start_goal_agent(self, *, goal: str) -> List[str]:
+        return self.tasks
+
+    def fork(self) -> "FakeAgentService":
+        return copy.copy(self)
+
+    async def analyze_task_agent(self, **kwargs: Any) -> Analysis:
+        self.max_tokens = 10
+        await asyncio.sleep(0)
+        assert self.max_tokens == 10
+        return Analysis.construct(action="reason", arg="", reasoning="because")
+
+    async def execute_task_agent(self, *, task: str, **kwargs: Any) -> Any:
+        assert self.max_tokens == 100
+        return stream_string(f"result of {task}")
+
+    async def create_tasks_agent(self, **kwargs: Any) -> List[str]:
+        return self.new_tasks.pop(0) if self.new_tasks else []
+
+    async def summarize_task_agent(self, *, results: List[str], **kwargs: Any) -> Any:
+        return stream_string(" | ".join(results))
+
+
+def parse(events: List[str]) -> List[Tuple[str, dict]]:
+    parsed = []
+    for event in events:
+        name, data = event.strip().split("\n")
+        parsed.append((name[len("event: ") :], json.loads(data[len("data: ") :])))
+    return parsed
+
+
+async def run_loop(
+    service: FakeAgentService, crud: MagicMock, parallel: bool = False
+) -> List[Tuple[str, dict]]:
+    run = AgentRunLoop(goal="goal", run_id="run", parallel=parallel)
+    return parse([event async for event in AgentLoop(service, crud, run).stream()])
+
+
+def create_crud() -> MagicMock:
+    crud = MagicMock()
+    crud.create_task = AsyncMock()
+    crud.session.commit = AsyncMock()
+    return crud
+
+
+@pytest.mark.asyncio
+async def test_runs_until_no_tasks_are_left() -> None:
+    crud = create_crud()
+    events = await run_loop(FakeAgentService(new_tasks=[["second"]]), crud)
+
+    assert [name for name, _ in events] == [
+        "run",
+        "tasks",
+        "analysis",
+        "execution",
+        "tasks",
+        "analysis",
+        "execution",
+        "summary",
+        "done",
+    ]
+    assert events[-2][1] == {"text": "result of first | result of second"}
+
+    steps = [call.args[1] for call in crud.create_task.await_args_list]
+    assert steps == ["start", *["analyze", "execute", "create"] * 2, "summarize"]
+    assert crud.session.commit.await_count == len(steps)
+
+
+@pytest.mark.asyncio
+async def test_stops_at_max_loops_and_summarizes() -> None:
+    crud = create_crud()
+    error = MaxLoopsError(StopIteration(), "Max loops of 1 exceeded", 429)
+    crud.create_task.side_effect = [None, None, None, None, error, None]
+
+    events = await run_loop(FakeAgentService(new_tasks=[["second"]]), crud)
+
+    assert ("stop", {"detail": "Max loops of 1 exceeded"}) in events
+    assert [name for name, _ in events][-2:] == ["summary", "done"]
+
+
+class SlowFirstTaskService(FakeAgentService):
+    async def execute_task_agent(self, *, task: str, **kwargs: Any) -> Any:
+        async def body() -> Any:
+            await asyncio.sleep(0.05 if task == "slow" else 0)
+            yield f"result of {task}".encode()
+
+        return FastAPIStreamingResponse(body())
+
+
+@pytest.mark.asyncio
+async def test_parallel_run_merges_results_in_task_order() -> None:
+    crud = create_crud()
+    service = SlowFirstTaskService(new_tasks=[["follow up"]], tasks=("slow", "fast"))
+
+    events = await run_loop(service, crud, parallel=True)
+
+    executions = [data for name, data in events if name == "execution"]
+    assert [(e["task_id"], e["task"]) for e in executions] == [
+        (1, "fast"),
+        (0, "slow"),
+        (2, "follow up"),
+    ]
+    assert events[-2][1] == {
+        "text": "result of slow | result of fast | result of follow up"
+    }
+
+    steps = [call.args[1] for call in crud.create_task.await_args_list]
+    assert steps.count("execute") == 3
+    assert steps.count("create") == 2
+
+
+@pytest.mark.asyncio
+async def test_iterate_chain_response() -> None:
+    async def chain_executor(send: Any) -> None:
+        for token in ["Hello", " ", "world"]:
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": token.encode(),
+                    "more_body": True,
+                }
+            )
+
+    response = StreamingResponse(chain_executor=chain_executor)
+
+    assert [text async for text in iterate_response(response)] == [
+        "Hello",
+        " ",
+        "world",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iterate_response_decodes_split_characters() -> None:
+    data = "é".encode()
+
+    async def body() -> Any:
+        yield data[:1]
+        yield data[1:]
+
+    texts = [text async for text in iterate_response(FastAPIStreamingResponse(body()))]
+    assert texts == ["é"]
+
+
+@pytest.mark.asyncio
+async def test_speculative_analysis_is_reused() -> None:
+    analyzed: List[str] = []
+
+    async def analyze(task: str) -> Analysis:
+        analyzed.append(task)
+        return Analysis.construct(action="reason", arg=task, reasoning="")
+
+    analyzer = SpeculativeAnalyzer(analyze, max_concurrency=1)
+    analyzer.prefetch(["second", "third"])
+    await asyncio.sleep(0)
+
+    assert analyzed == ["second"]
+    assert (await analyzer.get("second")).arg == "second"
+    assert (await analyzer.get("third")).arg == "third"
+    assert analyzed == ["second", "third"]
+
+
+@pytest.mark.asyncio
+async def test_speculative_analysis_is_discarded() -> None:
+    started = asyncio.Event()
+
+    async def analyze(task: str) -> Analysis:
+        started.set()
+        await asyncio.sleep(10)
+        raise AssertionError("Should have been cancelled")
+
+    analyzer = SpeculativeAnalyzer(analyze, max_concurrency=2)
+    analyzer.prefetch(["removed"])
+    await started.wait()
+
+    analyzer.retain(["other"])
+    await analyzer.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_speculation_is_retried() -> None:
+    calls = 0
+
+    async def analyze(task: str) -> Analysis:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ValueError()
+        return Analysis.construct(action="reason", arg=task, reasoning="")
+
+    analyzer = SpeculativeAnalyzer(analyze, max_concurrency=1)
+    analyzer.prefetch(["task"])
+
+    assert (await analyzer.get("task")).arg == "task"
+    assert calls == 2
@@ -0,0 +1,218 @@
+import asyncio
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+
+from reworkd_platform.schemas.agent import ModelSettings
+from reworkd_platform.schemas.user import UserBase
+from reworkd_platform.services.cache.backend import MemoryCacheBackend
+from reworkd_platform.services.cache.cache import Cache
+from reworkd_platform.settings import Settings
+from reworkd_platform.web.api.agent.completion_cache import (
+    CompletionCache,
+    SemanticIndex,
+)
+
+
+class FakeEmbeddings:
+    """Embeds prompts by the first word so similar prompts share a vector"""
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return [1.0, 0.0] if text.startswith("bagel") else [0.0, 1.0]
+
+
+def create_model(temperature: float = 0.0, model_name: str = "gpt-3.5-turbo") -> Mock:
+    model = Mock(spec=["model_name", "temperature"])
+    model.model_name = model_name
+    model.temperature = temperature
+    return model
+
+
+def create_cache(**kwargs) -> CompletionCache:
+    return CompletionCache(
+        Cache(MemoryCacheBackend(max_entries=10), namespace="test", ttl=60),
+        max_temperature=0.5,
+        **kwargs,
+    )
+
+
+class Completer:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        await asyncio.sleep(0)
+        return f"completion {self.calls}"
+
+
+@pytest.mark.asyncio
+async def test_exact_match_is_cached() -> None:
+    cache = create_cache()
+    complete = Completer()
+    user = UserBase(id="user")
+
+    for _ in range(3):
+        result = await cache.get_or_complete(
+            model=create_model(), prompt="goal", user=user, complete=complete
+        )
+        assert result == "completion 1"
+
+    assert complete.calls == 1
+    assert cache.stats()["exact_hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_key_includes_model_and_functions() -> None:
+    cache = create_cache()
+    complete = Completer()
+    user = UserBase(id="user")
+
+    await cache.get_or_complete(
+        model=create_model(), prompt="goal", user=user, complete=complete
+    )
+    await cache.get_or_complete(
+        model=create_model(model_name="gpt-4"),
+        prompt="goal",
+        user=user,
+        complete=complete,
+    )
+    await cache.get_or_complete(
+        model=create_model(),
+        prompt="goal",
+        user=user,
+        complete=complete,
+        functions=[{"name": "search"}],
+    )
+
+    assert complete.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_high_temperature_skips_cache() -> None:
+    cache = create_cache()
+    complete = Completer()
+    model = create_model(temperature=0.9)
+
+    await cache.get_or_complete(
+        model=model, prompt="goal", user=UserBase(id="user"), complete=complete
+    )
+    await cache.get_or_complete(
+        model=model, prompt="goal", user=UserBase(id="user"), complete=complete
+    )
+
+    assert complete.calls == 2
+    assert cache.stats()["skipped"] == 2
+
+
+@pytest.mark.asyncio
+async def test_default_model_settings_skip_cache() -> None:
+    cache = CompletionCache.create(Settings())
+    complete = Completer()
+    model = create_model(temperature=ModelSettings.__fields__["temperature"].default)
+
+    await cache.get_or_complete(
+        model=model, prompt="goal", user=UserBase(id="user"), complete=complete
+    )
+
+    assert complete.calls == 1
+    assert cache.stats()["skipped"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("scope, expected_calls", [("user", 2), ("global", 1)])
+async def test_scope(scope: str, expected_calls: int) -> None:
+    cache = create_cache(scope=scope)
+    complete = Completer()
+
+    for user_id in ["a", "b"]:
+        await cache.get_or_complete(
+            model=create_model(),
+            prompt="goal",
+            user=UserBase(id=user_id),
+            complete=complete,
+        )
+
+    assert complete.calls == expected_calls
+
+
+@pytest.mark.asyncio
+async def test_semantic_tier_matches_similar_prompts() -> None:
+    cache = create_cache(
+        embeddings=FakeEmbeddings(),
+        semantic_index=SemanticIndex(max_entries=10, threshold=0.95),
+    )
+    complete = Completer()
+    user = UserBase(id="user")
+
+    first = await cache.get_or_complete(
+        model=create_model(), prompt="bagel shop plan", user=user, complete=complete
+    )
+    similar = await cache.get_or_complete(
+        model=create_model(), prompt="bagel store plan", user=user, complete=complete
+    )
+    different = await cache.get_or_complete(
+        model=create_model(), prompt="car wash plan", user=user, complete=complete
+    )
+
+    assert first == similar == "completion 1"
+    assert different == "completion 2"
+    assert cache.stats()["semantic_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_semantic_tier_embeds_while_completing_first_prompt() -> None:
+    complete = Completer()
+    completions_when_embedded: List[int] = []
+
+    class RecordingEmbeddings(FakeEmbeddings):
+        async def aembed_query(self, text: str) -> List[float]:
+            completions_when_embedded.append(complete.calls)
+            return await super().aembed_query(text)
+
+    cache = create_cache(
+        embeddings=RecordingEmbeddings(),
+        semantic_index=SemanticIndex(max_entries=10, threshold=0.95),
+    )
+    user = UserBase(id="user")
+
+    for prompt in ["bagel shop plan", "car wash plan"]:
+        await cache.get_or_complete(
+            model=create_model(), prompt=prompt, user=user, complete=complete
+        )
+
+    # The first prompt has nothing to match, so it isn't embedded before completing
+    assert completions_when_embedded == [1, 1]
+    assert cache.stats()["semantic_entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_embedding_errors_count_as_misses() -> None:
+    class FailingEmbeddings:
+        async def aembed_query(self, text: str) -> List[float]:
+            raise TimeoutError("Embedding timed out")
+
+    index = SemanticIndex(max_entries=10, threshold=0.95)
+    cache = create_cache(embeddings=FailingEmbeddings(), semantic_index=index)
+    model, user = create_model(), UserBase(id="user")
+    index.add(cache._partition(model, user, None), [1.0, 0.0], "other")
+
+    result = await cache.get_or_complete(
+        model=model, prompt="bagel shop plan", user=user, complete=Completer()
+    )
+
+    assert result == "completion 1"
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["semantic_entries"] == 1
+
+
+def test_semantic_index_evicts_oldest() -> None:
+    index = SemanticIndex(max_entries=1, threshold=0.5)
+
+    index.add("partition", [1.0, 0.0], "old")
+    index.add("partition", [1.0, 0.0], "new")
+
+    assert index.search("partition", [1.0, 0.0]) == ["new"]
+    assert index.search("other", [1.0, 0.0]) == []
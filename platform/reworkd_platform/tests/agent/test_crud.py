@@ -1,8 +1,10 @@
+from typing import List
 from unittest.mock import AsyncMock
 
 import pytest
 from fastapi import HTTPException
 from pytest_mock import MockerFixture
+from sqlalchemy.exc import IntegrityError
 
 from reworkd_platform.db.crud.agent import AgentCRUD
 from reworkd_platform.settings import settings
@@ -61,3 +63,113 @@ def mock_session_with_run_count(mocker: MockerFixture, run_count: int) -> AsyncM
     session.execute.return_value = scalar_mock
     scalar_mock.scalar_one.return_value = run_count
     return session
+
+
+@pytest.mark.asyncio
+async def test_increment_step_count_single_statement(mocker: MockerFixture) -> None:
+    session = mock_session_with_results(mocker, updated=[1])
+    agent_crud = AgentCRUD(session, mocker.MagicMock())
+
+    await agent_crud.increment_step_count("test", "execute")
+
+    assert session.execute.await_count == 1
+
+
+@pytest.mark.parametrize(
+    "type_, error",
+    [("execute", MaxLoopsError), ("summarize", MultipleSummaryError)],
+)
+@pytest.mark.asyncio
+async def test_increment_step_count_at_limit(
+    mocker: MockerFixture, type_: str, error: type
+) -> None:
+    session = mock_session_with_results(mocker, updated=[0], counter_exists=True)
+    agent_crud = AgentCRUD(session, mocker.MagicMock())
+
+    with pytest.raises(error):
+        await agent_crud.increment_step_count("test", type_)
+
+
+@pytest.mark.asyncio
+async def test_increment_step_count_backfills_legacy_run(
+    mocker: MockerFixture,
+) -> None:
+    mock_agent_run_exists(mocker, True)
+    session = mock_session_with_results(mocker, updated=[0, 1], counter_exists=False)
+    session.add = mocker.MagicMock()
+    agent_crud = AgentCRUD(session, mocker.MagicMock())
+
+    await agent_crud.increment_step_count("test", "execute")
+
+    counter = session.add.call_args.args[0]
+    assert (counter.run_id, counter.type_, counter.count) == ("test", "execute", 3)
+
+
+@pytest.mark.asyncio
+async def test_increment_step_count_concurrent_backfill(
+    mocker: MockerFixture,
+) -> None:
+    mock_agent_run_exists(mocker, True)
+    session = mock_session_with_results(mocker, updated=[0, 1], counter_exists=False)
+    session.add = mocker.MagicMock()
+    session.flush.side_effect = IntegrityError("INSERT", {}, Exception())
+    agent_crud = AgentCRUD(session, mocker.MagicMock())
+
+    await agent_crud.increment_step_count("test", "execute")
+
+    assert session.execute.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_increment_step_count_run_not_found(mocker: MockerFixture) -> None:
+    mock_agent_run_exists(mocker, False)
+    session = mock_session_with_results(mocker, updated=[0], counter_exists=False)
+    agent_crud = AgentCRUD(session, mocker.MagicMock())
+
+    with pytest.raises(HTTPException):
+        await agent_crud.increment_step_count("test", "execute")
+
+
+@pytest.mark.parametrize("strict, queued", [(False, True), (True, False)])
+@pytest.mark.asyncio
+async def test_create_task_write_behind(
+    mocker: MockerFixture, strict: bool, queued: bool
+) -> None:
+    mocker.patch.object(settings, "agent_task_strict_writes", strict)
+    queue = mocker.patch("reworkd_platform.db.crud.agent.agent_task_queue")
+    queue.put.return_value = True
+
+    session = mock_session_with_results(mocker, updated=[1])
+    session.add = mocker.MagicMock()
+    agent_crud = AgentCRUD(session, mocker.MagicMock())
+
+    task = await agent_crud.create_task("test", "execute")
+
+    assert queue.put.called == queued
+    assert session.add.called != queued
+    if queued:
+        queue.put.assert_called_once_with(
+            {"id": task.id, "run_id": "test", "type": "execute"}
+        )
+
+
+def mock_session_with_results(
+    mocker: MockerFixture, updated: List[int], counter_exists: bool = False
+) -> AsyncMock:
+    """
+    Mock the statements of increment_step_count in order: the conditional UPDATE,
+    the counter lookup, the legacy COUNT and the UPDATE retry
+    """
+    session = mocker.AsyncMock()
+    session.begin_nested = mocker.MagicMock()
+    session.begin_nested.return_value.__aexit__.return_value = False
+    update, *retries = [mocker.MagicMock(rowcount=rowcount) for rowcount in updated]
+
+    lookup = mocker.MagicMock()
+    lookup.first.return_value = ("id",) if counter_exists else None
+
+    count = mocker.MagicMock()
+    count.scalar_one.return_value = 3
+
+    session.execute.side_effect = [update, lookup, count, *retries]
+    return session
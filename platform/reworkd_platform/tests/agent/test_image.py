@@ -0,0 +1,69 @@
+import asyncio
+import time
+from typing import List
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+
+from reworkd_platform.services.cache.backend import MemoryCacheBackend
+from reworkd_platform.services.cache.cache import Cache
+from reworkd_platform.web.api.agent.tools import image
+from reworkd_platform.web.api.agent.tools.image import get_image, get_replicate_image
+
+
+@pytest_asyncio.fixture
+async def cache(mocker) -> Cache:
+    cache = Cache(MemoryCacheBackend(16), namespace="image", ttl=60)
+    mocker.patch.object(image, "image_cache", cache)
+    mocker.patch.object(image.settings, "replicate_api_key", None)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_repeated_prompts_are_generated_once(mocker, cache: Cache) -> None:
+    generate = mocker.patch.object(
+        image, "get_open_ai_image", AsyncMock(return_value="https://image/1")
+    )
+
+    urls = [await get_image("A red  Fox"), await get_image("a red fox")]
+
+    assert urls == ["https://image/1", "https://image/1"]
+    generate.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_persisted_images_are_cached_longer(mocker, cache: Cache) -> None:
+    mocker.patch.object(
+        image, "get_open_ai_image", AsyncMock(return_value="https://image/1")
+    )
+    persist = mocker.patch.object(
+        image, "persist_image", AsyncMock(return_value="https://bucket/image")
+    )
+    set_value = mocker.spy(cache, "set")
+
+    assert await get_image("a red fox") == "https://bucket/image"
+
+    object_name = persist.await_args.args[1]
+    assert object_name.startswith("images/openai/")
+    assert set_value.call_args.args[2] == image.settings.image_bucket_cache_ttl
+
+
+@pytest.mark.asyncio
+async def test_replicate_does_not_block_the_event_loop(mocker) -> None:
+    client = MagicMock()
+    client.run.side_effect = lambda *args, **kwargs: time.sleep(0.2) or ["url"]
+    mocker.patch.object(image.replicate, "Client", return_value=client)
+    mocker.patch.object(image.settings, "replicate_api_key", "key")
+
+    ticks: List[float] = []
+
+    async def tick() -> None:
+        for _ in range(4):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+    url, _ = await asyncio.gather(get_replicate_image("a red fox"), tick())
+
+    assert url == "url"
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.15
@@ -1,13 +1,19 @@
 import itertools
+from unittest.mock import AsyncMock
 
+import openai
 import pytest
 from langchain.chat_models import AzureChatOpenAI, ChatOpenAI
 
 from reworkd_platform.schemas import ModelSettings, UserBase
+from reworkd_platform.services.http.client import llm_http_client
 from reworkd_platform.settings import Settings
 from reworkd_platform.web.api.agent.model_factory import (
+    LLMClientPool,
+    SharedSessionChatCompletion,
     WrappedAzureChatOpenAI,
     WrappedChatOpenAI,
+    acquire_rate_limit,
     create_model,
     get_base_and_headers,
 )
@@ -136,3 +142,64 @@ def test_custom_model_settings(model_settings: ModelSettings, streaming: bool):
     assert model.model_name.startswith(model_settings.model)
     assert model.max_tokens == model_settings.max_tokens
     assert model.streaming == streaming
+
+
+def test_pool_reuses_constructed_models():
+    pool = LLMClientPool(max_entries=10)
+    settings = Settings(openai_api_key="key")
+
+    first = pool.get(
+        settings, ModelSettings(max_tokens=100), UserBase(id="a", email="a")
+    )
+    first.max_tokens = 10
+    first.model_name = "gpt-3.5-turbo-16k"
+
+    second = pool.get(
+        settings, ModelSettings(max_tokens=200), UserBase(id="b", email="b")
+    )
+
+    assert second.max_tokens == 200
+    assert second.model_name == "gpt-3.5-turbo"
+    assert second.model_kwargs["user"] == "b"
+    assert first.model_kwargs["user"] == "a"
+    assert second.client is SharedSessionChatCompletion
+    assert pool.stats()["hits"] == 1
+
+
+def test_pool_separates_api_keys():
+    pool = LLMClientPool(max_entries=1)
+    user = UserBase(id="user_id")
+    settings = Settings(openai_api_key="key")
+
+    custom = pool.get(settings, ModelSettings(custom_api_key="custom"), user)
+    default = pool.get(settings, ModelSettings(), user)
+
+    assert custom.openai_api_key == "custom"
+    assert default.openai_api_key == "key"
+    assert pool.stats()["misses"] == 2
+    assert pool.stats()["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_completions_use_shared_session(mocker):
+    acreate = mocker.patch("openai.ChatCompletion.acreate", new_callable=AsyncMock)
+
+    await SharedSessionChatCompletion.acreate(model="gpt-3.5-turbo")
+
+    acreate.assert_awaited_once_with(model="gpt-3.5-turbo")
+    assert openai.aiosession.get() is llm_http_client.session
+    await llm_http_client.close()
+
+
+@pytest.mark.asyncio
+async def test_azure_deployments_share_model_rate_limits(mocker):
+    acquire = mocker.patch(
+        "reworkd_platform.web.api.agent.model_factory.openai_rate_limiter.acquire",
+        new_callable=AsyncMock,
+    )
+
+    await acquire_rate_limit({"model": "gpt-35-turbo", "api_key": "key"})
+
+    key, limit, _ = acquire.await_args.args
+    assert key.endswith(":gpt-3.5-turbo")
+    assert limit == "gpt-3.5-turbo"
@@ -0,0 +1,143 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import openai
+import pytest
+
+from reworkd_platform.settings import LLMEndpoint
+from reworkd_platform.web.api.agent.model_router import ModelRouter
+
+PRIMARY = "https://primary/v1"
+SECONDARY = "https://secondary/v1"
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeCreate:
+    """Completions answered or failed per endpoint base and model"""
+
+    def __init__(self) -> None:
+        self.calls: List[Dict[str, Any]] = []
+        self.failing: Dict[str, Exception] = {}
+        self.delays: Dict[str, float] = {}
+
+    async def __call__(self, **params: Any) -> Any:
+        self.calls.append(params)
+        for key in (params["api_base"], f"{params['api_base']}:{params['model']}"):
+            if delay := self.delays.get(key):
+                await asyncio.sleep(delay)
+            if error := self.failing.get(key):
+                raise error
+        return {"api_base": params["api_base"], "model": params["model"]}
+
+
+def create_router(clock: Clock, hedge: bool = False) -> ModelRouter:
+    return ModelRouter(
+        [LLMEndpoint(api_base=SECONDARY, api_key="secondary-key")],
+        {"gpt-4": "gpt-3.5-turbo"},
+        platform_key="platform-key",
+        failure_threshold=2,
+        reset_timeout=30,
+        hedge=hedge,
+        hedge_min_delay=0.01,
+        clock=clock,
+    )
+
+
+def params(model: str = "gpt-3.5-turbo", api_key: str = "platform-key") -> Dict:
+    return {
+        "api_base": PRIMARY,
+        "api_key": api_key,
+        "model": model,
+        "messages": [],
+        "headers": {"Authorization": f"Bearer {api_key}", "User-Email": "a@b.c"},
+    }
+
+
+def bases(create: FakeCreate) -> List[Optional[str]]:
+    return [call["api_base"] for call in create.calls]
+
+
+@pytest.mark.asyncio
+async def test_fails_over_to_next_endpoint() -> None:
+    router, create = create_router(Clock()), FakeCreate()
+    create.failing[PRIMARY] = openai.error.ServiceUnavailableError("down")
+
+    response = await router.acreate(params(), create)
+
+    assert response["api_base"] == SECONDARY
+    assert create.calls[1]["api_key"] == "secondary-key"
+    assert "Authorization" not in create.calls[1]["headers"]
+    assert router.stats()["failovers"] == 1
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_is_skipped_until_reset() -> None:
+    clock, create = Clock(), FakeCreate()
+    router = create_router(clock)
+    create.failing[PRIMARY] = openai.error.APIError("error")
+
+    for _ in range(3):
+        await router.acreate(params(), create)
+    assert bases(create) == [PRIMARY, SECONDARY, PRIMARY, SECONDARY, SECONDARY]
+
+    clock.now = 31
+    del create.failing[PRIMARY]
+    create.calls.clear()
+    await router.acreate(params(), create)
+
+    assert bases(create) == [PRIMARY]  # The probe closed the circuit
+    assert router.stats()["endpoints"][f"{PRIMARY}:gpt-3.5-turbo"]["state"] == (
+        "closed"
+    )
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_configured_model() -> None:
+    router, create = create_router(Clock()), FakeCreate()
+    create.failing[f"{PRIMARY}:gpt-4"] = openai.error.RateLimitError("overloaded")
+    create.failing[f"{SECONDARY}:gpt-4"] = openai.error.RateLimitError("overloaded")
+
+    response = await router.acreate(params("gpt-4"), create)
+
+    assert response == {"api_base": PRIMARY, "model": "gpt-3.5-turbo"}
+    assert router.stats()["fallbacks"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_requests_are_not_retried() -> None:
+    router, create = create_router(Clock()), FakeCreate()
+    create.failing[PRIMARY] = openai.error.InvalidRequestError("too long", None)
+
+    with pytest.raises(openai.error.InvalidRequestError):
+        await router.acreate(params(), create)
+
+    assert bases(create) == [PRIMARY]
+
+
+@pytest.mark.asyncio
+async def test_other_api_keys_are_not_routed() -> None:
+    router, create = create_router(Clock()), FakeCreate()
+    create.failing[PRIMARY] = openai.error.ServiceUnavailableError("down")
+
+    with pytest.raises(openai.error.ServiceUnavailableError):
+        await router.acreate(params(api_key="custom-key"), create)
+
+    assert bases(create) == [PRIMARY]
+
+
+@pytest.mark.asyncio
+async def test_hedges_slow_requests() -> None:
+    router, create = create_router(Clock(), hedge=True), FakeCreate()
+    create.delays[PRIMARY] = 1
+
+    response = await router.acreate(params(), create)
+
+    assert response["api_base"] == SECONDARY
+    assert router.stats()["hedged"] == router.stats()["hedge_wins"] == 1
@@ -0,0 +1,102 @@
+import asyncio
+from typing import Any, List
+
+import pytest
+from langchain.chat_models.base import SimpleChatModel
+
+from reworkd_platform.schemas.agent import ModelSettings
+from reworkd_platform.services.rate_limiter import RateLimitExceeded
+from reworkd_platform.services.tokenizer.token_service import TokenService
+from reworkd_platform.web.api.agent.tools import utils
+from reworkd_platform.web.api.errors import OpenAIError
+
+
+class FakeChatModel(SimpleChatModel):
+    calls: List[int] = []
+    active: int = 0
+    peak: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _call(self, *args: Any, **kwargs: Any) -> str:
+        return "notes"
+
+    async def _agenerate(self, *args: Any, **kwargs: Any) -> Any:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.calls.append(kwargs["max_tokens"])
+
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return await super()._agenerate(*args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_summarize_map_reduce_condenses_in_parallel(mocker: Any) -> None:
+    summarize = mocker.patch.object(utils, "summarize")
+    model = FakeChatModel(calls=[])
+    service = TokenService.create()
+    results = [f"result {i} " * 50 for i in range(8)]
+
+    await utils.summarize_map_reduce(
+        model=model,
+        language="English",
+        goal="goal",
+        results=results,
+        token_service=service,
+        chunk_tokens=150,
+        max_concurrency=2,
+        settings=ModelSettings(),
+    )
+
+    args = summarize.call_args.args
+    assert args[:3] == (model, "English", "goal")
+    assert set(args[3].split("\n\n")) == {"notes"}
+
+    assert len(model.calls) == len(await service.achunk(results, 150)) > 2
+    assert set(model.calls) == {150 // 4}
+    assert model.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_summarize_map_reduce_single_chunk(mocker: Any) -> None:
+    summarize = mocker.patch.object(utils, "summarize")
+    model = FakeChatModel(calls=[])
+
+    await utils.summarize_map_reduce(
+        model=model,
+        language="English",
+        goal="goal",
+        results=["first", "second"],
+        token_service=TokenService.create(),
+        chunk_tokens=150,
+        max_concurrency=2,
+        settings=ModelSettings(),
+    )
+
+    summarize.assert_called_once_with(model, "English", "goal", "first\n\nsecond")
+    assert model.calls == []
+
+
+class FailingChatModel(FakeChatModel):
+    async def _agenerate(self, *args: Any, **kwargs: Any) -> Any:
+        raise RateLimitExceeded("Rate limit of 10 exceeded")
+
+
+@pytest.mark.asyncio
+async def test_summarize_map_reduce_handles_chunk_errors() -> None:
+    with pytest.raises(OpenAIError) as exc_info:
+        await utils.summarize_map_reduce(
+            model=FailingChatModel(calls=[]),
+            language="English",
+            goal="goal",
+            results=[f"result {i} " * 50 for i in range(8)],
+            token_service=TokenService.create(),
+            chunk_tokens=150,
+            max_concurrency=2,
+            settings=ModelSettings(),
+        )
+
+    assert exc_info.value.code == 429
@@ -0,0 +1,51 @@
+from typing import List
+
+import pytest
+from langchain.schema import OutputParserException
+
+from reworkd_platform.web.api.agent.task_output_parser import TaskStreamParser
+
+
+def stream(text: str, chunk_size: int, completed: List[str] = []) -> List[List[str]]:
+    """Tasks returned after each chunk, then by close"""
+    parser = TaskStreamParser(completed_tasks=completed)
+    chunks = [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
+    return [parser.feed(chunk) for chunk in chunks] + [parser.close()]
+
+
+def flatten(batches: List[List[str]]) -> List[str]:
+    return [task for batch in batches for task in batch]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1000])
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('["Task 1", "Task 2"]', ["Task 1", "Task 2"]),
+        ("['Task 1', 'Task \\'2\\'']", ["Task 1", "Task '2'"]),
+        ('  ["Say \\"hi\\", then [go]"]', ['Say "hi", then [go]']),
+        ("1. Task 1\n2. Task 2", ["1. Task 1", "2. Task 2"]),
+        ("Tasks:\n\n1. Task 1\n- note\n2. Task 2\n", ["1. Task 1", "2. Task 2"]),
+        ('["Task 1", "No new tasks required", "Do nothing"]', ["Task 1"]),
+    ],
+)
+def test_stream_parse(text: str, expected: List[str], chunk_size: int) -> None:
+    assert flatten(stream(text, chunk_size)) == expected
+
+
+def test_tasks_are_returned_as_soon_as_complete() -> None:
+    batches = stream('["Task 1", "Task 2"]', chunk_size=10)
+
+    assert batches == [["Task 1"], ["Task 2"], []]
+
+
+def test_completed_tasks_are_skipped() -> None:
+    text = '["Task 1", "Task 2"]'
+
+    assert flatten(stream(text, 5, completed=["Task 1"])) == ["Task 2"]
+
+
+@pytest.mark.parametrize("text", ["", "Sorry, I can't help with that", '["Task'])
+def test_stream_parse_failure(text: str) -> None:
+    with pytest.raises(OutputParserException):
+        stream(text, 5)
@@ -0,0 +1,44 @@
+import pytest
+
+from reworkd_platform.services.tokenizer.token_service import TokenService
+from reworkd_platform.web.api.agent.tools.code import Code
+from reworkd_platform.web.api.agent.tools.image import Image
+from reworkd_platform.web.api.agent.tools.open_ai_function import get_tool_function
+from reworkd_platform.web.api.agent.tools.registry import ToolRegistry
+from reworkd_platform.web.api.agent.tools.search import Search
+
+
+@pytest.fixture
+def registry() -> ToolRegistry:
+    return ToolRegistry.build([Image, Code, Search], Search, TokenService.create())
+
+
+def test_get_tool(registry: ToolRegistry) -> None:
+    assert registry.get_tool("Image") == Image
+    assert registry.get_tool("cOdE") == Code
+    assert registry.get_tool("missing") == Search
+    assert "image" in registry
+    assert "missing" not in registry
+
+
+def test_functions_are_prebuilt(registry: ToolRegistry) -> None:
+    functions = registry.get_functions([Search, Image])
+
+    assert functions == [get_tool_function(Search), get_tool_function(Image)]
+    assert registry.get_functions([Search])[0] is functions[0]
+
+
+def test_function_tokens(registry: ToolRegistry) -> None:
+    service = TokenService.create()
+
+    assert registry.count_function_tokens([Image, Code]) == service.count(
+        str(get_tool_function(Image))
+    ) + service.count(str(get_tool_function(Code)))
+
+
+def test_registry_is_immutable(registry: ToolRegistry) -> None:
+    with pytest.raises(TypeError):
+        registry.tools["other"] = Image  # type: ignore
+
+    with pytest.raises(AttributeError):
+        registry.default_tool = Image  # type: ignore
@@ -0,0 +1,54 @@
+from typing import Any, Optional
+
+import pytest
+
+from reworkd_platform.schemas.user import UserBase
+from reworkd_platform.web.api.agent.tools.resolver import ToolResolver
+from reworkd_platform.web.api.agent.tools.tool import Tool
+
+
+class PublicTool(Tool):
+    async def call(self, *args: Any, **kwargs: Any) -> Any:
+        pass
+
+
+class InstalledTool(PublicTool):
+    oauth_provider = "installed"
+
+
+class MissingTool(PublicTool):
+    oauth_provider = "missing"
+
+
+def installation(access_token_enc: Optional[str]) -> Any:
+    return type("Installation", (), {"access_token_enc": access_token_enc})()
+
+
+@pytest.fixture
+def resolver(mocker: Any) -> ToolResolver:
+    crud = mocker.Mock()
+    crud.get_installations_by_user_id = mocker.AsyncMock(
+        return_value={"installed": installation("token")}
+    )
+    return ToolResolver(UserBase(id="user", name=None, email=None), crud)
+
+
+@pytest.mark.asyncio
+async def test_available_tools_uses_single_query(resolver: ToolResolver) -> None:
+    tools = [PublicTool, InstalledTool, MissingTool, InstalledTool]
+
+    assert await resolver.available_tools(tools) == [
+        PublicTool,
+        InstalledTool,
+        InstalledTool,
+    ]
+    assert (await resolver.get_installation("installed")).access_token_enc == "token"
+
+    query = resolver.oauth_crud.get_installations_by_user_id
+    query.assert_awaited_once_with("user")
+
+
+@pytest.mark.asyncio
+async def test_public_tools_skip_query(resolver: ToolResolver) -> None:
+    assert await resolver.available_tools([PublicTool]) == [PublicTool]
+    resolver.oauth_crud.get_installations_by_user_id.assert_not_awaited()
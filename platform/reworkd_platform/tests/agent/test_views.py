@@ -0,0 +1,51 @@
+from typing import Any, AsyncIterator, List
+from unittest.mock import MagicMock
+
+import pytest
+from langchain.schema.messages import AIMessageChunk
+
+from reworkd_platform.schemas.agent import AgentRun, ModelSettings
+from reworkd_platform.schemas.user import UserBase
+from reworkd_platform.web.api.agent.agent_loop import format_event
+from reworkd_platform.web.api.agent.agent_service.open_ai_agent_service import (
+    OpenAIAgentService,
+)
+from reworkd_platform.web.api.agent.views import start_tasks_stream
+
+
+class FakeStreamingModel:
+    """Streams a canned completion in place of the LLM"""
+
+    model_name = "gpt-3.5-turbo"
+    max_tokens = 500
+
+    def __init__(self, chunks: List[str]) -> None:
+        self.chunks = chunks
+
+    async def astream(self, messages: Any, config: Any = None) -> AsyncIterator[Any]:
+        for chunk in self.chunks:
+            yield AIMessageChunk(content=chunk)
+
+
+@pytest.mark.asyncio
+async def test_start_tasks_stream_with_openai_service() -> None:
+    model_settings = ModelSettings()
+    service = OpenAIAgentService(
+        FakeStreamingModel(['["Task ', '1", "Task 2"]']),  # type: ignore
+        model_settings,
+        MagicMock(),
+        callbacks=None,
+        user=UserBase(id="user", email="user@example.com"),
+        oauth_crud=MagicMock(),
+    )
+    run = AgentRun(goal="goal", model_settings=model_settings, run_id="run")
+
+    response = await start_tasks_stream(req_body=run, agent_service=service)
+    events = [event async for event in response.body_iterator]
+
+    assert events == [
+        format_event("run", run_id="run"),
+        format_event("task", task="Task 1"),
+        format_event("task", task="Task 2"),
+        format_event("done"),
+    ]
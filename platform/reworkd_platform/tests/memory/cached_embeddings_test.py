@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from typing import List
+
+import pytest
+from langchain.embeddings import FakeEmbeddings
+
+from reworkd_platform.web.api.memory.cached_embeddings import CachedEmbeddings
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    embedded: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+
+def test_embeddings_are_cached() -> None:
+    inner = CountingEmbeddings(size=4, embedded=[])
+    embeddings = CachedEmbeddings(inner, OrderedDict(), max_entries=10)
+
+    first = embeddings.embed_documents(["a", "b", "a"])
+    second = embeddings.embed_documents(["b", "c"])
+
+    assert inner.embedded == ["a", "b", "c"]
+    assert first[0] == first[2]
+    assert second[0] == first[1]
+    assert embeddings.embed_query("c") == second[1]
+
+
+def test_cache_is_bounded() -> None:
+    inner = CountingEmbeddings(size=4, embedded=[])
+    cache: OrderedDict = OrderedDict()
+    embeddings = CachedEmbeddings(inner, cache, max_entries=2)
+
+    embeddings.embed_documents(["a", "b"])
+    embeddings.embed_query("a")  # Refreshes "a" so "b" is evicted next
+    embeddings.embed_query("c")
+    embeddings.embed_query("a")
+    embeddings.embed_query("b")
+
+    assert inner.embedded == ["a", "b", "c", "b"]
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_embeddings_share_cache() -> None:
+    inner = CountingEmbeddings(size=4, embedded=[])
+    embeddings = CachedEmbeddings(inner, OrderedDict(), max_entries=10)
+
+    vector = embeddings.embed_query("a")
+    assert await embeddings.aembed_documents(["a", "b"]) == [
+        vector,
+        embeddings.embed_query("b"),
+    ]
+    assert inner.embedded == ["a", "b"]
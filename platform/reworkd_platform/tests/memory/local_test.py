@@ -0,0 +1,161 @@
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+from langchain.embeddings.base import Embeddings
+
+from reworkd_platform.web.api.memory.local import (
+    INITIAL_CAPACITY,
+    LocalMemory,
+    LocalVectorStore,
+)
+
+
+class KeywordEmbeddings(Embeddings):
+    """One dimension per known word so similarity is predictable"""
+
+    words = ["search", "write", "code", "news"]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [float(word in text) for word in self.words]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_query_returns_top_k_by_cosine() -> None:
+    store = LocalVectorStore(idle_ttl=60)
+    store.add(
+        "ns",
+        ["1", "2", "3"],
+        ["a", "b", "c"],
+        [[1, 0, 0], [1, 1, 0], [0, 0, 1]],
+    )
+
+    results = store.query("ns", [1, 0, 0], top_k=2)
+
+    assert [(row_id, text) for row_id, text, _ in results] == [("1", "a"), ("2", "b")]
+    assert results[0][2] == pytest.approx(1)
+    assert results[1][2] == pytest.approx(1 / np.sqrt(2))
+    assert store.query("missing", [1, 0, 0]) == []
+
+
+def test_namespace_grows_by_doubling() -> None:
+    store = LocalVectorStore(idle_ttl=60)
+    vectors = np.random.rand(INITIAL_CAPACITY + 1, 8).tolist()
+    ids = [str(i) for i in range(len(vectors))]
+
+    store.add("ns", ids, ids, vectors)
+
+    namespace = store._namespaces["ns"]
+    assert namespace.capacity == INITIAL_CAPACITY * 2
+    assert namespace.size == len(vectors)
+    assert store.query("ns", vectors[-1], top_k=1)[0][0] == ids[-1]
+
+
+def test_idle_namespaces_are_evicted() -> None:
+    clock = FakeClock()
+    store = LocalVectorStore(idle_ttl=60, clock=clock)
+    store.add("old", ["1"], ["a"], [[1, 0]])
+
+    clock.now = 30
+    store.add("new", ["2"], ["b"], [[0, 1]])
+
+    clock.now = 61
+    store.evict_idle()
+
+    assert list(store._namespaces) == ["new"]
+
+
+def test_snapshots_are_memory_mapped(tmp_path: Path) -> None:
+    clock = FakeClock()
+    store = LocalVectorStore(idle_ttl=60, snapshot_dir=tmp_path, clock=clock)
+    store.add("ns", ["1"], ["a"], [[1, 0]])
+
+    clock.now = 61
+    store.evict_idle()
+    assert len(store) == 0
+
+    assert store.query("ns", [1, 0])[0][:2] == ("1", "a")
+    assert isinstance(store._namespaces["ns"].vectors, np.memmap)
+
+    store.add("ns", ["2"], ["b"], [[0, 1]])
+    assert [row[0] for row in store.query("ns", [0, 1])] == ["2", "1"]
+
+    store.reset("ns")
+    assert store.query("ns", [1, 0]) == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_mapped_snapshots_survive_repeated_snapshots(tmp_path: Path) -> None:
+    clock = FakeClock()
+    store = LocalVectorStore(idle_ttl=60, snapshot_dir=tmp_path, clock=clock)
+    vectors = np.random.rand(1000, 16).tolist()
+    ids = [str(i) for i in range(len(vectors))]
+    store.add("ns", ids, ids, vectors)
+    store.snapshot_all()
+
+    clock.now = 61
+    store.evict_idle()
+
+    # Loaded from the snapshot, memory mapped and unchanged
+    assert store.query("ns", vectors[0], top_k=1)[0][0] == "0"
+    store.snapshot_all()
+    clock.now = 122
+    store.evict_idle()
+    assert store.query("ns", vectors[-1], top_k=1)[0][0] == ids[-1]
+
+    store.add("ns", ["new"], ["new"], [vectors[0]])
+    store.snapshot_all()
+    clock.now = 183
+    store.evict_idle()
+
+    assert store._load("ns").size == len(vectors) + 1
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == [".json", ".npy"]
+
+
+def test_failed_snapshots_keep_the_namespace(mocker, tmp_path: Path) -> None:
+    clock = FakeClock()
+    store = LocalVectorStore(idle_ttl=60, snapshot_dir=tmp_path, clock=clock)
+    store.add("a", ["1"], ["a"], [[1, 0]])
+    store.add("b", ["2"], ["b"], [[0, 1]])
+    save = mocker.patch.object(np, "save", side_effect=OSError("Disk full"))
+
+    store.snapshot_all()
+    clock.now = 61
+    store.evict_idle()
+
+    assert save.call_count == 4
+    assert len(store) == 2
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_local_memory() -> None:
+    store = LocalVectorStore(idle_ttl=60)
+
+    with LocalMemory("agent", store, KeywordEmbeddings()) as memory:
+        ids = await memory.aadd_tasks(["search news", "write code"])
+        similar = await memory.aget_similar_tasks("search the news", 0.9)
+
+        assert [result.id for result in similar] == ids[:1]
+        assert similar[0].metadata == {"text": "search news"}
+        assert memory.get_similar_tasks("write", 0.9) == []
+
+        memory.reset_class()
+        assert await memory.aget_similar_tasks("search news", 0.9) == []
@@ -0,0 +1,44 @@
+from typing import Any
+
+from reworkd_platform.services.pinecone import pinecone
+from reworkd_platform.web.api.memory.local import LocalMemory
+from reworkd_platform.web.api.memory.memory_factory import create_memory
+from reworkd_platform.web.api.memory.memory_with_fallback import MemoryWithFallback
+from reworkd_platform.web.api.memory.null import NullAgentMemory
+
+
+def test_no_configured_memory(mocker: Any) -> None:
+    mocker.patch.object(pinecone.PineconeMemory, "should_use", return_value=False)
+    mocker.patch.object(LocalMemory, "should_use", return_value=False)
+
+    assert isinstance(create_memory("run"), NullAgentMemory)
+
+
+def test_configured_memory_falls_back(mocker: Any) -> None:
+    mocker.patch.object(pinecone.PineconeMemory, "should_use", return_value=True)
+    mocker.patch.object(pinecone, "Index")
+
+    memory = create_memory("run")
+
+    assert isinstance(memory, MemoryWithFallback)
+    assert isinstance(memory.primary, pinecone.PineconeMemory)
+    assert memory.primary.namespace == "run"
+    assert isinstance(memory.secondary, NullAgentMemory)
+
+
+def test_failing_memory_is_skipped(mocker: Any) -> None:
+    mocker.patch.object(pinecone.PineconeMemory, "should_use", return_value=True)
+    mocker.patch.object(pinecone, "Index", side_effect=Exception("Unreachable"))
+
+    assert isinstance(create_memory("run"), NullAgentMemory)
+
+
+def test_local_memory_without_pinecone(mocker: Any) -> None:
+    mocker.patch.object(pinecone.PineconeMemory, "should_use", return_value=False)
+    mocker.patch.object(LocalMemory, "should_use", return_value=True)
+
+    memory = create_memory("run")
+
+    assert isinstance(memory, MemoryWithFallback)
+    assert isinstance(memory.primary, LocalMemory)
+    assert memory.primary.namespace == "run"
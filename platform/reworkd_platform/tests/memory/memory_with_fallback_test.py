@@ -7,7 +7,7 @@ from reworkd_platform.web.api.memory.memory_with_fallback import MemoryWithFallb
     "method_name, args",
     [
         ("add_tasks", (["task1", "task2"],)),
-        ("get_similar_tasks", ("task1",)),
+        ("get_similar_tasks", ("task1", 0.9)),
         ("reset_class", ()),
     ],
 )
@@ -26,7 +26,7 @@ def test_memory_primary(mocker, method_name: str, args) -> None:
     "method_name, args",
     [
         ("add_tasks", (["task1", "task2"],)),
-        ("get_similar_tasks", ("task1",)),
+        ("get_similar_tasks", ("task1", 0.9)),
         ("reset_class", ()),
     ],
 )
@@ -41,3 +41,23 @@ def test_memory_fallback(mocker, method_name: str, args) -> None:
     getattr(memory_with_fallback, method_name)(*args)
     getattr(primary, method_name).assert_called_once_with(*args)
     getattr(secondary, method_name).assert_called_once_with(*args)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "method_name, args",
+    [
+        ("aadd_tasks", (["task1", "task2"],)),
+        ("aget_similar_tasks", ("task1", 0.9)),
+    ],
+)
+async def test_async_memory_fallback(mocker, method_name: str, args) -> None:
+    primary = mocker.AsyncMock()
+    secondary = mocker.AsyncMock()
+    memory_with_fallback = MemoryWithFallback(primary, secondary)
+
+    getattr(primary, method_name).side_effect = Exception("Primary Failed")
+
+    await getattr(memory_with_fallback, method_name)(*args)
+    getattr(primary, method_name).assert_awaited_once_with(*args)
+    getattr(secondary, method_name).assert_awaited_once_with(*args)
@@ -0,0 +1,60 @@
+from typing import Any, List
+from unittest.mock import MagicMock
+
+import pytest
+from langchain.embeddings import FakeEmbeddings
+
+from reworkd_platform.services.pinecone import pinecone
+from reworkd_platform.services.pinecone.pinecone import PineconeMemory
+
+
+class AsyncFakeEmbeddings(FakeEmbeddings):
+    size: int = 4
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+
+@pytest.fixture
+def memory(mocker: Any) -> PineconeMemory:
+    mocker.patch.object(pinecone, "Index")
+    mocker.patch.object(pinecone, "OpenAIEmbeddings", AsyncFakeEmbeddings)
+    mocker.patch.object(pinecone, "_embedding_cache", pinecone.OrderedDict())
+    mocker.patch.object(pinecone, "UPSERT_BATCH_SIZE", 2)
+
+    return PineconeMemory("index").__enter__()
+
+
+@pytest.mark.asyncio
+async def test_aadd_tasks_upserts_in_batches(memory: PineconeMemory) -> None:
+    ids = await memory.aadd_tasks(["a", "b", "c"])
+
+    upserts = memory.index.upsert.call_args_list
+    assert [len(call.kwargs["vectors"]) for call in upserts] == [2, 1]
+    assert [v["id"] for call in upserts for v in call.kwargs["vectors"]] == ids
+    assert all(call.kwargs["namespace"] == "index" for call in upserts)
+
+
+def test_add_tasks_sync_wrapper(memory: PineconeMemory) -> None:
+    assert memory.add_tasks([]) == []
+    assert len(memory.add_tasks(["a", "b", "c"])) == 3
+    assert memory.index.upsert.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_aget_similar_tasks(memory: PineconeMemory) -> None:
+    memory.index.query.return_value = MagicMock(
+        matches=[
+            MagicMock(id="1", score=0.99, metadata={"text": "a"}),
+            MagicMock(id="2", score=0.5, metadata={"text": "b"}),
+        ]
+    )
+
+    results = await memory.aget_similar_tasks("a")
+
+    assert [result.id for result in results] == ["1"]
+    assert memory.index.query.call_args.kwargs["top_k"] == pinecone.TOP_K
+    assert memory.get_similar_tasks("a") == results
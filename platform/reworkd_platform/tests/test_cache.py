@@ -0,0 +1,158 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+import pytest
+
+from reworkd_platform.services.cache.backend import (
+    MemoryCacheBackend,
+    RedisCacheBackend,
+)
+from reworkd_platform.services.cache.cache import Cache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRedis:
+    """Local stand-in for the redis.asyncio client"""
+
+    def __init__(self) -> None:
+        self.store: Dict[str, Any] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self.store.get(key)
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> None:
+        self.store[key] = value
+
+    async def delete(self, key: str) -> None:
+        self.store.pop(key, None)
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_expires_entries() -> None:
+    clock = FakeClock()
+    backend = MemoryCacheBackend(max_entries=10, clock=clock)
+
+    await backend.set("key", "value", ttl=10)
+    assert await backend.get("key") == "value"
+
+    clock.now = 10
+    assert await backend.get("key") is None
+    assert backend.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recently_used() -> None:
+    backend = MemoryCacheBackend(max_entries=2)
+
+    await backend.set("a", 1, ttl=60)
+    await backend.set("b", 2, ttl=60)
+    await backend.get("a")
+    await backend.set("c", 3, ttl=60)
+
+    assert await backend.get("a") == 1
+    assert await backend.get("b") is None
+    assert await backend.get("c") == 3
+    assert backend.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_round_trips_json() -> None:
+    client = FakeRedis()
+    backend = RedisCacheBackend(client)
+
+    await backend.set("key", {"organic": [{"link": "a"}]}, ttl=60)
+
+    assert client.store["key"] == '{"organic": [{"link": "a"}]}'
+    assert await backend.get("key") == {"organic": [{"link": "a"}]}
+
+
+@pytest.mark.asyncio
+async def test_identical_misses_are_coalesced() -> None:
+    cache = Cache(MemoryCacheBackend(max_entries=10), namespace="test", ttl=60)
+    calls = 0
+
+    async def load() -> Dict[str, int]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"calls": calls}
+
+    results = await asyncio.gather(
+        *[cache.get_or_load("query", load) for _ in range(5)]
+    )
+
+    assert calls == 1
+    assert all(result == {"calls": 1} for result in results)
+    assert await cache.get_or_load("query", load) == {"calls": 1}
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 5
+    assert stats["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_loads_are_not_cached() -> None:
+    cache = Cache(MemoryCacheBackend(max_entries=10), namespace="test", ttl=60)
+
+    async def fail() -> None:
+        raise RuntimeError("upstream down")
+
+    async def load() -> str:
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("query", fail)
+
+    assert await cache.get_or_load("query", load) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_followers() -> None:
+    cache = Cache(MemoryCacheBackend(max_entries=10), namespace="test", ttl=60)
+    started = asyncio.Event()
+
+    async def load() -> str:
+        started.set()
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    leader = asyncio.create_task(cache.get_or_load("query", load))
+    await started.wait()
+    follower = asyncio.create_task(cache.get_or_load("query", load))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+
+    assert await follower == "ok"
+    assert leader.cancelled()
+    assert await cache.get("query") == "ok"
+
+
+@pytest.mark.asyncio
+async def test_load_is_cancelled_when_every_caller_is() -> None:
+    cache = Cache(MemoryCacheBackend(max_entries=10), namespace="test", ttl=60)
+    cancelled = asyncio.Event()
+
+    async def load() -> str:
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "ok"
+
+    callers = [asyncio.create_task(cache.get_or_load("query", load)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for caller in callers:
+        caller.cancel()
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert not cache._flight.is_in_flight("query")
@@ -2,6 +2,7 @@ import pytest
 from openai.error import InvalidRequestError, ServiceUnavailableError
 
 from reworkd_platform.schemas.agent import ModelSettings
+from reworkd_platform.services.rate_limiter import RateLimitExceeded
 from reworkd_platform.web.api.agent.helpers import openai_error_handler
 from reworkd_platform.web.api.errors import OpenAIError
 
@@ -19,6 +20,18 @@ async def test_service_unavailable_error():
         await act(mock_service_unavailable_error)
 
 
+@pytest.mark.asyncio
+async def test_rate_limit_exceeded_error():
+    async def mock_rate_limit_exceeded():
+        raise RateLimitExceeded("Rate limit of 10 exceeded")
+
+    with pytest.raises(OpenAIError) as exc_info:
+        await act(mock_rate_limit_exceeded)
+
+    assert exc_info.value.code == 429
+    assert not exc_info.value.should_log
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "settings,should_log",
@@ -0,0 +1,92 @@
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+
+from reworkd_platform.services.http.client import HttpClient
+from reworkd_platform.settings import Settings
+
+
+async def ok(_: web.Request) -> web.Response:
+    return web.json_response({"ok": True})
+
+
+@pytest_asyncio.fixture
+async def server() -> AsyncGenerator[TestServer, None]:
+    app = web.Application()
+    app.router.add_post("/", ok)
+
+    async with TestServer(app) as test_server:
+        yield test_server
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused(server: TestServer) -> None:
+    client = HttpClient(Settings())
+
+    for _ in range(3):
+        async with client.post(str(server.make_url("/"))) as response:
+            assert await response.json() == {"ok": True}
+
+    stats = client.stats()["hosts"][server.host]
+    await client.close()
+
+    assert stats["requests"] == 3
+    assert stats["in_flight"] == 0
+    assert stats["connections_created"] == 1
+    assert stats["connections_reused"] == 2
+
+
+@pytest.mark.asyncio
+async def test_session_is_reopened_after_close() -> None:
+    client = HttpClient(Settings())
+
+    first = client.session
+    await client.close()
+
+    assert first.closed
+    assert client.session is not first
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_limits_come_from_settings() -> None:
+    client = HttpClient(Settings(http_pool_size=7, http_pool_size_per_host=3))
+
+    connector = client.session.connector
+    await client.close()
+
+    assert connector.limit == 7
+    assert connector.limit_per_host == 3
+
+
+def test_session_of_a_previous_loop_is_closed() -> None:
+    client = HttpClient(Settings())
+
+    async def get_session() -> ClientSession:
+        return client.session
+
+    first = asyncio.run(get_session())
+    connector = first.connector
+    second = asyncio.run(get_session())
+
+    assert second is not first
+    assert first.closed
+    assert connector is not None and connector.closed
+    asyncio.run(client.close())
+
+
+@pytest.mark.asyncio
+async def test_pool_limits_can_be_overridden() -> None:
+    settings = Settings(http_pool_size=7, http_pool_size_per_host=3)
+    client = HttpClient(settings, pool_size=50, pool_size_per_host=20)
+
+    connector = client.session.connector
+    await client.close()
+
+    assert connector.limit == 50
+    assert connector.limit_per_host == 20
+    assert client.stats()["pool_size_per_host"] == 20
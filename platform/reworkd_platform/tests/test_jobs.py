@@ -0,0 +1,333 @@
+import asyncio
+from collections import namedtuple
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncGenerator, List
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from reworkd_platform.db.base import Base
+from reworkd_platform.db.models.agent import AgentJob
+from reworkd_platform.schemas.agent import AgentRunLoop
+from reworkd_platform.schemas.user import UserBase
+from reworkd_platform.services.jobs import worker as jobs_worker
+from reworkd_platform.services.jobs.events import MemoryEventChannel
+from reworkd_platform.services.jobs.queue import (
+    DatabaseJobQueue,
+    Job,
+    KafkaJobQueue,
+    MemoryJobQueue,
+)
+from reworkd_platform.services.jobs.worker import JobWorker
+from reworkd_platform.web.api.agent.stream_mock import stream_string
+
+
+def create_job(run_id: str = "run") -> Job:
+    return Job(
+        run=AgentRunLoop(goal="goal", run_id=run_id),
+        user=UserBase(id="user", name="name", email="email"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_memory_queue_retries_until_max_attempts() -> None:
+    queue = MemoryJobQueue(max_attempts=2)
+    await queue.put(create_job())
+
+    job = await queue.get()
+    assert await queue.fail(job)
+
+    job = await queue.get()
+    assert job.attempts == 2
+    assert not await queue.fail(job)
+    assert queue.stats()["queued"] == 0
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = datetime(2023, 1, 1)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path: Path) -> AsyncGenerator[async_sessionmaker, None]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[AgentJob.__table__])
+
+    yield async_sessionmaker(engine)
+    await engine.dispose()
+
+
+async def create_database_queue(
+    session_factory: async_sessionmaker, clock: Clock
+) -> DatabaseJobQueue:
+    queue = DatabaseJobQueue(
+        max_attempts=2,
+        visibility_timeout=timedelta(minutes=5),
+        poll_interval=0.01,
+        clock=clock,
+    )
+    await queue.start(session_factory)
+    return queue
+
+
+async def get_status(session_factory: async_sessionmaker, run_id: str) -> str:
+    async with session_factory() as session:
+        return await session.scalar(
+            select(AgentJob.status).where(AgentJob.id == run_id)
+        )
+
+
+@pytest.mark.asyncio
+async def test_database_job_is_claimed_once(
+    session_factory: async_sessionmaker,
+) -> None:
+    queue = await create_database_queue(session_factory, Clock())
+    await queue.put(create_job())
+
+    job = await queue.get()
+    assert job.run.goal == "goal"
+    assert job.attempts == 1
+    assert await queue._claim() is None
+
+    await queue.complete(job)
+    assert await get_status(session_factory, "run") == "done"
+
+
+@pytest.mark.asyncio
+async def test_database_job_of_dead_worker_is_retried(
+    session_factory: async_sessionmaker,
+) -> None:
+    clock = Clock()
+    queue = await create_database_queue(session_factory, clock)
+    await queue.put(create_job())
+    await queue.get()
+
+    clock.now += timedelta(minutes=6)
+    job = await queue.get()
+    assert job.attempts == 2
+
+    # The second worker dies as well
+    clock.now += timedelta(minutes=6)
+    assert await queue._claim() is None
+    assert await get_status(session_factory, "run") == "failed"
+
+
+@pytest.mark.asyncio
+async def test_database_job_claim_is_extended(
+    session_factory: async_sessionmaker,
+) -> None:
+    clock = Clock()
+    queue = await create_database_queue(session_factory, clock)
+    await queue.put(create_job())
+    job = await queue.get()
+
+    clock.now += timedelta(minutes=4)
+    await queue.extend(job)
+    clock.now += timedelta(minutes=4)
+
+    assert await queue._claim() is None
+
+
+TopicPartition = namedtuple("TopicPartition", ["topic", "partition"])
+
+
+class FakeConsumer:
+    def __init__(self, offsets: List[int]) -> None:
+        self.partition = TopicPartition(topic="jobs", partition=0)
+        self.messages = [
+            SimpleNamespace(
+                topic="jobs",
+                partition=0,
+                offset=offset,
+                value=create_job(f"run-{offset}").json().encode(),
+            )
+            for offset in offsets
+        ]
+        self.start = AsyncMock()
+        self.commit = AsyncMock()
+
+    async def getone(self) -> Any:
+        return self.messages.pop(0)
+
+    def assignment(self) -> List[Any]:
+        return [self.partition]
+
+
+@pytest.mark.asyncio
+async def test_kafka_offsets_are_committed_up_to_oldest_running_job() -> None:
+    consumer = FakeConsumer([0, 1, 2])
+    queue = KafkaJobQueue(lambda: (AsyncMock(), consumer), topic="jobs", max_attempts=1)
+    await queue.start(AsyncMock())
+
+    first, second, third = [await queue.get() for _ in range(3)]
+
+    await queue.complete(second)
+    consumer.commit.assert_awaited_with({consumer.partition: 0})
+
+    await queue.complete(first)
+    consumer.commit.assert_awaited_with({consumer.partition: 2})
+
+    await queue.complete(third)
+    consumer.commit.assert_awaited_with({consumer.partition: 3})
+
+
+@pytest.mark.asyncio
+async def test_events_are_replayed_to_late_subscribers() -> None:
+    channel = MemoryEventChannel(ttl=60, idle_timeout=1)
+
+    async def collect() -> List[str]:
+        return [event async for event in channel.subscribe("run")]
+
+    early = asyncio.create_task(collect())
+    await channel.publish("run", "first")
+    await asyncio.sleep(0)
+    await channel.publish("run", "second")
+    await channel.close("run")
+
+    assert await early == ["first", "second"]
+    assert await collect() == ["first", "second"]
+
+
+@pytest.mark.asyncio
+async def test_events_are_capped_per_run() -> None:
+    channel = MemoryEventChannel(ttl=60, idle_timeout=1, max_events=2)
+
+    async def collect() -> List[str]:
+        return [event async for event in channel.subscribe("run")]
+
+    behind = asyncio.create_task(collect())
+    await asyncio.sleep(0)
+    for event in ["first", "second", "third"]:
+        await channel.publish("run", event)
+    await channel.close("run")
+
+    # A subscriber that fell behind skips the events that were dropped
+    assert await behind == ["second", "third"]
+    assert await collect() == ["second", "third"]
+
+
+@pytest.mark.asyncio
+async def test_finished_runs_expire_on_publish() -> None:
+    clock = SimpleNamespace(now=0.0)
+    channel = MemoryEventChannel(ttl=60, idle_timeout=1, clock=lambda: clock.now)
+    await channel.publish("old", "first")
+    await channel.close("old")
+
+    clock.now = 61
+    await channel.publish("new", "first")
+
+    assert list(channel._runs) == ["new"]
+
+
+@pytest.mark.asyncio
+async def test_subscriber_stops_when_idle() -> None:
+    channel = MemoryEventChannel(ttl=60, idle_timeout=0.01)
+    await channel.publish("run", "first")
+
+    assert [event async for event in channel.subscribe("run")] == ["first"]
+
+
+class FakeAgentService:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+
+    async def start_goal_agent(self, *, goal: str) -> List[str]:
+        if self.fail:
+            raise ValueError()
+        return []
+
+    async def summarize_task_agent(self, **kwargs: Any) -> Any:
+        return stream_string("")
+
+
+def create_worker(
+    mocker, queue: MemoryJobQueue, channel: MemoryEventChannel, fail: bool = False
+) -> JobWorker:
+    crud = MagicMock()
+    crud.create_task = AsyncMock()
+    crud.reset_step_counts = AsyncMock()
+    crud.session.commit = AsyncMock()
+    mocker.patch("reworkd_platform.services.jobs.worker.AgentCRUD", return_value=crud)
+
+    session = AsyncMock()
+    session.__aenter__.return_value = session
+
+    worker = JobWorker(queue, channel, concurrency=1, heartbeat_interval=60)
+    worker.start(lambda: session, lambda job, session: FakeAgentService(fail))
+    return worker
+
+
+async def collect_events(channel: MemoryEventChannel) -> List[str]:
+    return [
+        event.split("\n")[0][len("event: ") :]
+        async for event in channel.subscribe("run")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_worker_publishes_events_of_run(mocker) -> None:
+    queue = MemoryJobQueue(max_attempts=1)
+    channel = MemoryEventChannel(ttl=60, idle_timeout=1)
+    worker = create_worker(mocker, queue, channel)
+
+    await queue.put(create_job())
+
+    assert await collect_events(channel) == ["run", "tasks", "done"]
+    await worker.close()
+    assert worker.stats()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_closes_events_of_failed_run(mocker) -> None:
+    queue = MemoryJobQueue(max_attempts=1)
+    channel = MemoryEventChannel(ttl=60, idle_timeout=1)
+    worker = create_worker(mocker, queue, channel)
+    mocker.patch.object(channel, "publish", side_effect=[ConnectionError(), None, None])
+
+    await queue.put(create_job())
+    for _ in range(100):
+        if worker.stats()["failed"]:
+            break
+        await asyncio.sleep(0.01)
+
+    await worker.close()
+    assert channel.publish.await_count == 3
+    assert channel._runs["run"].closed
+
+
+@pytest.mark.asyncio
+async def test_worker_retries_run_from_its_start(mocker) -> None:
+    queue = MemoryJobQueue(max_attempts=2)
+    channel = MemoryEventChannel(ttl=60, idle_timeout=1)
+    worker = create_worker(mocker, queue, channel)
+    publish = channel.publish
+    calls = 0
+
+    async def fail_second_event(run_id: str, event: str) -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise ConnectionError()
+        await publish(run_id, event)
+
+    mocker.patch.object(channel, "publish", side_effect=fail_second_event)
+
+    await queue.put(create_job())
+    for _ in range(100):
+        if worker.stats()["completed"]:
+            break
+        await asyncio.sleep(0.01)
+
+    await worker.close()
+    assert await collect_events(channel) == ["run", "tasks", "done"]
+    crud = jobs_worker.AgentCRUD.return_value
+    crud.reset_step_counts.assert_awaited_once_with("run")
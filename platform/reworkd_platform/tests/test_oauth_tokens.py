@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Tuple
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from reworkd_platform.services.oauth_tokens import OAuthTokenManager
+from reworkd_platform.services.security import encryption_service
+
+NOW = datetime(2023, 1, 1)
+
+
+def create_manager() -> OAuthTokenManager:
+    return OAuthTokenManager(
+        refresh_margin=timedelta(minutes=5),
+        proactive_margin=timedelta(minutes=15),
+        clock=lambda: NOW,
+    )
+
+
+def create_installation(expires_in: timedelta) -> MagicMock:
+    return MagicMock(
+        id="installation",
+        user_id="user",
+        provider="sid",
+        access_token_enc=encryption_service.encrypt("access"),
+        access_token_expiration=NOW + expires_in,
+        refresh_token_enc=encryption_service.encrypt("refresh"),
+    )
+
+
+def create_refresher(delay: float = 0) -> AsyncMock:
+    async def refresh(refresh_token: str) -> Tuple[str, int]:
+        assert refresh_token == "refresh"
+        await asyncio.sleep(delay)
+        return "refreshed", 3600
+
+    return AsyncMock(side_effect=refresh)
+
+
+@pytest.mark.asyncio
+async def test_valid_token_is_decrypted_once(mocker) -> None:
+    manager = create_manager()
+    installation = create_installation(timedelta(hours=1))
+    decrypt = mocker.spy(encryption_service, "decrypt")
+    refresh = create_refresher()
+
+    for _ in range(3):
+        token = await manager.get_access_token(installation, AsyncMock(), refresh)
+        assert token == "access"
+
+    assert decrypt.call_count == 1
+    refresh.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_no_refresh_token() -> None:
+    installation = create_installation(timedelta(hours=1))
+    installation.refresh_token_enc = None
+
+    token = await create_manager().get_access_token(
+        installation, AsyncMock(), create_refresher()
+    )
+
+    assert token is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_are_coalesced() -> None:
+    manager = create_manager()
+    installation = create_installation(timedelta(minutes=1))
+    session = AsyncMock()
+    refresh = create_refresher(delay=0.01)
+
+    tokens = await asyncio.gather(
+        *[manager.get_access_token(installation, session, refresh) for _ in range(5)]
+    )
+
+    assert tokens == ["refreshed"] * 5
+    assert refresh.await_count == 1
+    assert session.execute.await_count == 1  # Persisted once
+
+    # Served from memory until it nears expiry again
+    assert await manager.get_access_token(installation, session, refresh) == "refreshed"
+    assert refresh.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_proactive_refresh_runs_in_background() -> None:
+    manager = create_manager()
+    own_session = AsyncMock()
+    own_session.__aenter__.return_value = own_session
+    manager.start(lambda: own_session)
+
+    installation = create_installation(timedelta(minutes=10))
+    refresh = create_refresher()
+
+    token = await manager.get_access_token(installation, AsyncMock(), refresh)
+    assert token == "access"
+
+    await asyncio.sleep(0.01)
+    refresh.assert_awaited_once()
+    own_session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_newer_installation_replaces_cached_token() -> None:
+    manager = create_manager()
+    refresh = create_refresher()
+
+    old = create_installation(timedelta(hours=1))
+    await manager.get_access_token(old, AsyncMock(), refresh)
+
+    new = create_installation(timedelta(hours=2))
+    new.access_token_enc = encryption_service.encrypt("reinstalled")
+
+    assert await manager.get_access_token(new, AsyncMock(), refresh) == "reinstalled"
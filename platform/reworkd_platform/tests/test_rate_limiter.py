@@ -0,0 +1,92 @@
+from typing import List
+
+import pytest
+
+from reworkd_platform.services.rate_limiter import (
+    MemoryRateLimitStore,
+    RateLimiter,
+    RateLimitExceeded,
+)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(mocker) -> Clock:
+    clock = Clock()
+    mocker.patch("reworkd_platform.services.rate_limiter.asyncio.sleep", clock.sleep)
+    return clock
+
+
+def create_limiter(clock: Clock, max_wait: float = 60) -> RateLimiter:
+    return RateLimiter(
+        MemoryRateLimitStore(clock),
+        {"model": (60, 600)},  # One request and ten tokens per second
+        max_wait=max_wait,
+    )
+
+
+@pytest.mark.asyncio
+async def test_requests_within_limits_do_not_wait(clock: Clock) -> None:
+    limiter = create_limiter(clock)
+
+    for _ in range(60):
+        await limiter.acquire("key", "model", 10)
+
+    assert clock.sleeps == []
+    assert limiter.stats()["acquired"] == 60
+
+
+@pytest.mark.asyncio
+async def test_waits_for_requests_per_minute(clock: Clock) -> None:
+    limiter = create_limiter(clock)
+    for _ in range(60):
+        await limiter.acquire("key", "model", 1)
+
+    await limiter.acquire("key", "model", 1)
+
+    assert clock.sleeps == [pytest.approx(1)]
+    assert limiter.stats()["delayed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_waits_for_tokens_per_minute(clock: Clock) -> None:
+    limiter = create_limiter(clock)
+    await limiter.acquire("key", "model", 600)
+
+    await limiter.acquire("key", "model", 50)
+
+    assert sum(clock.sleeps) == pytest.approx(5)
+
+
+@pytest.mark.asyncio
+async def test_keys_are_limited_separately(clock: Clock) -> None:
+    limiter = create_limiter(clock)
+    await limiter.acquire("key", "model", 600)
+
+    await limiter.acquire("other", "model", 600)
+    await limiter.acquire("key", "unlimited", 10_000)
+
+    assert clock.sleeps == []
+
+
+@pytest.mark.asyncio
+async def test_rejects_after_max_wait(clock: Clock) -> None:
+    limiter = create_limiter(clock, max_wait=1)
+    await limiter.acquire("key", "model", 600)
+
+    with pytest.raises(RateLimitExceeded):
+        await limiter.acquire("key", "model", 600)
+
+    assert limiter.stats()["rejected"] == 1
@@ -1,5 +1,136 @@
-from typing import Dict, Any
-from unittest.mock import Mock, patch
+import io
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
 
 from reworkd_platform.services.aws.s3 import SimpleStorageService
 
+
+class LocalS3Client:
+    """In-memory stand-in for the boto3 S3 client calls the service makes"""
+
+    page_size = 1000
+    chunk_size = 4
+
+    def __init__(self) -> None:
+        self.objects: Dict[str, bytes] = {}
+        self.uploaded_chunks: List[int] = []
+        self.deletes: List[int] = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get_paginator(self, operation: str) -> "LocalS3Client":
+        assert operation == "list_objects_v2"
+        return self
+
+    def paginate(self, Bucket: str, Prefix: str) -> Iterator[Dict[str, Any]]:
+        keys = sorted(k for k in self.objects if k.startswith(Prefix))
+        for i in range(0, len(keys), self.page_size):
+            page = keys[i : i + self.page_size]
+            yield {"Contents": [{"Key": key} for key in page]}
+
+    def upload_fileobj(
+        self, Fileobj: Any, Bucket: str, Key: str, ExtraArgs: Any, Config: Any
+    ) -> None:
+        chunks = iter(lambda: Fileobj.read(self.chunk_size), b"")
+        body = list(chunks)
+        self.uploaded_chunks.append(len(body))
+        self.objects[Key] = b"".join(body)
+
+    def download_file(
+        self, Bucket: str, Key: str, Filename: str, Config: Optional[Any] = None
+    ) -> None:
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.01)
+        Path(Filename).write_bytes(self.objects[Key])
+        with self._lock:
+            self.active -= 1
+
+    def delete_objects(self, Bucket: str, Delete: Dict[str, Any]) -> Dict[str, Any]:
+        assert len(Delete["Objects"]) <= 1000
+        self.deletes.append(len(Delete["Objects"]))
+        for obj in Delete["Objects"]:
+            del self.objects[obj["Key"]]
+        return {}
+
+
+@pytest.fixture
+def client() -> LocalS3Client:
+    return LocalS3Client()
+
+
+@pytest.fixture
+def s3(client: LocalS3Client) -> SimpleStorageService:
+    return SimpleStorageService("bucket", client=client, max_concurrency=3)
+
+
+def test_bucket_is_required() -> None:
+    with pytest.raises(ValueError):
+        SimpleStorageService(None)
+
+
+@pytest.mark.asyncio
+async def test_list_keys_follows_pagination(
+    s3: SimpleStorageService, client: LocalS3Client
+) -> None:
+    client.objects = {f"folder/{i:04}": b"" for i in range(2500)}
+    client.objects["other/file"] = b""
+
+    keys = await s3.alist_keys("folder/")
+
+    assert len(keys) == 2500
+
+
+@pytest.mark.asyncio
+async def test_upload_streams_file_in_chunks(
+    s3: SimpleStorageService, client: LocalS3Client
+) -> None:
+    await s3.aupload_file("file", io.BytesIO(b"0123456789"))
+
+    assert client.objects["file"] == b"0123456789"
+    assert client.uploaded_chunks == [3]
+
+
+@pytest.mark.asyncio
+async def test_download_folder_is_parallel_and_bounded(
+    s3: SimpleStorageService, client: LocalS3Client, tmp_path: Path
+) -> None:
+    client.objects = {f"folder/{i}.txt": str(i).encode() for i in range(10)}
+
+    files = await s3.adownload_folder("folder/", str(tmp_path))
+
+    assert [Path(f).read_text() for f in files] == [str(i) for i in range(10)]
+    assert 1 < client.max_active <= 3
+
+
+@pytest.mark.asyncio
+async def test_upload_folder(
+    s3: SimpleStorageService, client: LocalS3Client, tmp_path: Path
+) -> None:
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "a.txt").write_bytes(b"a")
+    (tmp_path / "nested" / "b.txt").write_bytes(b"b")
+
+    keys = await s3.aupload_folder(str(tmp_path), "folder/")
+
+    assert sorted(keys) == ["folder/a.txt", "folder/nested/b.txt"]
+    assert client.objects == {"folder/a.txt": b"a", "folder/nested/b.txt": b"b"}
+
+
+@pytest.mark.asyncio
+async def test_delete_folder_in_batches(
+    s3: SimpleStorageService, client: LocalS3Client
+) -> None:
+    client.objects = {f"folder/{i:04}": b"" for i in range(2500)}
+    client.objects["other/file"] = b""
+
+    await s3.adelete_folder("folder/")
+
+    assert client.objects == {"other/file": b""}
+    assert client.deletes == [1000, 1000, 500]
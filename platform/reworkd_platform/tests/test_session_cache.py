@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+from typing import Any, Optional
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm.exc import NoResultFound
+
+from reworkd_platform.services.cache.backend import MemoryCacheBackend
+from reworkd_platform.services.cache.cache import Cache
+from reworkd_platform.web.api.session_cache import SessionCache
+
+NOW = datetime(2023, 1, 1)
+
+
+def create_cache(ttl: float = 60) -> SessionCache:
+    return SessionCache(
+        Cache(MemoryCacheBackend(max_entries=10), namespace="session", ttl=ttl),
+        negative_ttl=10,
+        clock=lambda: NOW,
+    )
+
+
+def create_crud(
+    expires: datetime = NOW + timedelta(days=1),
+    organization: Optional[Any] = None,
+) -> MagicMock:
+    user = MagicMock(id="user", email="user@test.com", image=None)
+    user.name = "User"
+
+    crud = MagicMock()
+    crud.get_user_session = AsyncMock(
+        return_value=MagicMock(user=user, expires=expires)
+    )
+    crud.get_user_organization = AsyncMock(return_value=organization)
+    return crud
+
+
+@pytest.mark.asyncio
+async def test_session_is_loaded_once() -> None:
+    cache = create_cache()
+    crud = create_crud()
+
+    first = await cache.get_user("token", None, crud)
+    second = await cache.get_user("token", None, crud)
+
+    assert first == second
+    assert first.id == "user"
+    assert first.organization is None
+    assert crud.get_user_session.await_count == 1
+    crud.get_user_organization.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_organization_is_cached_per_user() -> None:
+    cache = create_cache()
+    organization = MagicMock(id="id", role="member", organization_id="org")
+    crud = create_crud(organization=organization)
+
+    for _ in range(2):
+        user = await cache.get_user("token", "org", crud)
+        assert user.organization_id == "org"
+        assert user.organization.role == "member"
+
+    crud.get_user_organization.assert_awaited_once_with("user", "org")
+
+
+@pytest.mark.asyncio
+async def test_invalid_tokens_are_negatively_cached() -> None:
+    cache = create_cache()
+    crud = create_crud()
+    crud.get_user_session.side_effect = NoResultFound()
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as e:
+            await cache.get_user("bad", None, crud)
+        assert e.value.detail == "Invalid session token"
+
+    assert crud.get_user_session.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_session_is_rejected() -> None:
+    cache = create_cache()
+    crud = create_crud(expires=NOW - timedelta(seconds=1))
+
+    with pytest.raises(HTTPException) as e:
+        await cache.get_user("token", None, crud)
+
+    assert e.value.detail == "Session token expired"
+
+
+@pytest.mark.asyncio
+async def test_cached_session_does_not_outlive_expiry() -> None:
+    now = NOW
+    cache = SessionCache(
+        Cache(MemoryCacheBackend(max_entries=10), namespace="session", ttl=60),
+        negative_ttl=10,
+        clock=lambda: now,
+    )
+    crud = create_crud(expires=NOW + timedelta(seconds=5))
+
+    await cache.get_user("token", None, crud)
+    now = NOW + timedelta(seconds=5)
+
+    with pytest.raises(HTTPException) as e:
+        await cache.get_user("token", None, crud)
+
+    assert e.value.detail == "Session token expired"
+
+
+@pytest.mark.asyncio
+async def test_invalidate_forces_reload() -> None:
+    cache = create_cache()
+    crud = create_crud()
+
+    await cache.get_user("token", None, crud)
+    await cache.invalidate("token")
+    await cache.get_user("token", None, crud)
+
+    assert crud.get_user_session.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_revoke_is_shared_through_the_backend() -> None:
+    backend = MemoryCacheBackend(max_entries=10)
+    workers = [
+        SessionCache(
+            Cache(backend, namespace="session", ttl=60),
+            negative_ttl=10,
+            clock=lambda: NOW,
+        )
+        for _ in range(2)
+    ]
+    crud = create_crud()
+
+    await workers[1].get_user("token", None, crud)
+    await workers[0].revoke("token")
+
+    # Rejected without a reload, even though the session row still exists
+    with pytest.raises(HTTPException) as e:
+        await workers[1].get_user("token", None, crud)
+
+    assert e.value.detail == "Invalid session token"
+    assert crud.get_user_session.await_count == 1
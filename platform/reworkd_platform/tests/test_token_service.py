@@ -1,6 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock
 
+import pytest
 import tiktoken
+from langchain import PromptTemplate
 
 from reworkd_platform.schemas.agent import LLM_MODEL_MAX_TOKENS
 from reworkd_platform.services.tokenizer.token_service import TokenService
@@ -12,6 +15,11 @@ def create_token_service(encoding: EncodingType) -> TokenService:
     return TokenService(encoding)
 
 
+@pytest.fixture
+def service() -> TokenService:
+    return TokenService.create()
+
+
 def test_happy_path(service: TokenService) -> None:
     text = "Hello world!"
     validate_tokenize_and_detokenize(service, text, 2)
@@ -66,6 +74,40 @@ def test_calculate_max_tokens_with_negative_result(service: TokenService) -> Non
     assert model.max_tokens == 1
 
 
+def test_count_many(service: TokenService) -> None:
+    texts = ["Hello world!", "", LONG_TEXT, "Hello world!", LONG_TEXT]
+
+    assert service.count_many(texts) == [service.count(text) for text in texts]
+    assert service.count_many([]) == []
+
+
+def test_count_prompt_matches_formatted_prompt(service: TokenService) -> None:
+    prompt = PromptTemplate(
+        template='Answer in "{language}". Objective: "{goal}". Again, "{language}".',
+        input_variables=["goal", "language"],
+    )
+    args = {"goal": "Create a business plan for a bagel company", "language": "French"}
+
+    expected = service.count(prompt.format(**args))
+    counted = service.count_prompt(prompt, **args)
+
+    # Variables are tokenized separately, which can only over-count slightly
+    assert expected <= counted <= expected + 2
+
+
+def test_count_prompt_caches_static_text(service: TokenService, mocker) -> None:
+    prompt = PromptTemplate(
+        template="Some static text in {language} for {goal}",
+        input_variables=["goal", "language"],
+    )
+    service.count_prompt(prompt, goal="first", language="English")
+
+    encode = mocker.spy(service.encoding, "encode")
+    service.count_prompt(prompt, goal="second", language="English")
+
+    encode.assert_called_once_with("second")
+
+
 LONG_TEXT = """
 This is some long text. This is some long text. This is some long text.
 This is some long text. This is some long text. This is some long text.
@@ -101,6 +143,48 @@ This is some long text. This is some long text. This is some long text.
 """
 
 
+@pytest.mark.asyncio
+async def test_async_variants_offload_large_inputs(service: TokenService) -> None:
+    executor = Mock(wraps=ThreadPoolExecutor(max_workers=1))
+    service = TokenService(service.encoding, executor=executor, offload_min_length=100)
+
+    small = "Hello world!"
+    assert await service.atokenize(small) == service.tokenize(small)
+    assert await service.acount(small) == service.count(small)
+    executor.submit.assert_not_called()
+
+    large = "Hello world! " * 100
+    tokens = await service.atokenize(large)
+    assert tokens == service.tokenize(large)
+    assert await service.adetokenize(tokens) == large
+    assert await service.acount_many([large, small]) == service.count_many(
+        [large, small]
+    )
+    assert executor.submit.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_async_variants_without_executor(service: TokenService) -> None:
+    large = "Hello world! " * 10_000
+    assert await service.acount(large) == service.count(large)
+
+
+@pytest.mark.asyncio
+async def test_achunk(service: TokenService) -> None:
+    small = ["one two", "three four", "five six"]
+    assert await service.achunk(small, 100) == ["one two\n\nthree four\n\nfive six"]
+
+    chunks = await service.achunk(small, service.count("one two\n\nthree four"))
+    assert chunks == ["one two\n\nthree four", "five six"]
+
+    large = "word " * 50
+    chunks = await service.achunk(["start", large, "end"], 20)
+    assert chunks[0] == "start"
+    assert chunks[-1] == "end"
+    assert "".join(chunks[1:-1]) == large
+    assert all(service.count(chunk) <= 20 for chunk in chunks)
+
+
 if __name__ == "__main__":
     encoding = tiktoken.get_encoding("cl100k_base")
     service = create_token_service(encoding)
@@ -0,0 +1,147 @@
+import asyncio
+from pathlib import Path
+from typing import Any, AsyncGenerator
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from reworkd_platform.db.base import Base
+from reworkd_platform.db.models.agent import AgentTask
+from reworkd_platform.db.write_behind import WriteBehindQueue
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path: Path) -> AsyncGenerator[async_sessionmaker, None]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[AgentTask.__table__])
+
+    yield async_sessionmaker(engine)
+    await engine.dispose()
+
+
+async def count_tasks(session_factory: async_sessionmaker) -> int:
+    async with session_factory() as session:
+        query = select(func.count(AgentTask.id))
+        return (await session.execute(query)).scalar_one()
+
+
+def create_queue(**kwargs: Any) -> WriteBehindQueue:
+    return WriteBehindQueue(
+        AgentTask,
+        **{"max_size": 100, "batch_size": 10, "flush_interval": 60, **kwargs},
+    )
+
+
+def row(i: int) -> dict:
+    return {"id": f"task-{i}", "run_id": "run", "type": "execute"}
+
+
+@pytest.mark.asyncio
+async def test_rejects_rows_when_not_running() -> None:
+    queue = create_queue()
+
+    assert not queue.put(row(0))
+    assert queue.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rejects_rows_when_full(session_factory: async_sessionmaker) -> None:
+    queue = create_queue(max_size=2, batch_size=5)
+    queue.start(session_factory)
+
+    assert [queue.put(row(i)) for i in range(3)] == [True, True, False]
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_written(session_factory: async_sessionmaker) -> None:
+    queue = create_queue(batch_size=5)
+    queue.start(session_factory)
+
+    for i in range(5):
+        queue.put(row(i))
+
+    for _ in range(100):
+        if queue.stats()["written"] == 5:
+            break
+        await asyncio.sleep(0.01)
+
+    assert await count_tasks(session_factory) == 5
+    assert queue.stats()["batches"] == 1
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_buffer(session_factory: async_sessionmaker) -> None:
+    queue = create_queue(batch_size=10)
+    queue.start(session_factory)
+
+    for i in range(25):
+        queue.put(row(i))
+
+    await queue.close()
+
+    assert await count_tasks(session_factory) == 25
+    assert queue.stats()["buffered"] == 0
+    assert not queue.running
+
+
+@pytest.mark.asyncio
+async def test_only_invalid_rows_are_dropped(
+    session_factory: async_sessionmaker,
+) -> None:
+    queue = create_queue()
+    queue.start(session_factory)
+
+    queue.put(row(0))
+    queue.put(row(0))  # Duplicate primary key fails the whole batch
+    queue.put(row(1))
+    await queue.close()
+
+    assert await count_tasks(session_factory) == 2
+    assert queue.stats()["written"] == 2
+    assert queue.stats()["failed"] == 1
+    assert queue.stats()["retries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried(session_factory: async_sessionmaker) -> None:
+    calls = 0
+
+    def flaky_session_factory() -> AsyncSession:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise OperationalError("INSERT", {}, Exception("Connection lost"))
+        return session_factory()
+
+    queue = create_queue(retry_delay=0)
+    queue.start(flaky_session_factory)
+
+    queue.put(row(0))
+    queue.put(row(1))
+    await queue.close()
+
+    assert await count_tasks(session_factory) == 2
+    assert queue.stats()["retries"] == 1
+    assert queue.stats()["batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_is_dropped_while_database_is_down() -> None:
+    def session_factory() -> AsyncSession:
+        raise OperationalError("INSERT", {}, Exception("Connection refused"))
+
+    queue = create_queue(retry_delay=0)
+    queue.start(session_factory)
+
+    queue.put(row(0))
+    queue.put(row(1))
+    await queue.close()
+
+    assert queue.stats()["retries"] == 2
+    assert queue.stats()["failed"] == 2
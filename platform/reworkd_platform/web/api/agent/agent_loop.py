@@ -0,0 +1,340 @@
+import asyncio
+import codecs
+import itertools
+import json
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from loguru import logger
+from starlette.responses import Response
+from starlette.types import Message
+
+from reworkd_platform.db.crud.agent import AgentCRUD
+from reworkd_platform.schemas.agent import AgentRunLoop, Loop_Step
+from reworkd_platform.settings import settings
+from reworkd_platform.web.api.agent.agent_service.agent_service import AgentService
+from reworkd_platform.web.api.agent.analysis import Analysis
+from reworkd_platform.web.api.errors import MaxLoopsError, PlatformaticError
+
+
+def format_event(event: str, **data: Any) -> str:
+    """Format a server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def iterate_response(response: Response) -> AsyncIterator[str]:
+    """
+    Yield the body of a streaming response as text while it is being produced.
+
+    The response is driven as an ASGI app, so responses built from chains, which
+    write tokens straight to the ASGI `send` callable, can be consumed as well.
+    """
+    chunks: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+    finished = asyncio.Event()
+
+    async def receive() -> Message:
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        if message["type"] != "http.response.body":
+            return
+
+        if body := message.get("body", b""):
+            await chunks.put(body)
+        if not message.get("more_body", False):
+            finished.set()
+
+    async def run() -> None:
+        try:
+            await response({"type": "http"}, receive, send)
+        finally:
+            finished.set()
+            await chunks.put(None)
+
+    task = asyncio.create_task(run())
+    decoder = codecs.getincrementaldecoder("utf-8")()
+
+    try:
+        while (chunk := await chunks.get()) is not None:
+            if text := decoder.decode(chunk):
+                yield text
+
+        await task
+    finally:
+        task.cancel()
+
+
+class SpeculativeAnalyzer:
+    """
+    Analyzes queued tasks of a run while the current task executes.
+
+    An analysis only depends on the goal and the task, not on earlier results,
+    so it can be requested before the previous task has finished. At most
+    `max_concurrency` queued tasks are analyzed ahead, so a run never holds more
+    than that many extra model calls. Analyses of tasks that leave the queue are
+    cancelled, and a failed speculation is retried when the task is reached.
+    """
+
+    def __init__(
+        self, analyze: Callable[[str], Awaitable[Analysis]], max_concurrency: int
+    ):
+        self.analyze = analyze
+        self.max_concurrency = max_concurrency
+        self._analyses: Dict[str, "asyncio.Task[Analysis]"] = {}
+        self._semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+
+    def prefetch(self, pending: List[str]) -> None:
+        for task in pending[: self.max_concurrency]:
+            if task not in self._analyses:
+                self._analyses[task] = asyncio.create_task(self._speculate(task))
+
+    def retain(self, pending: List[str]) -> None:
+        """Discard analyses of tasks that are no longer queued"""
+        for task in set(self._analyses) - set(pending):
+            self._analyses.pop(task).cancel()
+
+    async def get(self, task: str) -> Analysis:
+        speculation = self._analyses.pop(task, None)
+        if speculation is not None:
+            try:
+                return await speculation
+            except Exception:
+                pass  # Retried below so errors surface through the normal path
+
+        return await self.analyze(task)
+
+    async def close(self) -> None:
+        for speculation in self._analyses.values():
+            speculation.cancel()
+
+        await asyncio.gather(*self._analyses.values(), return_exceptions=True)
+        self._analyses.clear()
+
+    async def _speculate(self, task: str) -> Analysis:
+        async with self._semaphore:
+            return await self.analyze(task)
+
+
+class AgentLoop:
+    """
+    Runs every step of an agent on the server and streams the run as events.
+
+    Steps follow the frontend's loop: start the goal, then analyze, execute and
+    create tasks until none are left, and finally summarize the results. Each
+    step is counted against the run's limits like a separate request would be,
+    so `settings.max_loops` still bounds the run.
+
+    While a task executes, the next queued tasks are analyzed speculatively.
+    Analyses are still counted as steps only when their task is reached.
+
+    In parallel runs the initial tasks are analyzed and executed concurrently,
+    and their events are interleaved. Their results are merged in task order
+    before the loop continues with the tasks created from them.
+
+    Events: `run`, `tasks`, `analysis`, `execution`, `summary`, `stop`, `error`
+    and `done`. Task events carry the task and its `task_id`. Execution and
+    summary events carry text as it is generated.
+    """
+
+    def __init__(
+        self,
+        service: AgentService,
+        crud: AgentCRUD,
+        run: AgentRunLoop,
+    ):
+        self.service = service
+        self.crud = crud
+        self.run = run
+        # Serializes use of the request's database session between parallel tasks
+        self._session_lock = asyncio.Lock()
+        self._tools_loaded = False
+
+    async def stream(self) -> AsyncIterator[str]:
+        yield format_event("run", run_id=self.run.run_id)
+
+        try:
+            async for event in self._run_loop():
+                yield event
+        except PlatformaticError as e:
+            yield format_event("error", detail=e.detail)
+        except Exception as e:
+            logger.exception(e)
+            yield format_event("error", detail="The agent run failed unexpectedly")
+
+        yield format_event("done")
+
+    async def _run_loop(self) -> AsyncIterator[str]:
+        goal = self.run.goal
+
+        await self._step("start")
+        pending: List[str] = await self._fork().start_goal_agent(goal=goal)
+        yield format_event("tasks", tasks=pending)
+
+        completed: List[str] = []
+        results: List[str] = []
+        task_ids = itertools.count()
+        analyzer = SpeculativeAnalyzer(
+            self._analyze, settings.agent_speculative_analysis_concurrency
+        )
+
+        try:
+            if self.run.parallel and len(pending) > 1:
+                batch, pending = pending, []
+                batch_results: List[List[str]] = [[] for _ in batch]
+
+                async for event in self._run_parallel(
+                    [(next(task_ids), task) for task in batch], batch_results
+                ):
+                    yield event
+
+                completed.extend(batch)
+                results.extend("".join(output) for output in batch_results)
+                pending = await self._create_tasks(
+                    pending, batch[-1], "\n\n".join(results), completed
+                )
+                if pending:
+                    yield format_event("tasks", tasks=pending)
+
+            while pending:
+                task = pending.pop(0)
+                output: List[str] = []
+
+                async for event in self._run_task(
+                    next(task_ids),
+                    task,
+                    analyzer.get,
+                    output,
+                    on_execute=lambda: analyzer.prefetch(pending),
+                ):
+                    yield event
+
+                completed.append(task)
+                results.append("".join(output))
+
+                new_tasks = await self._create_tasks(
+                    pending, task, results[-1], completed
+                )
+                if new_tasks:
+                    pending.extend(new_tasks)
+                    yield format_event("tasks", tasks=new_tasks)
+
+                analyzer.retain(pending)
+        except MaxLoopsError as e:
+            yield format_event("stop", detail=e.detail)
+        finally:
+            await analyzer.close()
+
+        if not results:
+            return
+
+        await self._step("summarize")
+        response = await self._fork().summarize_task_agent(goal=goal, results=results)
+        async for text in iterate_response(response):
+            yield format_event("summary", text=text)
+
+    async def _run_task(
+        self,
+        task_id: int,
+        task: str,
+        analyze: Callable[[str], Awaitable[Analysis]],
+        output: List[str],
+        on_execute: Callable[[], None] = lambda: None,
+    ) -> AsyncIterator[str]:
+        """Analyze and execute a task, collecting the streamed result in output"""
+        await self._step("analyze")
+        analysis = await analyze(task)
+        yield format_event(
+            "analysis", task_id=task_id, task=task, analysis=analysis.dict()
+        )
+
+        await self._step("execute")
+        response = await self._fork().execute_task_agent(
+            goal=self.run.goal, task=task, analysis=analysis
+        )
+        on_execute()
+
+        async for text in iterate_response(response):
+            output.append(text)
+            yield format_event("execution", task_id=task_id, task=task, text=text)
+
+    async def _run_parallel(
+        self, tasks: List[Tuple[int, str]], outputs: List[List[str]]
+    ) -> AsyncIterator[str]:
+        """Run tasks concurrently, yielding their events as they are produced"""
+        events: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        semaphore = asyncio.Semaphore(settings.agent_parallel_task_concurrency)
+
+        async def run_task(task_id: int, task: str, output: List[str]) -> None:
+            async with semaphore:
+                async for event in self._run_task(task_id, task, self._analyze, output):
+                    await events.put(event)
+
+        async def run_all() -> None:
+            try:
+                async with asyncio.TaskGroup() as group:
+                    for (task_id, task), output in zip(tasks, outputs):
+                        group.create_task(run_task(task_id, task, output))
+            finally:
+                await events.put(None)
+
+        runner = asyncio.create_task(run_all())
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+
+            try:
+                await runner
+            except BaseExceptionGroup as e:
+                raise e.exceptions[0]
+        finally:
+            runner.cancel()
+
+    async def _analyze(self, task: str) -> Analysis:
+        if self._tools_loaded:
+            return await self._fork().analyze_task_agent(
+                goal=self.run.goal, task=task, tool_names=self.run.tool_names
+            )
+
+        # The first analysis loads the user's tool installations from the database
+        async with self._session_lock:
+            analysis = await self._fork().analyze_task_agent(
+                goal=self.run.goal, task=task, tool_names=self.run.tool_names
+            )
+            self._tools_loaded = True
+            return analysis
+
+    async def _create_tasks(
+        self, pending: List[str], last_task: str, result: str, completed: List[str]
+    ) -> List[str]:
+        await self._step("create")
+        return await self._fork().create_tasks_agent(
+            goal=self.run.goal,
+            tasks=pending,
+            last_task=last_task,
+            result=result,
+            completed_tasks=completed,
+        )
+
+    def _fork(self) -> AgentService:
+        """
+        The service to run a single step with. Steps fit the model's max_tokens to
+        their prompt, so steps that run concurrently each need their own model.
+        """
+        fork = getattr(self.service, "fork", None)
+        return fork() if fork is not None else self.service
+
+    async def _step(self, type_: Loop_Step) -> None:
+        async with self._session_lock:
+            await self.crud.create_task(self.run.run_id, type_)
+
+            # Release the step counter's row lock rather than holding it for the run
+            await self.crud.session.commit()
@@ -17,6 +17,37 @@ from reworkd_platform.web.api.agent.agent_service.open_ai_agent_service import (
 )
 from reworkd_platform.web.api.agent.model_factory import create_model
 from reworkd_platform.web.api.dependencies import get_current_user
+from reworkd_platform.web.api.memory.memory_factory import create_memory
+
+
+def create_agent_service(
+    run: AgentRun,
+    user: UserBase,
+    token_service: TokenService,
+    oauth_crud: OAuthCrud,
+    streaming: bool = False,
+    llm_model: Optional[LLM_Model] = None,
+) -> AgentService:
+    if settings.ff_mock_mode_enabled:
+        return MockAgentService()
+
+    model = create_model(
+        settings,
+        run.model_settings,
+        user,
+        streaming=streaming,
+        force_model=llm_model,
+    )
+
+    return OpenAIAgentService(
+        model,
+        run.model_settings,
+        token_service,
+        callbacks=None,
+        user=user,
+        oauth_crud=oauth_crud,
+        memory=create_memory(run.run_id),
+    )
 
 
 def get_agent_service(
@@ -30,24 +61,8 @@ def get_agent_service(
         token_service: TokenService = Depends(get_token_service),
         oauth_crud: OAuthCrud = Depends(OAuthCrud.inject),
     ) -> AgentService:
-        if settings.ff_mock_mode_enabled:
-            return MockAgentService()
-
-        model = create_model(
-            settings,
-            run.model_settings,
-            user,
-            streaming=streaming,
-            force_model=llm_model,
-        )
-
-        return OpenAIAgentService(
-            model,
-            run.model_settings,
-            token_service,
-            callbacks=None,
-            user=user,
-            oauth_crud=oauth_crud,
+        return create_agent_service(
+            run, user, token_service, oauth_crud, streaming, llm_model
         )
 
     return func
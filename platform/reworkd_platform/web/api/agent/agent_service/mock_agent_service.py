@@ -1,5 +1,5 @@
 import time
-from typing import Any, List
+from typing import Any, AsyncIterator, List
 
 from fastapi.responses import StreamingResponse as FastAPIStreamingResponse
 
@@ -15,6 +15,11 @@ class MockAgentService(AgentService):
         time.sleep(1)
         return ["Task X", "Task Y", "Task Z"]
 
+    async def start_goal_stream_agent(self, **kwargs: Any) -> AsyncIterator[str]:
+        for task in ["Task X", "Task Y", "Task Z"]:
+            time.sleep(0.3)
+            yield task
+
     async def create_tasks_agent(self, **kwargs: Any) -> List[str]:
         time.sleep(1)
         return ["Some random task that doesn't exist"]
@@ -1,7 +1,8 @@
 import asyncio
+import copy
 import logging
 import re
-from typing import Any, Callable, Dict, List, Optional, Type
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Type
 
 import openai
 from fastapi import FastAPI, HTTPException
@@ -11,10 +12,9 @@ from langchain.callbacks.base import AsyncCallbackHandler
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.output_parsers import PydanticOutputParser
 from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate
-from langchain.schema import HumanMessage
+from langchain.schema import HumanMessage, OutputParserException
 from pydantic import BaseModel, ValidationError
 from pydantic.json import pydantic_encoder
-from ratelimiter import RateLimiter
 from typing_extensions import Literal
 
 import reworkd_platform.db.crud.oauth as oauth_crud
@@ -25,11 +25,22 @@ import reworkd_platform.web.api.agent.analysis as analysis
 import reworkd_platform.web.api.agent.helpers as agent_helpers
 import reworkd_platform.web.api.agent.model_factory as model_factory
 import reworkd_platform.web.api.agent.prompts as prompts
-import reworkd_platform.web.api.agent.tools.open_ai_function as open_ai_function
 import reworkd_platform.web.api.agent.tools.tools as tools
 import reworkd_platform.web.api.agent.tools.utils as tools_utils
-from reworkd_platform.web.api.agent.task_output_parser import TaskOutputParser
+from reworkd_platform.settings import settings as platform_settings
+from reworkd_platform.web.api.agent.agent_service.agent_service import AgentService
+from reworkd_platform.web.api.agent.completion_cache import completion_cache
+from reworkd_platform.web.api.agent.task_output_parser import (
+    TaskOutputParser,
+    TaskStreamParser,
+    extract_tasks,
+    normalize_task,
+    normalize_tasks,
+)
+from reworkd_platform.web.api.agent.tools.resolver import ToolResolver
 from reworkd_platform.web.api.errors import OpenAIError
+from reworkd_platform.web.api.memory.memory import AgentMemory
+from reworkd_platform.web.api.memory.null import NullAgentMemory
 
 logger = logging.getLogger(__name__)
 re.compile("")  # This line is a workaround for a Flake8 issue.
@@ -43,6 +54,7 @@ class OpenAIAgentService(AgentService):
         callbacks: Optional[List[AsyncCallbackHandler]],
         user: user_schemas.UserBase,
         oauth_crud: oauth_crud.OAuthCrud,
+        memory: Optional[AgentMemory] = None,
     ):
         self.model = model
         self.settings = settings
@@ -50,29 +62,32 @@ class OpenAIAgentService(AgentService):
         self.callbacks = callbacks or []
         self.user = user
         self.oauth_crud = oauth_crud
-        self._rate_limiter = RateLimiter(max_calls=10, period=1)
+        self.tool_resolver = ToolResolver(user, oauth_crud)
+        self.memory = memory or NullAgentMemory()
 
-    async def start_goal(self, *, goal: str) -> List[str]:
+    async def start_goal_agent(self, *, goal: str) -> List[str]:
         prompt = ChatPromptTemplate.from_messages(
             [SystemMessagePromptTemplate(prompt=prompts.start_goal_prompt)]
         )
 
-        self.token_service.calculate_max_tokens(
+        args = {"goal": goal, "language": self.settings.language}
+
+        self.token_service.calculate_max_tokens_for_count(
             self.model,
-            prompt.format_prompt(
-                goal=goal,
-                language=self.settings.language,
-            ).to_string(),
+            self.token_service.count_prompt(prompts.start_goal_prompt, **args),
         )
 
-        completion = await agent_helpers.call_model_with_handling(
-            self.model,
-            ChatPromptTemplate.from_messages(
-                [SystemMessagePromptTemplate(prompt=prompts.start_goal_prompt)]
+        completion = await completion_cache.get_or_complete(
+            model=self.model,
+            prompt=prompt.format_prompt(**args).to_string(),
+            user=self.user,
+            complete=lambda: agent_helpers.call_model_with_handling(
+                self.model,
+                prompt,
+                args,
+                settings=self.settings,
+                callbacks=self.callbacks,
             ),
-            {"goal": goal, "language": self.settings.language},
-            settings=self.settings,
-            callbacks=self.callbacks,
         )
 
         task_output_parser = TaskOutputParser(completed_tasks=[])
@@ -80,32 +95,74 @@ class OpenAIAgentService(AgentService):
 
         return tasks
 
-    async def analyze_task(
+    async def start_goal_stream_agent(self, *, goal: str) -> AsyncIterator[str]:
+        """
+        Yield the tasks of a goal as soon as each is generated.
+        Requires a streaming model and skips the completion cache.
+        """
+        prompt = ChatPromptTemplate.from_messages(
+            [SystemMessagePromptTemplate(prompt=prompts.start_goal_prompt)]
+        )
+
+        args = {"goal": goal, "language": self.settings.language}
+
+        self.token_service.calculate_max_tokens_for_count(
+            self.model,
+            self.token_service.count_prompt(prompts.start_goal_prompt, **args),
+        )
+
+        parser = TaskStreamParser(completed_tasks=[])
+        stream = self.model.astream(
+            prompt.format_prompt(**args).to_messages(),
+            config={"callbacks": self.callbacks},
+        )
+
+        try:
+            async for chunk in agent_helpers.openai_stream_handler(
+                stream, settings=self.settings
+            ):
+                for task in parser.feed(chunk.content):
+                    yield task
+
+            for task in parser.close():
+                yield task
+        except OutputParserException as e:
+            raise OpenAIError(
+                e, "There was an issue parsing the response from the AI model."
+            )
+
+    async def analyze_task_agent(
         self, *, goal: str, task: str, tool_names: List[str]
     ) -> analysis.Analysis:
-        user_tools = await tools.get_user_tools(tool_names, self.user, self.oauth_crud)
-        functions = [open_ai_function.get_tool_function(tool) for tool in user_tools]
-        prompt = prompts.analyze_task_prompt.format_prompt(
-            goal=goal,
-            task=task,
-            language=self.settings.language,
-        )
+        user_tools = await tools.get_user_tools(tool_names, self.tool_resolver)
+        registry = tools.get_tool_registry()
+        functions = registry.get_functions(user_tools)
+        args = {"goal": goal, "task": task, "language": self.settings.language}
+        prompt = prompts.analyze_task_prompt.format_prompt(**args)
 
-        self.token_service.calculate_max_tokens(
+        self.token_service.calculate_max_tokens_for_count(
             self.model,
-            prompt.to_string(),
-            str(functions),
+            self.token_service.count_prompt(prompts.analyze_task_prompt, **args)
+            + registry.count_function_tokens(user_tools),
         )
 
-        message = await agent_helpers.openai_error_handler(
-            func=self.model.predict_messages,
-            messages=prompt.to_messages(),
+        async def predict_function_call() -> Dict[str, str]:
+            message = await agent_helpers.openai_error_handler(
+                func=self.model.predict_messages,
+                messages=prompt.to_messages(),
+                functions=functions,
+                settings=self.settings,
+                callbacks=self.callbacks,
+            )
+            return message.additional_kwargs.get("function_call", {})
+
+        function_call = await completion_cache.get_or_complete(
+            model=self.model,
+            prompt=prompt.to_string(),
+            user=self.user,
             functions=functions,
-            settings=self.settings,
-            callbacks=self.callbacks,
+            complete=predict_function_call,
         )
-
-        function_call = message.additional_kwargs.get("function_call", {})
         completion = function_call.get("arguments", "")
 
         try:
@@ -118,7 +175,7 @@ class OpenAIAgentService(AgentService):
         except (OpenAIError, ValidationError):
             return analysis.Analysis.get_default_analysis(task)
 
-    async def execute_task(
+    async def execute_task_agent(
         self,
         *,
         goal: str,
@@ -132,9 +189,10 @@ class OpenAIAgentService(AgentService):
             analysis.arg,
             self.user,
             self.oauth_crud,
+            resolver=self.tool_resolver,
         )
 
-    async def create_tasks(
+    async def create_tasks_agent(
         self,
         *,
         goal: str,
@@ -155,18 +213,53 @@ class OpenAIAgentService(AgentService):
             "result": result,
         }
 
-        self.token_service.calculate_max_tokens(
-            self.model, prompt.format_prompt(**args).to_string()
+        self.token_service.calculate_max_tokens_for_count(
+            self.model,
+            self.token_service.count_prompt(prompts.create_tasks_prompt, **args),
         )
 
-        completion = await agent_helpers.call_model_with_handling(
-            self.model, prompt, args, settings=self.settings, callbacks=self.callbacks
+        completion = await completion_cache.get_or_complete(
+            model=self.model,
+            prompt=prompt.format_prompt(**args).to_string(),
+            user=self.user,
+            complete=lambda: agent_helpers.call_model_with_handling(
+                self.model,
+                prompt,
+                args,
+                settings=self.settings,
+                callbacks=self.callbacks,
+            ),
         )
 
-        previous_tasks = (completed_tasks or []) + tasks
-        return [completion] if completion not in previous_tasks else []
+        previous_tasks = normalize_tasks([*(completed_tasks or []), *tasks])
+        first_line = completion.strip().split("\n", 1)[0]
+        new_tasks = [
+            task
+            for task in extract_tasks(first_line)
+            if normalize_task(task) not in previous_tasks
+        ]
 
-    async def summarize_task(
+        return await self._remove_similar_tasks(new_tasks)
+
+    async def _remove_similar_tasks(self, tasks: List[str]) -> List[str]:
+        """
+        Drop tasks that reword a task the run already created, then remember
+        the rest so later steps are checked against them.
+        """
+        if not tasks:
+            return tasks
+
+        with self.memory:
+            similar = await asyncio.gather(
+                *(self.memory.aget_similar_tasks(task) for task in tasks)
+            )
+            new_tasks = [task for task, matches in zip(tasks, similar) if not matches]
+            if new_tasks:
+                await self.memory.aadd_tasks(new_tasks)
+
+        return new_tasks
+
+    async def summarize_task_agent(
         self,
         *,
         goal: str,
@@ -175,16 +268,15 @@ class OpenAIAgentService(AgentService):
         self.model.model_name = "gpt-3.5-turbo-16k"
         self.model.max_tokens = 8000  # Total tokens = prompt tokens + completion tokens
 
-        snippet_max_tokens = 7000  # Leave room for the rest of the prompt
-        text_tokens = self.token_service.tokenize("".join(results))
-        text = self.token_service.detokenize(text_tokens[0:snippet_max_tokens])
-        logger.info(f"Summarizing text: {text}")
-
-        return tools_utils.summarize(
+        return await tools_utils.summarize_map_reduce(
             model=self.model,
             language=self.settings.language,
             goal=goal,
-            text=text,
+            results=results,
+            token_service=self.token_service,
+            chunk_tokens=7000,  # Leave room for the rest of the prompt
+            max_concurrency=platform_settings.summarize_max_concurrency,
+            settings=self.settings,
         )
 
     async def chat(
@@ -202,11 +294,12 @@ class OpenAIAgentService(AgentService):
             ]
         )
 
-        self.token_service.calculate_max_tokens(
+        self.token_service.calculate_max_tokens_for_count(
             self.model,
-            prompt.format_prompt(
-                language=self.settings.language,
-            ).to_string(),
+            self.token_service.count_prompt(
+                prompts.chat_prompt, language=self.settings.language
+            )
+            + sum(self.token_service.count_many([*results, message])),
         )
 
         chain = LLMChain(llm=self.model, prompt=prompt)
@@ -217,6 +310,12 @@ class OpenAIAgentService(AgentService):
             media_type="text/event-stream",
         )
 
+    def fork(self) -> "OpenAIAgentService":
+        """A copy of the service with its own model, for steps run concurrently"""
+        service = copy.copy(self)
+        service.model = self.model.copy()
+        return service
+
     @property
     def max_tokens(self) -> int:
         return self.model.max_tokens
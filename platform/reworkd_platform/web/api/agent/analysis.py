@@ -18,9 +18,9 @@ class Analysis(AnalysisArguments):
     @validator("action")
     def action_must_be_valid_tool(cls, v: str) -> str:
         # TODO: Remove circular import
-        from reworkd_platform.web.api.agent.tools.tools import get_available_tools_names
+        from reworkd_platform.web.api.agent.tools.tools import get_tool_registry
 
-        if v not in get_available_tools_names():
+        if v not in get_tool_registry():
             raise ValueError(f"Analysis action '{v}' is not a valid tool")
         return v
 
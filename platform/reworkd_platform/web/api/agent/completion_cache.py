@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import json
+from collections import Counter, deque
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.embeddings import OpenAIEmbeddings
+from langchain.embeddings.base import Embeddings
+from loguru import logger
+
+from reworkd_platform.schemas.user import UserBase
+from reworkd_platform.services.cache.backend import create_cache_backend
+from reworkd_platform.services.cache.cache import Cache
+from reworkd_platform.services.cache.single_flight import SingleFlight
+from reworkd_platform.settings import Settings, settings
+from reworkd_platform.web.api.agent.model_factory import WrappedChat
+
+
+@dataclass
+class CompletionCacheStats:
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    skipped: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.exact_hits + self.semantic_hits
+        total = hits + self.misses
+        return hits / total if total else 0.0
+
+
+class SemanticIndex:
+    """
+    Bounded in-process index of prompt embeddings.
+    Entries are partitioned so prompts only match within the same model,
+    temperature, function set and scope. The oldest entries are evicted first.
+    """
+
+    def __init__(self, max_entries: int, threshold: float):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._entries: Deque[Tuple[str, np.ndarray, str]] = deque()
+        self._partitions: "Counter[str]" = Counter()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def has_partition(self, partition: str) -> bool:
+        return self._partitions[partition] > 0
+
+    def add(self, partition: str, vector: List[float], key: str) -> None:
+        self._entries.append((partition, self._normalize(vector), key))
+        self._partitions[partition] += 1
+        while len(self._entries) > self.max_entries:
+            evicted, _, _ = self._entries.popleft()
+            self._partitions[evicted] -= 1
+            if not self._partitions[evicted]:
+                del self._partitions[evicted]
+
+    def search(self, partition: str, vector: List[float]) -> List[str]:
+        """Return matching keys above the threshold, most similar first"""
+        candidates = [(v, key) for p, v, key in self._entries if p == partition]
+        if not candidates:
+            return []
+
+        scores = np.stack([v for v, _ in candidates]) @ self._normalize(vector)
+        order = np.argsort(-scores)
+        return [candidates[i][1] for i in order if scores[i] >= self.threshold]
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+
+class CompletionCache:
+    """
+    Cache of LLM completions keyed on (model, temperature, prompt, functions).
+
+    Lookups first try an exact match. If a semantic index is configured, misses
+    fall back to the most similar cached prompt for the same model and functions.
+    Completions sampled above `max_temperature` bypass the cache entirely.
+    """
+
+    def __init__(
+        self,
+        cache: Cache,
+        *,
+        max_temperature: float,
+        scope: str = "user",
+        embeddings: Optional[Embeddings] = None,
+        semantic_index: Optional[SemanticIndex] = None,
+    ):
+        self.cache = cache
+        self.max_temperature = max_temperature
+        self.scope = scope
+        self.embeddings = embeddings
+        self.semantic_index = semantic_index if embeddings else None
+        self._stats = CompletionCacheStats()
+        self._flight: SingleFlight[Any] = SingleFlight()
+
+    @classmethod
+    def create(cls, settings_: Settings) -> "CompletionCache":
+        threshold = settings_.completion_cache_similarity_threshold
+        use_semantic = threshold is not None
+
+        return cls(
+            Cache(
+                create_cache_backend(settings_, settings_.completion_cache_max_entries),
+                namespace="completion",
+                ttl=settings_.completion_cache_ttl,
+            ),
+            max_temperature=(
+                settings_.completion_cache_max_temperature
+                if settings_.completion_cache_enabled
+                else -1
+            ),
+            scope=settings_.completion_cache_scope,
+            embeddings=(
+                OpenAIEmbeddings(
+                    client=None,  # Meta private value but mypy will complain its missing
+                    openai_api_key=settings_.openai_api_key,
+                )
+                if use_semantic
+                else None
+            ),
+            semantic_index=(
+                SemanticIndex(settings_.completion_cache_max_entries, threshold or 0)
+                if use_semantic
+                else None
+            ),
+        )
+
+    async def get_or_complete(
+        self,
+        *,
+        model: WrappedChat,
+        prompt: str,
+        user: UserBase,
+        complete: Callable[[], Awaitable[Any]],
+        functions: Optional[List[Any]] = None,
+    ) -> Any:
+        if model.temperature > self.max_temperature:
+            self._stats.skipped += 1
+            return await complete()
+
+        partition = self._partition(model, user, functions)
+        key = self._hash(partition, prompt)
+
+        if (value := await self.cache.get(key)) is not None:
+            self._stats.exact_hits += 1
+            return value
+
+        # Only embed before completing when there are prompts it could match
+        vector = None
+        index = self.semantic_index
+        if index is not None and index.has_partition(partition):
+            vector = await self._embed(prompt)
+            similar_keys = index.search(partition, vector) if vector else []
+            for similar_key in similar_keys:
+                if (value := await self.cache.get(similar_key)) is not None:
+                    self._stats.semantic_hits += 1
+                    return value
+
+        self._stats.misses += 1
+
+        async def complete_and_store() -> Any:
+            # Otherwise the prompt is embedded for the index while it completes
+            embedding = (
+                asyncio.ensure_future(self._embed(prompt))
+                if index is not None and vector is None
+                else None
+            )
+            try:
+                result = await complete()
+                prompt_vector = await embedding if embedding else vector
+            finally:
+                if embedding:
+                    embedding.cancel()
+
+            if result:
+                await self.cache.set(key, result)
+                if index is not None and prompt_vector is not None:
+                    index.add(partition, prompt_vector, key)
+
+            return result
+
+        return await self._flight.do(key, complete_and_store)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **asdict(self._stats),
+            "hit_rate": self._stats.hit_rate,
+            "semantic_entries": len(self.semantic_index or []),
+            **self.cache.backend.stats(),
+        }
+
+    async def _embed(self, prompt: str) -> Optional[List[float]]:
+        """Embedding of a prompt, or None if the embedding call fails"""
+        if self.embeddings is None:
+            return None
+
+        try:
+            return await self.embeddings.aembed_query(prompt)
+        except Exception as e:
+            logger.warning(f"Failed to embed prompt for the completion cache: {e}")
+            return None
+
+    def _partition(
+        self, model: WrappedChat, user: UserBase, functions: Optional[List[Any]]
+    ) -> str:
+        return self._hash(
+            user.id if self.scope == "user" else "global",
+            model.model_name,
+            model.temperature,
+            functions or [],
+        )
+
+    @staticmethod
+    def _hash(*parts: Any) -> str:
+        serialized = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+completion_cache = CompletionCache.create(settings)
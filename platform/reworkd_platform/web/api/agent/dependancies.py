@@ -9,6 +9,8 @@ from reworkd_platform.schemas.agent import (
     AgentChat,
     AgentRun,
     AgentRunCreate,
+    AgentRunLoop,
+    AgentRunLoopCreate,
     AgentSummarize,
     AgentTaskAnalyze,
     AgentTaskCreate,
@@ -45,6 +47,23 @@ async def create_agent_run(crud: AgentCRUD = Depends(get_agent_crud),
     return AgentRun(**body.dict(), run_id=str(id_))
 
 
+async def agent_run_loop_validator(crud: AgentCRUD = Depends(get_agent_crud),
+                                   body: AgentRunLoopCreate = Body(
+                                       example={
+                                           "goal": "Create business plan for a bagel company",
+                                           "modelSettings": {
+                                               "customModelName": "gpt-3.5-turbo",
+                                           },
+                                           "tool_names": ["search"],
+                                       },
+                                   )) -> AgentRunLoop:
+    """
+    Creates a new agent run whose loop is executed entirely on the server.
+    """
+    id_ = (await crud.create_run(body.goal)).id
+    return AgentRunLoop(**body.dict(), run_id=str(id_))
+
+
 async def validate_task(body: TaskType, crud: AgentCRUD = Depends(get_agent_crud),
                         task_type: Loop_Step) -> TaskType:
     """
@@ -1,4 +1,4 @@
-from typing import Any, Callable, Dict, TypeVar
+from typing import Any, AsyncIterator, Callable, Dict, TypeVar
 
 from langchain import BasePromptTemplate, LLMChain
 from langchain.chat_models.base import BaseChatModel
@@ -11,6 +11,7 @@ from openai.error import (
 )
 
 from reworkd_platform.schemas.agent import ModelSettings
+from reworkd_platform.services.rate_limiter import RateLimitExceeded
 from reworkd_platform.web.api.errors import OpenAIError
 
 T = TypeVar("T")
@@ -59,6 +60,13 @@ async def openai_error_handler(
                 should_log=not settings.custom_api_key,
             )
         raise OpenAIError(e, e.user_message)
+    except RateLimitExceeded as e:
+        raise OpenAIError(
+            e,
+            "Too many requests to the AI model are queued, please try again shortly.",
+            code=429,
+            should_log=False,
+        )
     except Exception as e:
         raise OpenAIError(
             e, "There was an unexpected issue getting a response from the AI model."
@@ -74,3 +82,22 @@ async def call_model_with_handling(
 ) -> str:
     chain = LLMChain(llm=model, prompt=prompt)
     return await openai_error_handler(chain.arun, args, settings=settings, **kwargs)
+
+
+async def openai_stream_handler(
+    stream: AsyncIterator[T], settings: ModelSettings
+) -> AsyncIterator[T]:
+    """Iterate a model's stream, handling errors like openai_error_handler"""
+    iterator = stream.__aiter__()
+
+    async def next_chunk() -> Any:
+        try:
+            return await iterator.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    while True:
+        chunk = await openai_error_handler(next_chunk, settings=settings)
+        if chunk is None:
+            return
+        yield chunk
@@ -1,11 +1,19 @@
+import hashlib
+import json
+from collections import OrderedDict
 from typing import Any, Dict, Optional, Tuple, Type, Union
 
+import openai
 from langchain.chat_models import AzureChatOpenAI, ChatOpenAI
 from pydantic import Field
 
 from reworkd_platform.schemas.agent import LLM_Model, ModelSettings
 from reworkd_platform.schemas.user import UserBase
+from reworkd_platform.services.http.client import llm_http_client
+from reworkd_platform.services.rate_limiter import openai_rate_limiter
 from reworkd_platform.settings import Settings
+from reworkd_platform.settings import settings as platform_settings
+from reworkd_platform.web.api.agent.model_router import CANONICAL_MODELS, model_router
 
 class WrappedChatOpenAI(ChatOpenAI):
     client: Any = Field(
@@ -23,18 +31,144 @@ class WrappedAzureChatOpenAI(AzureChatOpenAI, WrappedChatOpenAI):
 
 WrappedChat = Union[WrappedAzureChatOpenAI, WrappedChatOpenAI]
 
-def create_model(
+class SharedSessionChatCompletion:
+    """
+    openai.ChatCompletion sending async requests over the shared HTTP session,
+    rather than a session opened and closed for every completion. Async requests
+    are routed between endpoints by the model router.
+    """
+
+    @staticmethod
+    def create(*args: Any, **kwargs: Any) -> Any:
+        return openai.ChatCompletion.create(*args, **kwargs)
+
+    @staticmethod
+    async def acreate(**kwargs: Any) -> Any:
+        # Capacity is taken once per completion, before routing, so time queued
+        # here isn't counted as endpoint latency and hedges aren't charged twice
+        await acquire_rate_limit(kwargs)
+        return await model_router.acreate(kwargs, _acreate)
+
+
+async def _acreate(**params: Any) -> Any:
+    openai.aiosession.set(llm_http_client.session)
+    return await openai.ChatCompletion.acreate(**params)
+
+
+async def acquire_rate_limit(params: Dict[str, Any]) -> None:
+    """
+    Wait for capacity under the rate limits of a completion's API key and model.
+
+    Tokens are estimated the way OpenAI counts them against its limits: about
+    four characters per prompt token plus the requested completion tokens.
+    Azure deployment names (gpt-35-turbo) share the limits of their model.
+
+    Raises RateLimitExceeded rather than an openai error so langchain doesn't
+    retry it, keeping the wait bounded by openai_rate_limit_max_wait.
+    """
+    model = CANONICAL_MODELS.get(params.get("model", ""), params.get("model", ""))
+    key = hashlib.sha256((params.get("api_key") or "").encode()).hexdigest()[:16]
+
+    prompt = sum(len(m.get("content") or "") for m in params.get("messages", []))
+    if functions := params.get("functions"):
+        prompt += len(json.dumps(functions))
+    tokens = prompt // 4 + (params.get("max_tokens") or 0) * params.get("n", 1)
+
+    await openai_rate_limiter.acquire(f"{key}:{model}", model, tokens)
+
+
+MAX_RETRIES = 5
+# The router already fails over between endpoints and models, so langchain
+# retries its completions as a whole only once
+ROUTED_MAX_RETRIES = 2
+
+# (api base, api key hash, model, streaming, azure deployment)
+PoolKey = Tuple[str, str, str, bool, Optional[str]]
+
+
+class LLMClientPool:
+    """
+    Chat models shared by every request with the same connection settings.
+
+    Constructing a chat model validates its fields and environment, so each
+    configuration is only constructed once. Requests are handed a shallow copy
+    with their own completion settings and user headers, which they are free to
+    mutate, e.g. to fit `max_tokens` to a prompt. At most `max_entries`
+    configurations are kept, evicting the least recently used.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._models: "OrderedDict[PoolKey, WrappedChat]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        settings: Settings,
+        model_settings: ModelSettings,
+        user: UserBase,
+        streaming: bool = False,
+        force_model: Optional[LLM_Model] = None,
+    ) -> WrappedChat:
+        use_azure = (
+            not model_settings.custom_api_key and "azure" in settings.openai_api_base
+        )
+        llm_model = force_model or model_settings.model
+        api_key = model_settings.custom_api_key or settings.openai_api_key
+
+        key: PoolKey = (
+            settings.openai_api_base,
+            hashlib.sha256((api_key or "").encode()).hexdigest(),
+            llm_model,
+            streaming,
+            llm_model.replace(".", "") if use_azure else None,
+        )
+
+        model = self._models.get(key)
+        if model is None:
+            self.misses += 1
+            model = _construct_model(settings, model_settings, streaming, llm_model)
+            self._models[key] = model
+            while len(self._models) > self.max_entries:
+                self._models.popitem(last=False)
+        else:
+            self.hits += 1
+
+        self._models.move_to_end(key)
+        return _replace(
+            model,
+            max_tokens=model_settings.max_tokens,
+            temperature=model_settings.temperature,
+            model_kwargs={
+                "user": user.email,
+                "headers": get_headers(settings, user, use_helicone=use_azure),
+            },
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._models),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def _construct_model(
     settings: Settings,
     model_settings: ModelSettings,
-    user: UserBase,
-    streaming: bool = False,
-    force_model: Optional[LLM_Model] = None,
+    streaming: bool,
+    llm_model: LLM_Model,
 ) -> WrappedChat:
     use_azure = (
         not model_settings.custom_api_key and "azure" in settings.openai_api_base
     )
+    routed = not model_settings.custom_api_key and bool(settings.llm_endpoints)
+    max_retries = ROUTED_MAX_RETRIES if routed else MAX_RETRIES
 
-    llm_model = force_model or model_settings.model
     model: Type[WrappedChat]
     if use_azure:
         model = WrappedAzureChatOpenAI
@@ -49,11 +183,8 @@ def create_model(
             "max_tokens": model_settings.max_tokens,
             "temperature": model_settings.temperature,
             "streaming": streaming,
-            "max_retries": 5,
-            "model_kwargs": {
-                "user": user.email,
-                "headers": get_headers(settings, user, use_helicone=True),
-            },
+            "max_retries": max_retries,
+            "model_kwargs": {},
         }
     else:
         model = WrappedChatOpenAI
@@ -64,14 +195,36 @@ def create_model(
             "model": llm_model,
             "max_tokens": model_settings.max_tokens,
             "streaming": streaming,
-            "max_retries": 5,
-            "model_kwargs": {
-                "user": user.email,
-                "headers": get_headers(settings, user),
-            },
+            "max_retries": max_retries,
+            "model_kwargs": {},
         }
 
-    return model(**kwargs)
+    # Validation points the client at openai.ChatCompletion, so it is swapped after
+    return _replace(model(**kwargs), client=SharedSessionChatCompletion)
+
+
+def _replace(model: WrappedChat, **values: Any) -> WrappedChat:
+    """
+    Shallow copy of a model with some fields replaced, without validation.
+    Unlike BaseModel.copy this doesn't iterate over every field first.
+    """
+    return model._copy_and_set_values(
+        {**model.__dict__, **values}, set(model.__fields_set__), deep=False
+    )
+
+
+llm_client_pool = LLMClientPool(platform_settings.llm_client_pool_size)
+
+
+def create_model(
+    settings: Settings,
+    model_settings: ModelSettings,
+    user: UserBase,
+    streaming: bool = False,
+    force_model: Optional[LLM_Model] = None,
+) -> WrappedChat:
+    return llm_client_pool.get(settings, model_settings, user, streaming, force_model)
+
 
 def get_base_and_headers(
     settings_: Settings, model_settings: ModelSettings, user: UserBase
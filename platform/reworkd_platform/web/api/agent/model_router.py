@@ -0,0 +1,379 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import openai
+from loguru import logger
+
+from reworkd_platform.schemas.agent import LLM_MODEL_MAX_TOKENS
+from reworkd_platform.settings import LLMEndpoint, settings
+
+# Sends a completion with the given parameters, e.g. openai.ChatCompletion.acreate
+Create = Callable[..., Awaitable[Any]]
+
+# Azure deployments are named after their model without dots
+CANONICAL_MODELS = {model.replace(".", ""): model for model in LLM_MODEL_MAX_TOKENS}
+
+# Latency samples needed before hedging uses their p95 as the deadline
+MIN_SAMPLES = 20
+
+
+class EndpointHealth:
+    """
+    Latency and circuit breaker of one model on one endpoint.
+
+    The circuit opens after `failure_threshold` consecutive failures, turning
+    requests away for `reset_timeout` seconds. Then a single probe is let
+    through, closing the circuit on success and reopening it on failure.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        alpha: float = 0.2,
+        window: int = 100,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.alpha = alpha
+        self.latency: Optional[float] = None  # EWMA, seconds
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.failures = 0  # Consecutive
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    def state(self, now: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if now - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def available(self, now: float) -> bool:
+        state = self.state(now)
+        return state == "closed" or (state == "half_open" and not self.probing)
+
+    def begin(self, now: float) -> None:
+        if self.state(now) == "half_open":
+            self.probing = True
+
+    def cancel(self) -> None:
+        self.probing = False
+
+    def record_success(self, latency: float) -> None:
+        self.latency = (
+            latency
+            if self.latency is None
+            else self.alpha * latency + (1 - self.alpha) * self.latency
+        )
+        self.samples.append(latency)
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self, now: float) -> None:
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            self.opened_at = now
+        self.probing = False
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        samples = sorted(self.samples)
+        return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "state": self.state(now),
+            "latency": self.latency,
+            "p95": self.percentile(0.95),
+            "failures": self.failures,
+        }
+
+
+@dataclass
+class ModelRouterStats:
+    requests: int = 0
+    failovers: int = 0  # Attempts moved on to another endpoint after a failure
+    fallbacks: int = 0  # Completions sent to a fallback model
+    hedged: int = 0
+    hedge_wins: int = 0  # Hedged requests answered first
+    unavailable: int = 0  # Completions with every circuit open
+
+
+def endpoint_of(params: Dict[str, Any]) -> LLMEndpoint:
+    """The endpoint a completion was configured with"""
+    return LLMEndpoint(
+        api_base=params.get("api_base") or openai.api_base,
+        api_key=params.get("api_key") or openai.api_key or "",
+        api_type=params.get("api_type") or "open_ai",
+        api_version=params.get("api_version"),
+    )
+
+
+def route(params: Dict[str, Any], endpoint: LLMEndpoint, model: str) -> Dict[str, Any]:
+    """Completion parameters sending `params` to a model on an endpoint"""
+    routed = {
+        **params,
+        "api_base": endpoint.api_base,
+        "api_key": endpoint.api_key,
+        "api_type": endpoint.api_type,
+        "api_version": endpoint.api_version,
+    }
+    routed.pop("deployment_id", None)
+
+    if endpoint.api_type == "azure":
+        routed["model"] = routed["engine"] = model.replace(".", "")
+    else:
+        routed["model"] = model
+        routed.pop("engine", None)
+
+    if headers := params.get("headers"):
+        # The endpoint's own key is sent instead
+        routed["headers"] = {k: v for k, v in headers.items() if k != "Authorization"}
+
+    return routed
+
+
+async def prefetch(stream: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """Wait for the first chunk of a stream, returning a stream replaying it"""
+    try:
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except BaseException:
+        await _close(stream)
+        raise
+
+    async def replay() -> AsyncIterator[Any]:
+        if first is None:
+            return
+        yield first
+        async for chunk in stream:
+            yield chunk
+
+    return replay()
+
+
+async def _close(response: Any) -> None:
+    if hasattr(response, "aclose"):
+        await response.aclose()
+
+
+class ModelRouter:
+    """
+    Routes completions sent with the platform's API key between its own
+    endpoint and `endpoints`, instead of retrying a failing endpoint.
+
+    Each model on each endpoint has its own EndpointHealth. Endpoints are tried
+    fastest first by latency EWMA, skipping those with an open circuit, and
+    failing over to the next on errors other than invalid requests. Once every
+    endpoint of a model has failed, the completion is sent to its fallback
+    model, e.g. from gpt-4 to gpt-3.5-turbo-16k when gpt-4 is overloaded.
+
+    With hedging, a second request is sent to the next endpoint when the first
+    hasn't produced a token within its p95 latency, and the slower is cancelled.
+    Completions with any other API key are sent as is.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[LLMEndpoint],
+        fallbacks: Dict[str, str],
+        *,
+        platform_key: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        hedge: bool = False,
+        hedge_min_delay: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.endpoints = list(endpoints)
+        self.fallbacks = fallbacks
+        self.platform_key = platform_key
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self._clock = clock
+        self._health: Dict[Tuple[str, str], EndpointHealth] = {}
+        self._stats = ModelRouterStats()
+
+    async def acreate(self, params: Dict[str, Any], create: Create) -> Any:
+        if params.get("api_key") != self.platform_key:
+            return await create(**params)
+
+        self._stats.requests += 1
+        model = CANONICAL_MODELS.get(params["model"], params["model"])
+        primary = endpoint_of(params)
+        endpoints = [primary] + [e for e in self.endpoints if e != primary]
+
+        error: Optional[Exception] = None
+        for candidate in self._models(model):
+            if candidate != model:
+                logger.warning(f"Falling back from {model} to {candidate}")
+                self._stats.fallbacks += 1
+
+            available = self._available(endpoints, candidate)
+            while available:
+                endpoint = available.pop(0)
+                try:
+                    if self.hedge and available:
+                        return await self._hedge(
+                            params, endpoint, available, candidate, create
+                        )
+                    return await self._attempt(params, endpoint, candidate, create)
+                except openai.error.InvalidRequestError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Completion failed on {endpoint.api_base}: {e}")
+                    error = e
+                    if available:
+                        self._stats.failovers += 1
+
+        if error:
+            raise error
+
+        self._stats.unavailable += 1
+        raise openai.error.ServiceUnavailableError(
+            "Every endpoint of the AI model is unavailable, please try again shortly."
+        )
+
+    def _models(self, model: str) -> List[str]:
+        models = [model]
+        while (fallback := self.fallbacks.get(models[-1])) and fallback not in models:
+            models.append(fallback)
+        return models
+
+    def _available(self, endpoints: List[LLMEndpoint], model: str) -> List[LLMEndpoint]:
+        now = self._clock()
+        available = [e for e in endpoints if self._get(e, model).available(now)]
+
+        # Endpoints without samples yet keep their configured order, ahead of others
+        return sorted(available, key=lambda e: self._get(e, model).latency or 0.0)
+
+    def _get(self, endpoint: LLMEndpoint, model: str) -> EndpointHealth:
+        key = (endpoint.api_base, model)
+        if key not in self._health:
+            self._health[key] = EndpointHealth(
+                self.failure_threshold, self.reset_timeout
+            )
+        return self._health[key]
+
+    async def _attempt(
+        self,
+        params: Dict[str, Any],
+        endpoint: LLMEndpoint,
+        model: str,
+        create: Create,
+    ) -> Any:
+        """
+        Send the completion to one endpoint, returning once it has produced a
+        token, so streams are timed by their first chunk
+        """
+        health = self._get(endpoint, model)
+        start = self._clock()
+        health.begin(start)
+
+        try:
+            response = await create(**route(params, endpoint, model))
+            if params.get("stream"):
+                response = await prefetch(response)
+        except asyncio.CancelledError:
+            health.cancel()
+            raise
+        except openai.error.InvalidRequestError:
+            health.cancel()
+            raise
+        except Exception:
+            health.record_failure(self._clock())
+            raise
+
+        health.record_success(self._clock() - start)
+        return response
+
+    async def _hedge(
+        self,
+        params: Dict[str, Any],
+        endpoint: LLMEndpoint,
+        available: List[LLMEndpoint],
+        model: str,
+        create: Create,
+    ) -> Any:
+        """
+        Race the next available endpoint against the first once it exceeds its
+        p95, taking the next out of `available` if it was sent a request
+        """
+        p95 = self._get(endpoint, model).percentile(0.95)
+        deadline = max(p95 or 0.0, self.hedge_min_delay)
+
+        first = asyncio.create_task(self._attempt(params, endpoint, model, create))
+        done, _ = await asyncio.wait({first}, timeout=deadline)
+        if done:
+            return first.result()
+
+        self._stats.hedged += 1
+        hedge = available.pop(0)
+        second = asyncio.create_task(self._attempt(params, hedge, model, create))
+        pending = {first, second}
+        error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winners = [task for task in done if task.exception() is None]
+                for task in done - set(winners):
+                    error = task.exception()
+
+                if winners:
+                    winner = first if first in winners else winners[0]
+                    for task in winners:
+                        if task is not winner:
+                            await _close(task.result())
+                    if winner is second:
+                        self._stats.hedge_wins += 1
+                    return winner.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        assert error is not None
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        now = self._clock()
+        return {
+            **asdict(self._stats),
+            "endpoints": {
+                f"{base}:{model}": health.stats(now)
+                for (base, model), health in self._health.items()
+            },
+        }
+
+
+model_router = ModelRouter(
+    settings.llm_endpoints,
+    settings.llm_fallback_models,
+    platform_key=settings.openai_api_key,
+    failure_threshold=settings.llm_circuit_failure_threshold,
+    reset_timeout=settings.llm_circuit_reset_timeout,
+    hedge=settings.llm_hedge_enabled,
+    hedge_min_delay=settings.llm_hedge_min_delay,
+)
@@ -108,6 +108,20 @@ summarize_prompt = PromptTemplate(
     input_variables=["goal", "language", "text"],
 )
 
+summarize_chunk_prompt = PromptTemplate(
+    template="""You must answer in the "{language}" language.
+
+    The following text is one part of the results gathered for the goal "{goal}":
+
+    "{text}"
+
+    Condense it into concise notes that will later be combined with notes on the other parts.
+    Keep every fact, figure, name and source link that is relevant to the goal.
+    You will not make up information or add any information outside of the above text.
+    """,
+    input_variables=["goal", "language", "text"],
+)
+
 company_context_prompt = PromptTemplate(
     template="""You must answer in the "{language}" language.
 
@@ -1,8 +1,27 @@
 import ast
+import json
 import re
-from typing import Any, Final, List, Optional
+from typing import Iterable, List, Literal, Optional, Set
 
 from langchain.schema import BaseOutputParser, OutputParserException
+from pydantic import PrivateAttr
+
+ARRAY_PATTERN = re.compile(
+    r"\[(?:\s*(?:\"[^\"\\]*(?:\\.[^\"\\]*)*\"|\'[^\'\\]*(?:\\.[^\'\\]*)*\')\s*,?)*\s*\]"
+)
+NUMBERED_LINE_PATTERN = re.compile(r"\d+\..+")
+PREFIX_PATTERN = re.compile(
+    r"^(Task(?![a-z])\s*\d*\.\s*|Task(?![a-z])\s*\d*[-:]?\s*|Step(?![a-z])\s*\d*["
+    r"-:]?\s*|\d+\.\s*|\d+\s*[-:]?\s*|^\.\s*|^\.*)",
+    re.IGNORECASE,
+)
+NOT_A_TASK_PATTERN = re.compile(
+    r"No( (new|further|additional|extra|other))? tasks? (is )?("
+    r"required|needed|added|created|inputted).*"
+    r"|Task (complete|completed|finished|done|over|success).*"
+    r"|\s*|Do nothing(\s.*)?",
+    re.IGNORECASE,
+)
 
 
 class TaskOutputParser(BaseOutputParser[List[str]]):
@@ -11,17 +30,22 @@ class TaskOutputParser(BaseOutputParser[List[str]]):
     Responsible for parsing task creation output into a list of task strings
     """
 
-    completed_tasks: Final = []
+    completed_tasks: List[str] = []
+    _completed: Set[str] = PrivateAttr(default_factory=set)
 
     def __init__(self, *, completed_tasks: Optional[List[str]] = None):
         super().__init__()
         self.completed_tasks = completed_tasks or []
+        self._completed = normalize_tasks(self.completed_tasks)
 
     def parse(self, text: str) -> List[str]:
         try:
-            array_str = self._extract_array(text)
-            all_tasks = [task for task in array_str if self._real_tasks_filter(task)]
-            return [task for task in all_tasks if task not in self.completed_tasks]
+            return [
+                task
+                for task in extract_array(text)
+                if real_tasks_filter(task)
+                and normalize_task(task) not in self._completed
+            ]
         except Exception as e:
             msg = f"Failed to parse tasks from completion '{text}'. Exception: {e}"
             raise OutputParserException(msg)
@@ -35,43 +59,150 @@ class TaskOutputParser(BaseOutputParser[List[str]]):
         This should be parsable by json.loads()
         """
 
-    def _extract_array(self, input_str: str) -> List[str]:
-        regex = r"\[(?:\s*(?:\"[^\"\\]*(?:\\.[^\"\\]*)*\"|\'[^\'\\]*(?:\\.[^\'\\]*)*\')\s*,?)*\s*\]"
-        match = re.fullmatch(regex, input_str)
-        if match is not None:
-            return ast.parse(match[0], mode="eval").get("body")[0].get("value")
-        else:
-            return self._handle_multiline_string(input_str)
-
-    def _handle_multiline_string(self, input_str: str) -> List[str]:
-        processed_lines = [
-            re.sub(r".*?(\d+\..+)", r"\1", line).strip()
-            for line in input_str.split("\n")
-            if line.strip() != ""
-        ]
-
-        if any(re.fullmatch(r"\d+\..+", line) for line in processed_lines):
-            return processed_lines
-        else:
-            raise RuntimeError(f"Failed to extract array from {input_str}")
-
-    def _remove_prefix(self, input_str: str) -> str:
-        prefix_pattern = (
-            r"^(Task\s*\d*\.\s*|Task\s*\d*[-:]?\s*|Step\s*\d*["
-            r"-:]?\s*|Step\s*[-:]?\s*|\d+\.\s*|\d+\s*[-:]?\s*|^\.\s*|^\.*)"
-        )
-        return re.sub(prefix_pattern, "", input_str, flags=re.IGNORECASE)
-
-    def _real_tasks_filter(self, input_str: str) -> bool:
-        no_task_regex = (
-            r"^No( (new|further|additional|extra|other))? tasks? (is )?("
-            r"required|needed|added|created|inputted).*"
-        )
-        task_complete_regex = r"^Task (complete|completed|finished|done|over|success).*"
-        do_nothing_regex = r"^(\s*|Do nothing(\s.*)?)$"
-
-        return (
-            not re.fullmatch(no_task_regex, input_str, re.IGNORECASE)
-            and not re.fullmatch(task_complete_regex, input_str, re.IGNORECASE)
-            and not re.fullmatch(do_nothing_regex, input_str, re.IGNORECASE)
-        )
+
+def extract_array(input_str: str) -> List[str]:
+    if input_str.lstrip().startswith("["):
+        try:
+            array = json.loads(input_str)
+            if isinstance(array, list) and all(isinstance(t, str) for t in array):
+                return array
+        except ValueError:
+            pass
+
+        # Arrays of single quoted strings, as Python would print them
+        if ARRAY_PATTERN.fullmatch(input_str):
+            return ast.literal_eval(input_str)
+
+    return handle_multiline_string(input_str)
+
+
+def handle_multiline_string(input_str: str) -> List[str]:
+    processed_lines = [
+        process_line(line) for line in input_str.split("\n") if line.strip() != ""
+    ]
+
+    if any(NUMBERED_LINE_PATTERN.fullmatch(line) for line in processed_lines):
+        return processed_lines
+    else:
+        raise RuntimeError(f"Failed to extract array from {input_str}")
+
+
+def process_line(line: str) -> str:
+    """Strip anything before the numbering of a line"""
+    match = NUMBERED_LINE_PATTERN.search(line)
+    return (line[match.start() :] if match else line).strip()
+
+
+def extract_tasks(text: str) -> List[str]:
+    """Tasks of a plain completion, one per line, without their prefixes"""
+    tasks = []
+    for line in text.split("\n"):
+        # Filtered before and after the prefix is removed, as removing it turns
+        # "Task complete." into the task "complete."
+        line = line.strip()
+        if real_tasks_filter(line) and real_tasks_filter(task := remove_prefix(line)):
+            tasks.append(task)
+
+    return tasks
+
+
+def remove_prefix(input_str: str) -> str:
+    return PREFIX_PATTERN.sub("", input_str, count=1)
+
+
+def real_tasks_filter(input_str: str) -> bool:
+    return not NOT_A_TASK_PATTERN.fullmatch(input_str)
+
+
+def normalize_task(task: str) -> str:
+    """A task as compared with completed ones, without numbering, spacing or case"""
+    task = task.strip()
+    return " ".join((remove_prefix(task) or task).split()).casefold()
+
+
+def normalize_tasks(tasks: Iterable[str]) -> Set[str]:
+    return {normalize_task(task) for task in tasks}
+
+
+class TaskStreamParser:
+    """
+    Incremental counterpart of TaskOutputParser for streamed completions.
+
+    Tokens are fed as they arrive and each task is returned as soon as its
+    string literal, in a JSON array, or its line, in a numbered list, is
+    complete. Tasks are filtered the same way as by TaskOutputParser, but
+    unnumbered lines of a numbered list are skipped rather than kept.
+    """
+
+    def __init__(self, *, completed_tasks: Optional[List[str]] = None):
+        self._completed = normalize_tasks(completed_tasks or [])
+        self._format: Optional[Literal["array", "lines"]] = None
+        self._buffer = ""  # The current string literal or line
+        self._quote: Optional[str] = None  # Set while inside a string literal
+        self._escaped = False
+        self._found = 0  # Tasks found, including filtered ones
+
+    def feed(self, text: str) -> List[str]:
+        """Consume the next tokens, returning the tasks they complete"""
+        tasks: List[str] = []
+
+        for char in text:
+            if self._format is None:
+                if char.isspace():
+                    continue
+                self._format = "array" if char == "[" else "lines"
+
+            if self._format == "array":
+                task = self._feed_array(char)
+            else:
+                task = self._feed_line(char)
+
+            if task is not None:
+                tasks.extend(self._accept(task))
+
+        return tasks
+
+    def close(self) -> List[str]:
+        """
+        Return the task on the final line, if any.
+        Raises OutputParserException if the completion contained no tasks.
+        """
+        tasks: List[str] = []
+        if self._format == "lines" and (task := self._end_line()) is not None:
+            tasks.extend(self._accept(task))
+
+        if not self._found:
+            raise OutputParserException("Failed to parse tasks from completion")
+        return tasks
+
+    def _feed_array(self, char: str) -> Optional[str]:
+        if self._quote is None:
+            if char in "\"'":
+                self._quote = self._buffer = char
+            return None
+
+        self._buffer += char
+        if self._escaped:
+            self._escaped = False
+        elif char == "\\":
+            self._escaped = True
+        elif char == self._quote:
+            self._quote = None
+            return ast.literal_eval(self._buffer)
+        return None
+
+    def _feed_line(self, char: str) -> Optional[str]:
+        if char == "\n":
+            return self._end_line()
+        self._buffer += char
+        return None
+
+    def _end_line(self) -> Optional[str]:
+        line, self._buffer = process_line(self._buffer), ""
+        return line if NUMBERED_LINE_PATTERN.fullmatch(line) else None
+
+    def _accept(self, task: str) -> List[str]:
+        self._found += 1
+        if not real_tasks_filter(task) or normalize_task(task) in self._completed:
+            return []
+        return [task]
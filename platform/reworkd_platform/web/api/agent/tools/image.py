@@ -1,16 +1,34 @@
-from typing import Any
+import asyncio
+import hashlib
+import io
+from typing import Any, Optional
 
 import openai
 import replicate
 from fastapi.responses import StreamingResponse as FastAPIStreamingResponse
+from loguru import logger
 from replicate.exceptions import ModelError
 from replicate.exceptions import ReplicateError as ReplicateAPIError
 
+from reworkd_platform.services.aws.s3 import SimpleStorageService
+from reworkd_platform.services.cache.backend import create_cache_backend
+from reworkd_platform.services.cache.cache import Cache
+from reworkd_platform.services.http.client import http_client, llm_http_client
 from reworkd_platform.settings import settings
 from reworkd_platform.web.api.agent.stream_mock import stream_string
 from reworkd_platform.web.api.agent.tools.tool import Tool
 from reworkd_platform.web.api.errors import ReplicateError
 
+image_cache = Cache(
+    create_cache_backend(settings, settings.image_cache_max_entries),
+    namespace="image",
+    ttl=settings.image_cache_ttl,
+)
+
+image_storage = (
+    SimpleStorageService(settings.image_bucket) if settings.image_bucket else None
+)
+
 
 async def get_replicate_image(input_str: str) -> str:
     if settings.replicate_api_key is None or settings.replicate_api_key == "":
@@ -18,7 +36,9 @@ async def get_replicate_image(input_str: str) -> str:
 
     client = replicate.Client(settings.replicate_api_key)
     try:
-        output = client.run(
+        # The client is synchronous and polls until the image is ready
+        output = await asyncio.to_thread(
+            client.run,
             "stability-ai/stable-diffusion"
             ":db21e45d3f7023abc2a46ee38a23973f6dce16bb082a930b0c49861f96d1e5bf",
             input={"prompt": input_str},
@@ -34,7 +54,8 @@ async def get_replicate_image(input_str: str) -> str:
 
 # Use AI to generate an Image based on a prompt
 async def get_open_ai_image(input_str: str) -> str:
-    response = openai.Image.create(
+    openai.aiosession.set(llm_http_client.session)
+    response = await openai.Image.acreate(
         api_key=settings.openai_api_key,
         prompt=input_str,
         n=1,
@@ -44,6 +65,59 @@ async def get_open_ai_image(input_str: str) -> str:
     return response["data"][0]["url"]
 
 
+async def generate_image(input_str: str) -> str:
+    # Use the replicate API if its available, otherwise use DALL-E
+    try:
+        return await get_replicate_image(input_str)
+    except RuntimeError:
+        return await get_open_ai_image(input_str)
+
+
+async def persist_image(url: str, object_name: str) -> Optional[str]:
+    """Copy a generated image to the image bucket, returning its stable URL"""
+    if image_storage is None:
+        return None
+
+    try:
+        async with http_client.get(url) as response:
+            response.raise_for_status()
+            content = await response.read()
+            content_type = response.content_type
+
+        await image_storage.aupload_file(object_name, io.BytesIO(content), content_type)
+    except Exception as e:
+        logger.warning(f"Failed to persist generated image: {e}")
+        return None
+
+    return image_storage.public_url(object_name)
+
+
+def _image_cache_key(input_str: str) -> str:
+    normalized = " ".join(input_str.lower().split())
+    provider = "replicate" if settings.replicate_api_key else "openai"
+    return f"{provider}:{hashlib.sha256(normalized.encode()).hexdigest()}"
+
+
+async def get_image(input_str: str) -> str:
+    """
+    URL of an image generated for a prompt, reusing the image of a repeated prompt.
+
+    Provider URLs expire, so they are only cached for image_cache_ttl. Images
+    copied to the image bucket are cached for image_bucket_cache_ttl instead.
+    """
+    key = _image_cache_key(input_str)
+    if (url := await image_cache.get(key)) is not None:
+        return url
+
+    url = await generate_image(input_str)
+    if persisted := await persist_image(url, f"images/{key.replace(':', '/')}"):
+        await image_cache.set(key, persisted, settings.image_bucket_cache_ttl)
+        return persisted
+
+    await image_cache.set(key, url)
+    return url
+
+
 class Image(Tool):
     description = "Used to sketch, draw, or generate an image."
     public_description = "Generate AI images."
@@ -57,10 +131,5 @@ class Image(Tool):
     async def call(
         self, goal: str, task: str, input_str: str, *args: Any, **kwargs: Any
     ) -> FastAPIStreamingResponse:
-        # Use the replicate API if its available, otherwise use DALL-E
-        try:
-            url = await get_replicate_image(input_str)
-        except RuntimeError:
-            url = await get_open_ai_image(input_str)
-
+        url = await get_image(input_str)
         return stream_string(f"![{input_str}]({url})")
@@ -1,7 +1,6 @@
 from typing import Type, TypedDict
 
-from reworkd_platform.web.api.agent.tools.tool import Tool
-from reworkd_platform.web.api.agent.tools.tools import get_tool_name
+from reworkd_platform.web.api.agent.tools.tool import Tool, get_tool_name
 
 
 class FunctionDescription(TypedDict):
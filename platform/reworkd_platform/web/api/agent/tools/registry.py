@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, Type
+
+from reworkd_platform.services.tokenizer.token_service import TokenService
+from reworkd_platform.web.api.agent.tools.open_ai_function import (
+    FunctionDescription,
+    get_tool_function,
+)
+from reworkd_platform.web.api.agent.tools.tool import (
+    Tool,
+    format_tool_name,
+    get_tool_name,
+)
+
+
+@dataclass(frozen=True)
+class ToolRegistry:
+    """
+    Immutable index of the available tools, built once at startup.
+    Holds each tool's OpenAI function schema and its token count so the
+    analyze and execute paths only do dictionary lookups.
+
+    The schemas are shared between requests and must not be mutated.
+    """
+
+    tools: Mapping[str, Type[Tool]]
+    functions: Mapping[str, FunctionDescription]
+    function_tokens: Mapping[str, int]
+    default_tool: Type[Tool]
+
+    @classmethod
+    def build(
+        cls,
+        tools: Iterable[Type[Tool]],
+        default_tool: Type[Tool],
+        token_service: TokenService,
+    ) -> "ToolRegistry":
+        by_name = {get_tool_name(tool): tool for tool in tools}
+        functions = {name: get_tool_function(tool) for name, tool in by_name.items()}
+        counts = token_service.count_many(str(f) for f in functions.values())
+
+        return cls(
+            tools=MappingProxyType(by_name),
+            functions=MappingProxyType(functions),
+            function_tokens=MappingProxyType(dict(zip(functions, counts))),
+            default_tool=default_tool,
+        )
+
+    def __contains__(self, tool_name: object) -> bool:
+        return tool_name in self.tools
+
+    def get_tool(self, tool_name: str) -> Type[Tool]:
+        return self.tools.get(format_tool_name(tool_name), self.default_tool)
+
+    def get_functions(self, tools: Iterable[Type[Tool]]) -> List[FunctionDescription]:
+        return [self.functions[get_tool_name(tool)] for tool in tools]
+
+    def count_function_tokens(self, tools: Iterable[Type[Tool]]) -> int:
+        return sum(self.function_tokens[get_tool_name(tool)] for tool in tools)
@@ -0,0 +1,43 @@
+import asyncio
+from typing import TYPE_CHECKING, Dict, List, Optional, Type
+
+from reworkd_platform.db.crud.oauth import OAuthCrud
+from reworkd_platform.db.models.auth import OauthCredentials
+from reworkd_platform.schemas.user import UserBase
+
+if TYPE_CHECKING:
+    from reworkd_platform.web.api.agent.tools.tool import Tool
+
+
+class ToolResolver:
+    """
+    Per-request view of the tools a user has access to.
+
+    All of the user's OAuth installations are loaded with a single query the first
+    time one is needed. They are then shared between the availability checks and
+    the tool calls of the same request.
+    """
+
+    def __init__(self, user: UserBase, oauth_crud: OAuthCrud):
+        self.user = user
+        self.oauth_crud = oauth_crud
+        self._installations: Optional[Dict[str, OauthCredentials]] = None
+        self._lock = asyncio.Lock()
+
+    async def get_installation(self, provider: str) -> Optional[OauthCredentials]:
+        return (await self._get_installations()).get(provider)
+
+    async def available_tools(self, tools: List[Type["Tool"]]) -> List[Type["Tool"]]:
+        available = await asyncio.gather(
+            *[tool.dynamic_available(self) for tool in tools]
+        )
+        return [tool for tool, is_available in zip(tools, available) if is_available]
+
+    async def _get_installations(self) -> Dict[str, OauthCredentials]:
+        async with self._lock:
+            if self._installations is None:
+                self._installations = (
+                    await self.oauth_crud.get_installations_by_user_id(self.user.id)
+                )
+
+        return self._installations
@@ -1,11 +1,14 @@
+import hashlib
 from typing import Any, List
 from urllib.parse import quote
 
-import aiohttp
 from aiohttp import ClientResponseError
 from fastapi.responses import StreamingResponse as FastAPIStreamingResponse
 from loguru import logger
 
+from reworkd_platform.services.cache.backend import create_cache_backend
+from reworkd_platform.services.cache.cache import Cache
+from reworkd_platform.services.http.client import http_client
 from reworkd_platform.settings import settings
 from reworkd_platform.web.api.agent.stream_mock import stream_string
 from reworkd_platform.web.api.agent.tools.reason import Reason
@@ -18,6 +21,26 @@ from reworkd_platform.web.api.agent.tools.utils import (
 # Search google via serper.dev. Adapted from LangChain
 # https://github.com/hwchase17/langchain/blob/master/langchain/utilities
 
+search_cache = Cache(
+    create_cache_backend(settings, settings.search_cache_max_entries),
+    namespace="serper",
+    ttl=settings.search_cache_ttl,
+)
+
+
+def _search_cache_key(search_term: str, search_type: str) -> str:
+    normalized = " ".join(search_term.lower().split())
+    return f"{search_type}:{hashlib.sha256(normalized.encode()).hexdigest()}"
+
+
+async def _cached_google_serper_search_results(
+    search_term: str, search_type: str = "search"
+) -> dict[str, Any]:
+    return await search_cache.get_or_load(
+        _search_cache_key(search_term, search_type),
+        lambda: _google_serper_search_results(search_term, search_type),
+    )
+
 
 async def _google_serper_search_results(
     search_term: str, search_type: str = "search"
@@ -30,13 +53,12 @@ async def _google_serper_search_results(
         "q": search_term,
     }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            f"https://google.serper.dev/{search_type}", headers=headers, params=params
-        ) as response:
-            response.raise_for_status()
-            search_results = await response.json()
-            return search_results
+    async with http_client.post(
+        f"https://google.serper.dev/{search_type}", headers=headers, params=params
+    ) as response:
+        response.raise_for_status()
+        search_results = await response.json()
+        return search_results
 
 
 class Search(Tool):
@@ -66,7 +88,7 @@ class Search(Tool):
     async def _call(
         self, goal: str, task: str, input_str: str, *args: Any, **kwargs: Any
     ) -> FastAPIStreamingResponse:
-        results = await _google_serper_search_results(
+        results = await _cached_google_serper_search_results(
             input_str,
         )
 
@@ -1,17 +1,17 @@
 import json
 import typing as t
-from datetime import datetime, timedelta
 
-import aiohttp
 from fastapi import FastAPI, HTTPException
 from loguru import logger
 from pydantic import BaseModel
 
 from reworkd_platform.db.crud.oauth import OAuthCrud
 from reworkd_platform.db.models.auth import OauthCredentials
+from reworkd_platform.services.http.client import http_client
+from reworkd_platform.services.oauth_tokens import oauth_token_manager
 from reworkd_platform.settings import settings
-from reworkd_platform.services.security import encryption_service
 from reworkd_platform.web.api.agent.stream_mock import stream_string
+from reworkd_platform.web.api.agent.tools.resolver import ToolResolver
 from reworkd_platform.web.api.agent.tools.tool import Tool
 from reworkd_platform.web.api.agent.tools.utils import Snippet, summarize_sid
 
@@ -22,29 +22,25 @@ class SIDOAuth:
     async def get_access_token(
         oauth_crud: OAuthCrud, installation: OauthCredentials
     ) -> t.Optional[str]:
-        if not installation.refresh_token_enc:
-            return None
-        if datetime.now() + timedelta(minutes=5) > installation.access_token_expiration:
-            refresh_token = encryption_service.decrypt(installation.refresh_token_enc)
-            data = {
-                "grant_type": "refresh_token",
-                "client_id": settings.sid_client_id,
-                "client_secret": settings.sid_client_secret,
-                "redirect_uri": settings.sid_redirect_uri,
-                "refresh_token": refresh_token,
-            }
-            async with aiohttp.ClientSession() as session:
-                async with session.post("https://auth.sid.ai/oauth/token", data=data) as response:
-                    if response.status != 200:
-                        raise HTTPException(status_code=response.status, detail="Failed to exchange tokens")
-                    response_data = await response.json()
-                    access_token = response_data["access_token"]
-                    expires_in = response_data["expires_in"]
-            installation.access_token_enc = encryption_service.encrypt(access_token)
-            installation.access_token_expiration = datetime.now() + timedelta(seconds=expires_in)
-            await installation.save(oauth_crud.session)
-
-        return encryption_service.decrypt(installation.access_token_enc)
+        return await oauth_token_manager.get_access_token(
+            installation, oauth_crud.session, SIDOAuth.refresh_access_token
+        )
+
+    @staticmethod
+    async def refresh_access_token(refresh_token: str) -> t.Tuple[str, int]:
+        data = {
+            "grant_type": "refresh_token",
+            "client_id": settings.sid_client_id,
+            "client_secret": settings.sid_client_secret,
+            "redirect_uri": settings.sid_redirect_uri,
+            "refresh_token": refresh_token,
+        }
+        async with http_client.post("https://auth.sid.ai/oauth/token", data=data) as response:
+            if response.status != 200:
+                raise HTTPException(status_code=response.status, detail="Failed to exchange tokens")
+            response_data = await response.json()
+
+        return response_data["access_token"], response_data["expires_in"]
 
 class SID(Tool):
     public_description = "Grant access to your Notion, Google Drive, etc."
@@ -56,19 +52,12 @@ class SID(Tool):
         "The query to search for. It should be a question in natural language."
     )
     image_url = "/tools/sid.png"
+    oauth_provider = "sid"
 
     @staticmethod
     def available() -> bool:
         return settings.sid_enabled
 
-    @staticmethod
-    async def dynamic_available(user: UserBase, oauth_crud: OAuthCrud) -> bool:
-        installation = await oauth_crud.get_installation_by_user_id(
-            user_id=user.id, provider="sid"
-        )
-
-        return bool(installation and installation.access_token_enc)
-
     async def _run_sid(
         self,
         goal: str,
@@ -76,10 +65,9 @@ class SID(Tool):
         input_str: str,
         user: UserBase,
         oauth_crud: OAuthCrud,
+        resolver: ToolResolver,
     ) -> t.Optional[t.Any]:
-        installation = await oauth_crud.get_installation_by_user_id(
-            user_id=user.id, provider="sid"
-        )
+        installation = await resolver.get_installation("sid")
         if not installation:
             logger.warning("No sid installation found for user {user.id}")
             return None
@@ -110,13 +98,18 @@ class SID(Tool):
         input_str: str,
         user: UserBase,
         oauth_crud: OAuthCrud,
+        resolver: t.Optional[ToolResolver] = None,
         *args: t.Any,
         **kwargs: t.Any,
     ) -> t.Any:
-         # fall back to search if no results are found
-        return await self._run_sid(goal, task, input_str, user, oauth_crud) or await Search(self.model, self.language).call(
-        goal, task, input_str, user, oauth_crud
-    )
+        resolver = resolver or ToolResolver(user, oauth_crud)
+
+        # fall back to search if no results are found
+        return await self._run_sid(
+            goal, task, input_str, user, oauth_crud, resolver
+        ) or await Search(self.model, self.language).call(
+            goal, task, input_str, user, oauth_crud
+        )
 
 async def _sid_search_results(
     search_term: str, limit: int, token: str
@@ -124,12 +117,11 @@ async def _sid_search_results(
     headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
     data = {"query": search_term, "limit": limit}
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            "https://api.sid.ai/v1/users/me/query",
-            headers=headers,
-            data=json.dumps(data),
-        ) as response:
-            response.raise_for_status()
-            search_results = await response.json()
-            return search_results
+    async with http_client.post(
+        "https://api.sid.ai/v1/users/me/query",
+        headers=headers,
+        data=json.dumps(data),
+    ) as response:
+        response.raise_for_status()
+        search_results = await response.json()
+        return search_results
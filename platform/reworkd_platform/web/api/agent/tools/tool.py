@@ -1,11 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Optional, Type
 
 from lanarky.responses import StreamingResponse
 from langchain.chat_models.base import BaseChatModel
 
 from reworkd_platform.db.crud.oauth import OAuthCrud
 from reworkd_platform.schemas.user import UserBase
+from reworkd_platform.web.api.agent.tools.resolver import ToolResolver
 
 
 class Tool(ABC):
@@ -13,6 +14,7 @@ class Tool(ABC):
     public_description: str = ""
     arg_description: str = "The argument to the function."
     image_url: str = "/tools/openai-white.png"
+    oauth_provider: Optional[str] = None  # Only available once the user installs it
 
     model: BaseChatModel
     language: str
@@ -25,9 +27,13 @@ class Tool(ABC):
     def available() -> bool:
         return True
 
-    @staticmethod
-    async def dynamic_available(user: UserBase, oauth_crud: OAuthCrud) -> bool:
-        return True
+    @classmethod
+    async def dynamic_available(cls, resolver: ToolResolver) -> bool:
+        if cls.oauth_provider is None:
+            return True
+
+        installation = await resolver.get_installation(cls.oauth_provider)
+        return bool(installation and installation.access_token_enc)
 
     @abstractmethod
     async def call(
@@ -37,5 +43,14 @@ class Tool(ABC):
         input_str: str,
         user: UserBase,
         oauth_crud: OAuthCrud,
+        resolver: Optional[ToolResolver] = None,
     ) -> StreamingResponse:
         pass
+
+
+def get_tool_name(tool: Type[Tool]) -> str:
+    return format_tool_name(tool.__name__)
+
+
+def format_tool_name(tool_name: str) -> str:
+    return tool_name.lower()
@@ -1,19 +1,25 @@
+from functools import lru_cache
 from typing import List, Type
 
-from reworkd_platform.db.crud.oauth import OAuthCrud
-from reworkd_platform.schemas.user import UserBase
+from reworkd_platform.services.tokenizer.token_service import TokenService
 from reworkd_platform.web.api.agent.tools.code import Code
 from reworkd_platform.web.api.agent.tools.image import Image
+from reworkd_platform.web.api.agent.tools.registry import ToolRegistry
+from reworkd_platform.web.api.agent.tools.resolver import ToolResolver
 from reworkd_platform.web.api.agent.tools.search import Search
 from reworkd_platform.web.api.agent.tools.sidsearch import SID
-from reworkd_platform.web.api.agent.tools.tool import Tool
+from reworkd_platform.web.api.agent.tools.tool import (
+    Tool,
+    format_tool_name,
+    get_tool_name,
+)
 
 
 async def get_user_tools(
-    tool_names: List[str], user: UserBase, crud: OAuthCrud
+    tool_names: List[str], resolver: ToolResolver
 ) -> List[Type[Tool]]:
     tools = list(map(get_tool_from_name, tool_names)) + get_default_tools()
-    return [tool for tool in tools if await tool.dynamic_available(user, crud)]
+    return await resolver.available_tools(tools)
 
 
 def get_available_tools() -> List[Type[Tool]]:
@@ -21,7 +27,14 @@ def get_available_tools() -> List[Type[Tool]]:
 
 
 def get_available_tools_names() -> List[str]:
-    return [get_tool_name(tool) for tool in get_available_tools()]
+    return list(get_tool_registry().tools)
+
+
+@lru_cache(maxsize=1)
+def get_tool_registry() -> ToolRegistry:
+    return ToolRegistry.build(
+        get_available_tools(), get_default_tool(), TokenService.create()
+    )
 
 
 def get_external_tools() -> List[Type[Tool]]:
@@ -39,14 +52,6 @@ def get_default_tools() -> List[Type[Tool]]:
     ]
 
 
-def get_tool_name(tool: Type[Tool]) -> str:
-    return format_tool_name(tool.__name__)
-
-
-def format_tool_name(tool_name: str) -> str:
-    return tool_name.lower()
-
-
 def get_tools_overview(tools: List[Type[Tool]]) -> str:
     """Return a formatted string of name: description pairs for all available tools"""
 
@@ -63,11 +68,7 @@ def get_tools_overview(tools: List[Type[Tool]]) -> str:
 
 
 def get_tool_from_name(tool_name: str) -> Type[Tool]:
-    for tool in get_available_tools():
-        if get_tool_name(tool) == format_tool_name(tool_name):
-            return tool
-
-    return get_default_tool()
+    return get_tool_registry().get_tool(tool_name)
 
 
 def get_default_tool() -> Type[Tool]:
@@ -1,11 +1,16 @@
+import asyncio
 from dataclasses import dataclass
-from typing import List, TypeVar, Generic
+from typing import Generic, List, TypeVar, Union
 
 from fastapi.responses import StreamingResponse as FastAPIStreamingResponse
 from lanarky.responses import StreamingResponse
 from langchain import LLMChain
 from langchain.chat_models.base import BaseChatModel
 
+from reworkd_platform.schemas.agent import ModelSettings
+from reworkd_platform.services.tokenizer.token_service import TokenService
+from reworkd_platform.web.api.agent.helpers import openai_error_handler
+
 T = TypeVar('T')
 
 @dataclass
@@ -63,14 +68,90 @@ def summarize(
 ) -> FastAPIStreamingResponse:
     from reworkd_platform.web.api.agent.prompts import summarize_prompt
 
-    return _summarize_with_snippets(
-        model,
-        language,
-        goal,
-        "",
-        [Snippet(text)],
-        summarize_prompt,
+    chain = LLMChain(llm=model, prompt=summarize_prompt)
+
+    return StreamingResponse.from_chain(
+        chain,
+        {
+            "goal": goal,
+            "language": language,
+            "text": text,
+        },
+        media_type="text/event-stream",
+    )
+
+
+async def summarize_map_reduce(
+    model: BaseChatModel,
+    language: str,
+    goal: str,
+    results: List[str],
+    token_service: TokenService,
+    chunk_tokens: int,
+    max_concurrency: int,
+    settings: ModelSettings,
+) -> FastAPIStreamingResponse:
+    """
+    Summarize results that may not fit in a single prompt.
+
+    Results are packed into chunks of at most `chunk_tokens` tokens. Each chunk is
+    condensed concurrently (map), and the notes are combined again until they fit
+    in one chunk. The final combination (reduce) is streamed like `summarize`.
+    """
+    chunks = await token_service.achunk(results, chunk_tokens)
+
+    while len(chunks) > 1:
+        notes = await _summarize_chunks(
+            model,
+            language,
+            goal,
+            chunks,
+            chunk_tokens // 4,
+            max_concurrency,
+            settings,
+        )
+        chunks = await token_service.achunk(notes, chunk_tokens)
+
+    return summarize(model, language, goal, chunks[0] if chunks else "")
+
+
+async def _summarize_chunks(
+    model: BaseChatModel,
+    language: str,
+    goal: str,
+    chunks: List[str],
+    max_tokens: int,
+    max_concurrency: int,
+    settings: ModelSettings,
+) -> List[str]:
+    from reworkd_platform.web.api.agent.prompts import summarize_chunk_prompt
+
+    # Notes must be small enough that several of them fit in the next chunk
+    chain = LLMChain(
+        llm=model,
+        prompt=summarize_chunk_prompt,
+        llm_kwargs={"max_tokens": max_tokens, "stream": False},
     )
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def summarize_chunk(chunk: str) -> str:
+        async with semaphore:
+            return await openai_error_handler(
+                chain.arun,
+                goal=goal,
+                language=language,
+                text=chunk,
+                settings=settings,
+            )
+
+    # A failed chunk cancels the others rather than leaving them running
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(summarize_chunk(c)) for c in chunks]
+    except BaseExceptionGroup as e:
+        raise e.exceptions[0]
+
+    return [task.result() for task in tasks]
 
 
 def summarize_with_sources(
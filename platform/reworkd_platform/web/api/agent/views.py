@@ -1,32 +1,43 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse as FastAPIStreamingResponse
 from pydantic import BaseModel
 
+from reworkd_platform.db.crud.agent import AgentCRUD
 from reworkd_platform.schemas.agent import (
     AgentChat,
+    AgentJobResponse,
     AgentRun,
+    AgentRunLoop,
     AgentSummarize,
     AgentTaskAnalyze,
     AgentTaskCreate,
     AgentTaskExecute,
     NewTasksResponse,
 )
+from reworkd_platform.schemas.user import UserBase
+from reworkd_platform.services.jobs.events import job_events
+from reworkd_platform.services.jobs.queue import Job, job_queue
 from reworkd_platform.web.api.agent.agent_service.agent_service import AgentService
 from reworkd_platform.web.api.agent.agent_service.agent_service_provider import (
     get_agent_service,
 )
+from reworkd_platform.web.api.agent.agent_loop import AgentLoop, format_event
 from reworkd_platform.web.api.agent.analysis import Analysis
 from reworkd_platform.web.api.agent.dependancies import (
     agent_analyze_validator,
     agent_chat_validator,
     agent_create_validator,
     agent_execute_validator,
+    agent_run_loop_validator,
     agent_start_validator,
     agent_summarize_validator,
+    get_agent_crud,
 )
 from reworkd_platform.web.api.agent.tools.tools import get_external_tools, get_tool_name
+from reworkd_platform.web.api.dependencies import get_current_user
+from reworkd_platform.web.api.errors import PlatformaticError
 
 router = APIRouter()
 
@@ -42,6 +53,27 @@ async def start_tasks(
     return NewTasksResponse(newTasks=new_tasks, run_id=req_body.run_id)
 
 
+@router.post("/start/stream")
+async def start_tasks_stream(
+    req_body: AgentRun = Depends(agent_start_validator),
+    agent_service: AgentService = Depends(
+        get_agent_service(validator=agent_start_validator, streaming=True),
+    ),
+) -> FastAPIStreamingResponse:
+    """Stream the tasks of a new run as events, each as soon as it is generated"""
+
+    async def events() -> AsyncIterator[str]:
+        yield format_event("run", run_id=req_body.run_id)
+        try:
+            async for task in agent_service.start_goal_stream_agent(goal=req_body.goal):
+                yield format_event("task", task=task)
+        except PlatformaticError as e:
+            yield format_event("error", detail=e.detail)
+        yield format_event("done")
+
+    return FastAPIStreamingResponse(events(), media_type="text/event-stream")
+
+
 @router.post("/analyze")
 async def analyze_tasks(
     req_body: AgentTaskAnalyze = Depends(agent_analyze_validator),
@@ -117,6 +149,52 @@ async def chat(
     )
 
 
+@router.post("/run")
+async def run(
+    req_body: AgentRunLoop = Depends(agent_run_loop_validator),
+    crud: AgentCRUD = Depends(get_agent_crud),
+    agent_service: AgentService = Depends(
+        get_agent_service(validator=agent_run_loop_validator, streaming=True),
+    ),
+) -> FastAPIStreamingResponse:
+    """Run the agent's whole loop on the server, streaming each step as an event"""
+    return FastAPIStreamingResponse(
+        AgentLoop(agent_service, crud, req_body).stream(),
+        media_type="text/event-stream",
+    )
+
+
+@router.post("/jobs")
+async def create_job(
+    req_body: AgentRunLoop = Depends(agent_run_loop_validator),
+    user: UserBase = Depends(get_current_user),
+    crud: AgentCRUD = Depends(get_agent_crud),
+) -> AgentJobResponse:
+    """Queue a run for a background worker. Its events are streamed separately"""
+    await crud.session.commit()  # The worker loads the run in its own session
+    await job_queue.put(Job(run=req_body, user=user))
+    return AgentJobResponse(run_id=req_body.run_id)
+
+
+@router.get("/jobs/{run_id}/events")
+async def stream_job_events(
+    run_id: str,
+    crud: AgentCRUD = Depends(get_agent_crud),
+) -> FastAPIStreamingResponse:
+    """Stream the events of a queued run from its start, also after reconnecting"""
+    run = await crud.get_run(run_id)
+    if not run or run.user_id != crud.user.id:
+        raise HTTPException(404, f"Run {run_id} not found")
+
+    # Return the connection to the pool rather than holding it while streaming
+    await crud.session.commit()
+
+    return FastAPIStreamingResponse(
+        job_events.subscribe(run_id),
+        media_type="text/event-stream",
+    )
+
+
 class ToolModel(BaseModel):
     name: str
     description: str
@@ -2,6 +2,7 @@ from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import RedirectResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from reworkd_platform.db.crud.oauth import OAuthCrud
 from reworkd_platform.db.crud.organization import OrganizationCrud, OrganizationUsers
@@ -9,6 +10,7 @@ from reworkd_platform.schemas import UserBase
 from reworkd_platform.services.oauth_installers import OAuthInstaller, installer_factory
 from reworkd_platform.settings import settings
 from reworkd_platform.web.api.dependencies import get_current_user
+from reworkd_platform.web.api.session_cache import session_cache
 
 router = APIRouter()
 
@@ -22,6 +24,14 @@ async def organizations(
     raise HTTPException(status_code=404)
 
 
+@router.post("/logout")
+async def logout(
+    bearer: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
+) -> None:
+    """Stop accepting a signed out session token before its cache entry expires"""
+    await session_cache.revoke(bearer.credentials)
+
+
 @router.get("/{provider}")
 async def oauth_install(
     redirect: str = settings.frontend_url,
@@ -1,13 +1,24 @@
-from datetime import datetime
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import Depends, HTTPException, Header
+from fastapi import Depends, Header
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm.exc import NoResultFound
 
 from reworkd_platform.db.crud.user import UserCrud
 from reworkd_platform.db.dependencies import get_db_session
 from reworkd_platform.schemas.user import UserBase
-from reworkd_platform.web.api.http_responses import forbidden
+from reworkd_platform.web.api.session_cache import session_cache
 
+
+def user_crud(
+    session: AsyncSession = Depends(get_db_session),
+) -> UserCrud:
+    return UserCrud(session)
+
+
+async def get_current_user(
+    x_organization_id: Annotated[Optional[str], Header()] = None,
+    bearer: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
+    crud: UserCrud = Depends(user_crud),
+) -> UserBase:
+    return await session_cache.get_user(bearer.credentials, x_organization_id, crud)
@@ -0,0 +1,81 @@
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from langchain.embeddings.base import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that remembers recent vectors by content hash.
+    Tasks are embedded once when added and again whenever they are checked for
+    duplicates, so repeated texts skip the round trip to the embedding API.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache: "OrderedDict[str, List[float]]",
+        max_entries: int,
+    ):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.max_entries = max_entries
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors, missing = self._lookup(texts)
+        if missing:
+            self._store(missing, self.embeddings.embed_documents(missing), vectors)
+
+        return [vectors[self._key(text)] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors, missing = self._lookup(texts)
+        if missing:
+            embeds = await self.embeddings.aembed_documents(missing)
+            self._store(missing, embeds, vectors)
+
+        return [vectors[self._key(text)] for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    def _lookup(self, texts: List[str]) -> Tuple[Dict[str, List[float]], List[str]]:
+        vectors: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+
+        for text in texts:
+            key = self._key(text)
+            if key in vectors or key in missing:
+                continue
+
+            if (vector := self.cache.get(key)) is not None:
+                self.cache.move_to_end(key)
+                vectors[key] = vector
+            else:
+                missing[key] = text
+
+        return vectors, list(missing.values())
+
+    def _store(
+        self,
+        texts: List[str],
+        embeds: List[List[float]],
+        vectors: Dict[str, List[float]],
+    ) -> None:
+        if len(texts) != len(embeds):
+            raise ValueError("Embeddings and texts are not the same length")
+
+        for text, vector in zip(texts, embeds):
+            key = self._key(text)
+            vectors[key] = self.cache[key] = vector
+
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+    def _key(self, text: str) -> str:
+        model = getattr(self.embeddings, "model", "")
+        return hashlib.sha256(f"{model}:{text}".encode()).hexdigest()
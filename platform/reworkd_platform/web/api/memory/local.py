@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain.embeddings import OpenAIEmbeddings
+from langchain.embeddings.base import Embeddings
+from loguru import logger
+
+from reworkd_platform.settings import Settings, settings
+from reworkd_platform.web.api.memory.cached_embeddings import CachedEmbeddings
+from reworkd_platform.web.api.memory.memory import AgentMemory, QueryResult
+
+TOP_K = 5
+INITIAL_CAPACITY = 64
+
+_embedding_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+
+
+class VectorNamespace:
+    """
+    Normalized vectors of a single namespace stored in one contiguous float32
+    matrix, so a query is a single matrix-vector product. The matrix doubles in
+    capacity when full, making appends amortized O(1).
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        ids: List[str],
+        texts: List[str],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.vectors = vectors
+        self.ids = ids
+        self.texts = texts
+        self.size = len(ids)
+        self.clock = clock
+        self.last_used = clock()
+        self.dirty = False  # Added to since it was created or last snapshotted
+
+    @classmethod
+    def empty(cls, dim: int, **kwargs: Any) -> "VectorNamespace":
+        vectors = np.empty((INITIAL_CAPACITY, dim), dtype=np.float32)
+        return cls(vectors, [], [], **kwargs)
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    @property
+    def capacity(self) -> int:
+        return self.vectors.shape[0]
+
+    def add(self, ids: List[str], texts: List[str], vectors: np.ndarray) -> None:
+        self.last_used = self.clock()
+        self._reserve(self.size + len(ids))
+
+        self.vectors[self.size : self.size + len(ids)] = _normalize(vectors)
+        self.ids.extend(ids)
+        self.texts.extend(texts)
+        self.size += len(ids)
+        self.dirty = True
+
+    def query(self, vector: np.ndarray, top_k: int) -> List[Tuple[str, str, float]]:
+        """Return (id, text, cosine similarity) of the closest vectors, best first"""
+        self.last_used = self.clock()
+        k = min(top_k, self.size)
+        if k == 0:
+            return []
+
+        scores = self.vectors[: self.size] @ _normalize(vector)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [(self.ids[i], self.texts[i], float(scores[i])) for i in top]
+
+    def _reserve(self, size: int) -> None:
+        # Memory mapped snapshots are read only and are copied on first write
+        if size <= self.capacity and self.vectors.flags.writeable:
+            return
+
+        capacity = max(self.capacity, INITIAL_CAPACITY)
+        while capacity < size:
+            capacity *= 2
+
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        vectors[: self.size] = self.vectors[: self.size]
+        self.vectors = vectors
+
+
+class LocalVectorStore:
+    """
+    Process wide store of vector namespaces.
+
+    Namespaces untouched for `idle_ttl` seconds are evicted. If a snapshot
+    directory is configured they are written there first and memory mapped back
+    in the next time they are used.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float,
+        snapshot_dir: Optional[Path] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.idle_ttl = idle_ttl
+        self.snapshot_dir = snapshot_dir
+        self.clock = clock
+        self._namespaces: Dict[str, VectorNamespace] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, settings_: Settings) -> "LocalVectorStore":
+        snapshot_dir = settings_.local_memory_snapshot_dir
+        return cls(
+            idle_ttl=settings_.local_memory_idle_ttl,
+            snapshot_dir=Path(snapshot_dir) if snapshot_dir else None,
+        )
+
+    def __len__(self) -> int:
+        return len(self._namespaces)
+
+    def add(
+        self, name: str, ids: List[str], texts: List[str], vectors: List[List[float]]
+    ) -> None:
+        if not ids:
+            return
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            namespace = self._get(name) or VectorNamespace.empty(
+                matrix.shape[1], clock=self.clock
+            )
+            namespace.add(ids, texts, matrix)
+            self._namespaces[name] = namespace
+
+    def query(
+        self, name: str, vector: List[float], top_k: int = TOP_K
+    ) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            namespace = self._get(name)
+            if namespace is None:
+                return []
+
+            return namespace.query(np.asarray(vector, dtype=np.float32), top_k)
+
+    def reset(self, name: str) -> None:
+        with self._lock:
+            self._namespaces.pop(name, None)
+            if self.snapshot_dir:
+                for path in self._snapshot_paths(name):
+                    path.unlink(missing_ok=True)
+
+    def evict_idle(self) -> None:
+        with self._lock:
+            self._evict_idle()
+
+    def snapshot_all(self) -> None:
+        with self._lock:
+            for name, namespace in self._namespaces.items():
+                try:
+                    self._snapshot(name, namespace)
+                except Exception as e:
+                    logger.exception(f"Failed to snapshot local memory: {e}")
+
+    def _get(self, name: str) -> Optional[VectorNamespace]:
+        self._evict_idle()
+
+        namespace = self._namespaces.get(name) or self._load(name)
+        if namespace is not None:
+            self._namespaces[name] = namespace
+
+        return namespace
+
+    def _evict_idle(self) -> None:
+        now = self.clock()
+        for name, namespace in list(self._namespaces.items()):
+            if now - namespace.last_used < self.idle_ttl:
+                continue
+
+            try:
+                self._snapshot(name, namespace)
+            except Exception as e:
+                # Keep the namespace rather than lose tasks that were never saved
+                logger.exception(f"Failed to snapshot local memory: {e}")
+                continue
+
+            del self._namespaces[name]
+
+    def _snapshot(self, name: str, namespace: VectorNamespace) -> None:
+        # A namespace loaded and not added to is still memory mapped from its
+        # snapshot, and writing over the file would truncate the mapped data
+        if self.snapshot_dir is None or not namespace.dirty:
+            return
+
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        vectors_path, rows_path = self._snapshot_paths(name)
+
+        # Vectors are replaced first, so rows never reference missing vectors
+        with _replace(vectors_path) as f:
+            np.save(f, namespace.vectors[: namespace.size])
+        with _replace(rows_path) as f:
+            f.write(
+                json.dumps({"ids": namespace.ids, "texts": namespace.texts}).encode()
+            )
+
+        namespace.dirty = False
+
+    def _load(self, name: str) -> Optional[VectorNamespace]:
+        if self.snapshot_dir is None:
+            return None
+
+        vectors_path, rows_path = self._snapshot_paths(name)
+        if not vectors_path.exists() or not rows_path.exists():
+            return None
+
+        rows = json.loads(rows_path.read_text())
+        return VectorNamespace(
+            np.load(vectors_path, mmap_mode="r"),
+            rows["ids"],
+            rows["texts"],
+            clock=self.clock,
+        )
+
+    def _snapshot_paths(self, name: str) -> Tuple[Path, Path]:
+        assert self.snapshot_dir is not None
+        stem = hashlib.sha256(name.encode()).hexdigest()
+        return self.snapshot_dir / f"{stem}.npy", self.snapshot_dir / f"{stem}.json"
+
+
+class LocalMemory(AgentMemory):
+    """
+    AgentMemory kept in process. Avoids a network round trip per similarity
+    check for single node deployments.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        store: Optional[LocalVectorStore] = None,
+        embeddings: Optional[Embeddings] = None,
+    ):
+        self.namespace = namespace
+        self.store = store or local_vector_store
+        self.embeddings = embeddings
+
+    def __enter__(self) -> AgentMemory:
+        if self.embeddings is None:
+            self.embeddings = CachedEmbeddings(
+                OpenAIEmbeddings(
+                    client=None,  # Meta private value but mypy will complain
+                    openai_api_key=settings.openai_api_key,
+                ),
+                _embedding_cache,
+                settings.memory_embedding_cache_size,
+            )
+
+        return self
+
+    def __exit__(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def reset_class(self) -> None:
+        self.store.reset(self.namespace)
+
+    def add_tasks(self, tasks: List[str]) -> List[str]:
+        return self._add(tasks, self._embeddings.embed_documents(tasks))
+
+    def get_similar_tasks(
+        self, query: str, score_threshold: float = 0.95
+    ) -> List[QueryResult]:
+        return self._similar(self._embeddings.embed_query(query), score_threshold)
+
+    async def aadd_tasks(self, tasks: List[str]) -> List[str]:
+        return self._add(tasks, await self._embeddings.aembed_documents(tasks))
+
+    async def aget_similar_tasks(
+        self, query: str, score_threshold: float = 0.95
+    ) -> List[QueryResult]:
+        vector = await self._embeddings.aembed_query(query)
+        return self._similar(vector, score_threshold)
+
+    @property
+    def _embeddings(self) -> Embeddings:
+        if self.embeddings is None:
+            raise RuntimeError("LocalMemory must be used as a context manager")
+
+        return self.embeddings
+
+    def _add(self, tasks: List[str], vectors: List[List[float]]) -> List[str]:
+        if len(tasks) != len(vectors):
+            raise ValueError("Embeddings and tasks are not the same length")
+
+        ids = [str(uuid.uuid4()) for _ in tasks]
+        self.store.add(self.namespace, ids, tasks, vectors)
+        return ids
+
+    @staticmethod
+    def should_use() -> bool:
+        return settings.local_memory_enabled
+
+    def _similar(
+        self, vector: List[float], score_threshold: float
+    ) -> List[QueryResult]:
+        return [
+            QueryResult(id=row_id, score=score, metadata={"text": text})
+            for row_id, text, score in self.store.query(self.namespace, vector)
+            if score > score_threshold
+        ]
+
+
+@contextmanager
+def _replace(path: Path) -> Iterator[BinaryIO]:
+    """Write to a temporary file that atomically replaces `path` once complete"""
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+local_vector_store = LocalVectorStore.create(settings)
@@ -1,9 +1,18 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, List, Tuple
+from typing import Any, Dict, List, Tuple
+
+from pydantic import BaseModel
 
 SimilarTasks = List[Tuple[str, float]]
 
 
+class QueryResult(BaseModel):
+    id: str
+    score: float
+    metadata: Dict[str, Any] = {}
+
+
 class AgentMemory(ABC):
     """
     Base class for AgentMemory
@@ -30,6 +39,18 @@ class AgentMemory(ABC):
     def reset_class(self) -> None:
         raise NotImplementedError()
 
+    async def aadd_tasks(self, tasks: List[str]) -> List[str]:
+        """
+        Async variant of add_tasks. Memories backed by network services should
+        override this; the default keeps the sync call off the event loop.
+        """
+        return await asyncio.to_thread(self.add_tasks, tasks)
+
+    async def aget_similar_tasks(
+        self, query: str, score_threshold: float = 0.95
+    ) -> List[Any]:
+        return await asyncio.to_thread(self.get_similar_tasks, query, score_threshold)
+
     @staticmethod
     def should_use() -> bool:
         return True
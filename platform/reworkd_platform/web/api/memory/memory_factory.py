@@ -0,0 +1,29 @@
+from typing import List, Type
+
+from loguru import logger
+
+from reworkd_platform.services.pinecone.pinecone import PineconeMemory
+from reworkd_platform.web.api.memory.local import LocalMemory
+from reworkd_platform.web.api.memory.memory import AgentMemory
+from reworkd_platform.web.api.memory.memory_with_fallback import MemoryWithFallback
+from reworkd_platform.web.api.memory.null import NullAgentMemory
+
+# In order of preference, the first one that should_use is chosen
+MEMORIES: List[Type[AgentMemory]] = [PineconeMemory, LocalMemory]
+
+
+def create_memory(namespace: str) -> AgentMemory:
+    """
+    Memory of the tasks of a run. Falls back to NullAgentMemory when no vector
+    store is configured or the configured one fails.
+    """
+    for memory in MEMORIES:
+        if not memory.should_use():
+            continue
+
+        try:
+            return MemoryWithFallback(memory(namespace), NullAgentMemory())
+        except Exception as e:
+            logger.exception(e)
+
+    return NullAgentMemory()
@@ -1,8 +1,68 @@
 from __future__ import annotations
 
-from typing import Any, List, TypeVar
+from typing import Any, Awaitable, Callable, List, TypeVar
 
 from loguru import logger
 
 from reworkd_platform.web.api.memory.memory import AgentMemory
 
+T = TypeVar("T")
+
+
+class MemoryWithFallback(AgentMemory):
+    """
+    Wrap a primary AgentMemory provider and use a fallback in the case that it fails
+    """
+
+    def __init__(self, primary: AgentMemory, secondary: AgentMemory):
+        self.primary = primary
+        self.secondary = secondary
+
+    def __enter__(self) -> AgentMemory:
+        try:
+            return self.primary.__enter__()
+        except Exception as e:
+            logger.exception(e)
+            return self.secondary.__enter__()
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        try:
+            self.primary.__exit__(exc_type, exc_value, traceback)
+        except Exception as e:
+            logger.exception(e)
+            self.secondary.__exit__(exc_type, exc_value, traceback)
+
+    def add_tasks(self, tasks: List[str]) -> List[str]:
+        return self._run(lambda memory: memory.add_tasks(tasks))
+
+    def get_similar_tasks(self, query: str, score_threshold: float = 0.95) -> List[Any]:
+        return self._run(
+            lambda memory: memory.get_similar_tasks(query, score_threshold)
+        )
+
+    def reset_class(self) -> None:
+        return self._run(lambda memory: memory.reset_class())
+
+    async def aadd_tasks(self, tasks: List[str]) -> List[str]:
+        return await self._arun(lambda memory: memory.aadd_tasks(tasks))
+
+    async def aget_similar_tasks(
+        self, query: str, score_threshold: float = 0.95
+    ) -> List[Any]:
+        return await self._arun(
+            lambda memory: memory.aget_similar_tasks(query, score_threshold)
+        )
+
+    def _run(self, func: Callable[[AgentMemory], T]) -> T:
+        try:
+            return func(self.primary)
+        except Exception as e:
+            logger.exception(e)
+            return func(self.secondary)
+
+    async def _arun(self, func: Callable[[AgentMemory], Awaitable[T]]) -> T:
+        try:
+            return await func(self.primary)
+        except Exception as e:
+            logger.exception(e)
+            return await func(self.secondary)
@@ -23,3 +23,11 @@ class NullAgentMemory(AgentMemory):
 
     def reset_class(self) -> None:
         pass
+
+    async def aadd_tasks(self, tasks: List[str]) -> List[str]:
+        return []
+
+    async def aget_similar_tasks(
+        self, query: str, score_threshold: float = 0
+    ) -> List[str]:
+        return []
@@ -1,5 +1,18 @@
+from typing import Any, Dict
+
 from fastapi import APIRouter
 
+from reworkd_platform.db.write_behind import agent_task_queue
+from reworkd_platform.services.http.client import http_client, llm_http_client
+from reworkd_platform.services.jobs.worker import job_worker
+from reworkd_platform.services.rate_limiter import openai_rate_limiter
+from reworkd_platform.web.api.agent.completion_cache import completion_cache
+from reworkd_platform.web.api.agent.model_factory import llm_client_pool
+from reworkd_platform.web.api.agent.model_router import model_router
+from reworkd_platform.web.api.agent.tools.image import image_cache
+from reworkd_platform.web.api.agent.tools.search import search_cache
+from reworkd_platform.web.api.session_cache import session_cache
+
 router = APIRouter()
 
 
@@ -18,3 +31,23 @@ def error_check() -> None:
     Checks that errors are being correctly logged.
     """
     raise Exception("This is an expected error from the error check endpoint!")
+
+
+@router.get("/metrics")
+def metrics() -> Dict[str, Any]:
+    """
+    Exposes usage metrics of shared in-process resources.
+    """
+    return {
+        "http": http_client.stats(),
+        "llm_http": llm_http_client.stats(),
+        "search_cache": search_cache.stats(),
+        "image_cache": image_cache.stats(),
+        "completion_cache": completion_cache.stats(),
+        "llm_clients": llm_client_pool.stats(),
+        "openai_rate_limiter": openai_rate_limiter.stats(),
+        "model_router": model_router.stats(),
+        "session_cache": session_cache.stats(),
+        "agent_task_queue": agent_task_queue.stats(),
+        "jobs": job_worker.stats(),
+    }
@@ -0,0 +1,151 @@
+import hashlib
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm.exc import NoResultFound
+
+from reworkd_platform.db.crud.user import UserCrud
+from reworkd_platform.schemas.user import OrganizationRole, UserBase
+from reworkd_platform.services.cache.backend import create_cache_backend
+from reworkd_platform.services.cache.cache import Cache
+from reworkd_platform.services.cache.single_flight import SingleFlight
+from reworkd_platform.settings import Settings, settings
+from reworkd_platform.web.api.http_responses import forbidden
+
+INVALID_SESSION = "Invalid session token"
+EXPIRED_SESSION = "Session token expired"
+
+
+class SessionCache:
+    """
+    Cache of authenticated sessions and organization memberships.
+
+    Sessions are cached by token digest and never outlive `UserSession.expires`.
+    Unknown or expired tokens are remembered for `negative_ttl` seconds so
+    repeated requests with bad credentials do not reach the database.
+
+    With a shared (redis) backend a revoked token is rejected by every worker.
+    Otherwise the other workers keep accepting it until their entry expires,
+    so the cache TTL bounds how long a signed out session stays usable.
+    """
+
+    def __init__(
+        self,
+        cache: Cache,
+        *,
+        negative_ttl: float,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.cache = cache
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._flight: SingleFlight[Any] = SingleFlight()
+
+    @classmethod
+    def create(cls, settings_: Settings) -> "SessionCache":
+        return cls(
+            Cache(
+                create_cache_backend(settings_, settings_.session_cache_max_entries),
+                namespace="session",
+                ttl=settings_.session_cache_ttl,
+            ),
+            negative_ttl=settings_.session_cache_negative_ttl,
+        )
+
+    async def get_user(
+        self, token: str, organization_id: Optional[str], crud: UserCrud
+    ) -> UserBase:
+        session = await self._get_session(token, crud)
+        if session.get("error"):
+            raise forbidden(session["error"])
+
+        if datetime.fromisoformat(session["expires"]) <= self._clock():
+            await self.invalidate(token)
+            raise forbidden(EXPIRED_SESSION)
+
+        user = UserBase(**session["user"])
+        if organization_id:
+            user.organization = await self._get_organization(
+                user.id, organization_id, crud
+            )
+
+        return user
+
+    async def invalidate(self, token: str) -> None:
+        """Forget a session, so it is loaded from the database again"""
+        await self.cache.delete(self._session_key(token))
+
+    async def revoke(self, token: str) -> None:
+        """
+        Reject a signed out token for as long as its session may be cached,
+        even if a worker would still find the session in the database.
+        """
+        await self._set_error(self._session_key(token), INVALID_SESSION, self.cache.ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+    async def _get_session(self, token: str, crud: UserCrud) -> Dict[str, Any]:
+        key = self._session_key(token)
+        if (value := await self.cache.get(key)) is not None:
+            return value
+
+        async def load() -> Dict[str, Any]:
+            try:
+                session = await crud.get_user_session(token)
+            except NoResultFound:
+                return await self._set_error(key, INVALID_SESSION)
+
+            lifetime = (session.expires - self._clock()).total_seconds()
+            if lifetime <= 0:
+                return await self._set_error(key, EXPIRED_SESSION)
+
+            value = {
+                "user": {
+                    "id": session.user.id,
+                    "name": session.user.name,
+                    "email": session.user.email,
+                    "image": session.user.image,
+                },
+                "expires": session.expires.isoformat(),
+            }
+            await self.cache.set(key, value, min(self.cache.ttl, lifetime))
+            return value
+
+        return await self._flight.do(key, load)
+
+    async def _get_organization(
+        self, user_id: str, organization_id: str, crud: UserCrud
+    ) -> Optional[OrganizationRole]:
+        key = f"organization:{user_id}:{organization_id}"
+        if (value := await self.cache.get(key)) is None:
+            organization = await crud.get_user_organization(user_id, organization_id)
+            value = {
+                "role": (
+                    OrganizationRole(
+                        id=organization.id,
+                        role=organization.role,
+                        organization_id=organization.organization_id,
+                    ).dict()
+                    if organization
+                    else None
+                )
+            }
+            await self.cache.set(key, value)
+
+        return OrganizationRole(**value["role"]) if value["role"] else None
+
+    async def _set_error(
+        self, key: str, error: str, ttl: Optional[float] = None
+    ) -> Dict[str, Any]:
+        value = {"error": error}
+        await self.cache.set(key, value, ttl or self.negative_ttl)
+        return value
+
+    @staticmethod
+    def _session_key(token: str) -> str:
+        # Tokens are never written to the cache backend in plain text
+        return hashlib.sha256(token.encode()).hexdigest()
+
+
+session_cache = SessionCache.create(settings)
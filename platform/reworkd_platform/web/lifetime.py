@@ -7,7 +7,13 @@ from sqlalchemy import MetaData
 import reworkd_platform.db.models
 import reworkd_platform.db.meta
 import reworkd_platform.db.utils
+import reworkd_platform.db.write_behind
+import reworkd_platform.services.http.lifetime
+import reworkd_platform.services.jobs.lifetime
+import reworkd_platform.services.oauth_tokens
 import reworkd_platform.services.tokenizer.lifetime
+import reworkd_platform.web.api.agent.tools.tools
+import reworkd_platform.web.api.memory.local
 
 app = FastAPI()
 
@@ -28,7 +34,16 @@ def setup_db(app: FastAPI) -> None:
 async def init_app() -> None:
     await create_tables()
     setup_db(app)
+    reworkd_platform.db.write_behind.agent_task_queue.start(
+        app.state.db_session_factory
+    )
+    reworkd_platform.services.oauth_tokens.oauth_token_manager.start(
+        app.state.db_session_factory
+    )
     reworkd_platform.services.tokenizer.lifetime.init_tokenizer(app)
+    reworkd_platform.services.http.lifetime.init_http_client(app)
+    reworkd_platform.web.api.agent.tools.tools.get_tool_registry()
+    await reworkd_platform.services.jobs.lifetime.init_jobs(app)
 
 @app.on_event("startup")
 async def startup_event() -> None:
@@ -36,6 +51,12 @@ async def startup_event() -> None:
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
+    await reworkd_platform.services.jobs.lifetime.shutdown_jobs(app)
+    await reworkd_platform.services.http.lifetime.shutdown_http_client(app)
+    reworkd_platform.services.tokenizer.lifetime.shutdown_tokenizer(app)
+    reworkd_platform.web.api.memory.local.local_vector_store.snapshot_all()
+    await reworkd_platform.db.write_behind.agent_task_queue.close()
+    await reworkd_platform.services.oauth_tokens.oauth_token_manager.close()
     app.state.db_engine.dispose()
 
 if __name__ == "__main__":